@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Measure event loop responsiveness while large downloads are base64-encoded.
+
+A fake copyparty (bench/fake_copyparty.py) runs in a child process and serves
+one large file. Several download_file calls fetch it as base64 while a probe
+task sleeps for 1 ms in a loop; how late each wake-up comes is the time the
+event loop was blocked. Small list_files calls run alongside to show the
+latency other MCP clients would see. Each mode is run twice: encoding inline on
+the event loop, and offloaded to the encode pool (COPYPARTY_ENCODE_OFFLOAD_BYTES).
+
+Usage:
+    python bench/bench_encode_offload.py --size-mb 100 --downloads 4
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+
+import fake_copyparty  # noqa: E402
+
+
+def serve(conn, size):
+    """Child process: serve one large file and a small directory, report the port."""
+    httpd, fs = fake_copyparty.start()
+    fs.write("/big.bin", os.urandom(size))
+    fs.populate(1, 20, 64)
+    conn.send(httpd.server_port)
+    while True:
+        time.sleep(3600)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+async def run(server, args):
+    """Download the large file args.downloads times while probing loop lag."""
+    stop = asyncio.Event()
+    lags, list_latencies = [], []
+    # @mcp.tool wraps the functions in FastMCP tool objects; call the functions themselves
+    list_files = getattr(server.list_files_async, "fn", server.list_files_async)
+    download_file = getattr(server.download_file_async, "fn", server.download_file_async)
+
+    async def probe():
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - started - 0.001)
+
+    async def lister():
+        while not stop.is_set():
+            started = time.perf_counter()
+            await list_files("/bench/d0000/")
+            list_latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0.005)
+
+    async def download(i):
+        result = await download_file("/big.bin", as_base64=True, length=args.size_mb * 1024 * 1024)
+        assert result["size"] == args.size_mb * 1024 * 1024 and not result["truncated"]
+
+    background = [asyncio.create_task(probe()), asyncio.create_task(lister())]
+    started = time.perf_counter()
+    await asyncio.gather(*(download(i) for i in range(args.downloads)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*background)
+    lags.sort()
+    list_latencies.sort()
+    return elapsed, lags, list_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=100, help="Size of the downloaded file in MiB")
+    parser.add_argument("--downloads", type=int, default=4, help="Concurrent downloads of the file")
+    args = parser.parse_args()
+
+    parent_conn, child_conn = multiprocessing.Pipe()
+    fake = multiprocessing.Process(target=serve, args=(child_conn, args.size_mb * 1024 * 1024), daemon=True)
+    fake.start()
+    port = parent_conn.recv()
+
+    os.environ["COPYPARTY_URL"] = f"http://127.0.0.1:{port}"
+    os.environ["COPYPARTY_MAX_DOWNLOAD_BYTES"] = str(args.size_mb * 1024 * 1024)
+    os.environ["COPYPARTY_CONTENT_CACHE_BYTES"] = "0"
+    import server
+
+    offload_bytes = server.COPYPARTY_ENCODE_OFFLOAD_BYTES
+    print(f"{args.downloads} x {args.size_mb} MiB base64 downloads, {server.COPYPARTY_ENCODE_WORKERS} encode threads")
+    print(f"{'mode':<12}{'seconds':>9}{'lag p50 ms':>12}{'lag p99 ms':>12}{'lag max ms':>12}{'ls p99 ms':>11}")
+    try:
+        for label, threshold in (("inline", sys.maxsize), ("offloaded", offload_bytes)):
+            server.COPYPARTY_ENCODE_OFFLOAD_BYTES = threshold
+            elapsed, lags, list_latencies = asyncio.run(run(server, args))
+            print(f"{label:<12}{elapsed:>9.2f}{percentile(lags, 50) * 1000:>12.2f}{percentile(lags, 99) * 1000:>12.2f}"
+                  f"{(lags[-1] if lags else 0) * 1000:>12.2f}{percentile(list_latencies, 99) * 1000:>11.2f}")
+    finally:
+        fake.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Compare single-stream and parallel ranged downloads against a throttled local server.
+
+The stand-in server caps throughput per connection (like a long WAN link does),
+so splitting a file into concurrent range requests should scale until the
+concurrency limit is reached.
+
+Usage:
+    python bench/bench_parallel_download.py --size-mb 256 --rate-mb 20 --concurrency 1 4 8
+"""
+import argparse
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+
+import fake_copyparty  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=128, help="Size of the served file in MiB")
+    parser.add_argument("--rate-mb", type=float, default=20, help="Per-connection throughput cap in MiB/s")
+    parser.add_argument("--chunk-mb", type=int, default=8, help="Range size for parallel downloads in MiB")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[2, 4, 8], help="Parallel range counts to try")
+    args = parser.parse_args()
+
+    blob = os.urandom(args.size_mb * 1024 * 1024)
+    httpd, fs = fake_copyparty.start(rate=args.rate_mb * 1024 * 1024)
+    fs.write("/big.bin", blob)
+
+    os.environ["COPYPARTY_URL"] = f"http://127.0.0.1:{httpd.server_port}"
+    os.environ.setdefault("COPYPARTY_POOL_MAXSIZE", str(max(args.concurrency)))
+    import server
+
+    runs = [("single stream", len(blob), 1)]
+    runs += [(f"parallel x{n}", args.chunk_mb * 1024 * 1024, n) for n in args.concurrency]
+
+    print(f"{args.size_mb} MiB file, {args.rate_mb} MiB/s per connection")
+    print(f"{'mode':<16}{'seconds':>10}{'MiB/s':>10}")
+    for label, chunk_size, concurrency in runs:
+        result = server.download_file_parallel("/big.bin", chunk_size=chunk_size, concurrency=concurrency)
+        assert result["size"] == len(blob)
+        with open(result["local_path"], "rb") as f:
+            assert f.read() == blob, "reassembled file differs from source"
+        os.remove(result["local_path"])
+        print(f"{label:<16}{result['elapsed_seconds']:>10.2f}{result['bytes_per_second'] / 1024 / 1024:>10.1f}")
+
+    httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Latency and throughput benchmark for every MCP tool in src/server.py.
+
+A fake copyparty (bench/fake_copyparty.py) runs in a child process so the
+peak RSS reported here is the MCP server's own. Each tool is driven through
+its async implementation, the same code path FastMCP runs, with a fixed
+number of calls spread over `--concurrency` concurrent callers.
+
+Usage:
+    python bench/bench_tools.py --requests 200 --concurrency 16 --payload-size 65536
+    python bench/bench_tools.py --tools list_files download_file --output baseline.json
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+
+import fake_copyparty  # noqa: E402
+
+
+def serve(conn, dirs, files, file_size):
+    """Child process: populate and run the fake copyparty, report its port."""
+    httpd, fs = fake_copyparty.start()
+    fs.populate(dirs, files, file_size)
+    fs.write("/bench/log.txt", b"line\n" * 1000)
+    conn.send(httpd.server_port)
+    while True:
+        time.sleep(3600)
+
+
+class ToolFunctions:
+    """Attribute access to server's tool coroutines.
+
+    @mcp.tool replaces each function with a FastMCP tool object, which is not
+    callable; the function it wraps is its fn.
+    """
+
+    def __init__(self, module):
+        self.module = module
+
+    def __getattr__(self, name):
+        value = getattr(self.module, name)
+        return getattr(value, "fn", value)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def scenarios(server, args):
+    """Map tool name -> coroutine factory taking the call index.
+
+    The order matters: copy/move/delete work on the files upload_file created.
+    The spool reader scenarios create their own spool first, so their latency
+    includes spooling the file.
+    """
+    payload = "x" * args.payload_size
+    dirs = args.dirs
+
+    def d(i):
+        return f"/bench/d{i % dirs:04}"
+
+    def f(i):
+        return f"{d(i)}/f{i % args.files:04}.bin"
+
+    async def read_spooled(i):
+        spooled = await server.download_file_parallel_async(f(i))
+        try:
+            return await server.read_spooled_file_async(spooled["spool_id"], 0, args.payload_size)
+        finally:
+            await server.delete_spooled_file_async(spooled["spool_id"])
+
+    async def delete_spooled(i):
+        spooled = await server.download_as_tar_async(d(i), spool=True)
+        return await server.delete_spooled_file_async(spooled["spool_id"])
+
+    return {
+        "get_server_info": lambda i: server.get_server_info_async(),
+        "list_files": lambda i: server.list_files_async(d(i) + "/"),
+        "walk_files": lambda i: server.walk_files_async("/bench", max_results=1000),
+        "get_file_metadata": lambda i: server.get_file_metadata_async(f(i)),
+        "get_files_metadata": lambda i: server.get_files_metadata_async([f(i + n) for n in range(10)]),
+        "download_file": lambda i: server.download_file_async(f(i), as_base64=True),
+        "download_file_parallel": lambda i: server.download_file_parallel_async(f(i)),
+        "read_spooled_file": read_spooled,
+        "delete_spooled_file": delete_spooled,
+        "download_file_as_text": lambda i: server.download_file_as_text_async("/bench/log.txt"),
+        "get_thumbnail": lambda i: server.get_thumbnail_async(f(i)),
+        "get_thumbnails": lambda i: server.get_thumbnails_async([f(i + n) for n in range(10)]),
+        "tail_file": lambda i: server.tail_file_async("/bench/log.txt", -1024),
+        "tail_files": lambda i: server.tail_files_async(["/bench/log.txt"], offsets={"/bench/log.txt": -1024}),
+        "render_markdown": lambda i: server.render_markdown_async(f(i)),
+        "download_as_tar": lambda i: server.download_as_tar_async(d(i)),
+        "download_as_tar_spooled": lambda i: server.download_as_tar_async(d(i), spool=True),
+        "download_as_zip": lambda i: server.download_as_zip_async(d(i)),
+        "search_files": lambda i: server.search_files_async(f"f{i % args.files:04}"),
+        "upload_file": lambda i: server.upload_file_async("/bench/up/", payload, f"u{i}.bin"),
+        "upload_files": lambda i: server.upload_files_async(f"/bench/upn/{i}", [{"name": f"s{n}/u{n}.bin", "content": payload} for n in range(10)]),
+        "upload_file_up2k": lambda i: server.upload_file_async("/bench/up2k/", payload, f"u{i}.bin", up2k=True),
+        "create_directory": lambda i: server.create_directory_async("/bench/mk/", f"dir{i}"),
+        "create_directory_recursive": lambda i: server.create_directory_async("/bench/mkp/", f"{i % 4}/{i % 16}/{i}", recursive=True),
+        "create_directories": lambda i: server.create_directories_async([f"/bench/mkb/{i}/{n}/{m}" for n in range(4) for m in range(4)]),
+        "copy_file": lambda i: server.copy_file_async(f"/bench/up/u{i}.bin", f"/bench/cp/u{i}.bin"),
+        "move_file": lambda i: server.move_file_async(f"/bench/cp/u{i}.bin", f"/bench/mv/u{i}.bin"),
+        "copy_files": lambda i: server.copy_files_async([(f"/bench/mv/u{i}.bin", f"/bench/cp2/d{i}/u{n}.bin") for n in range(10)]),
+        "move_files": lambda i: server.move_files_async([(f"/bench/cp2/d{i}/u{n}.bin", f"/bench/mv2/d{i}/u{n}.bin") for n in range(10)]),
+        "delete_file": lambda i: server.delete_file_async(f"/bench/mv/u{i}.bin"),
+        "delete_multiple_files": lambda i: server.delete_multiple_files_async([f"/bench/up/u{i}.bin"]),
+        "create_share": lambda i: server.create_share_async(f(i), 60),
+        "list_shares": lambda i: server.list_shares_async(),
+        "update_share_expiration": lambda i: server.update_share_expiration_async(f(i), 30),
+        "delete_share": lambda i: server.delete_share_async(f(i)),
+        "get_recent_uploads": lambda i: server.get_recent_uploads_async(),
+        "get_all_recent_uploads": lambda i: server.get_all_recent_uploads_async(as_json=True),
+        "get_active_downloads": lambda i: server.get_active_downloads_async(),
+    }
+
+
+async def run_tool(factory, requests: int, concurrency: int):
+    """Call factory(i) for i in range(requests) with bounded concurrency."""
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                result = await factory(i)
+                if isinstance(result, dict) and result.get("local_path"):
+                    os.remove(result["local_path"])
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+async def bench(server, args):
+    table = scenarios(ToolFunctions(server), args)
+    selected = args.tools or list(table)
+    unknown = set(selected) - set(table)
+    if unknown:
+        raise SystemExit(f"unknown tools: {', '.join(sorted(unknown))}")
+
+    results = []
+    print(f"{'tool':<26}{'calls':>7}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}{'peak RSS MiB':>14}")
+    for name in selected:
+        latencies, errors, elapsed = await run_tool(table[name], args.requests, args.concurrency)
+        latencies.sort()
+        row = {
+            "tool": name,
+            "calls": len(latencies),
+            "errors": errors,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        results.append(row)
+        print(f"{name:<26}{row['calls']:>7}{errors:>8}{row['p50_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+              f"{row['requests_per_second']:>10.1f}{row['peak_rss_mb']:>14.1f}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100, help="Calls per tool")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent callers per tool")
+    parser.add_argument("--payload-size", type=int, default=16 * 1024, help="Size of served and uploaded files in bytes")
+    parser.add_argument("--dirs", type=int, default=10, help="Directories in the fake tree")
+    parser.add_argument("--files", type=int, default=100, help="Files per directory in the fake tree")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the listing, search, content and thumbnail caches and request coalescing")
+    parser.add_argument("--tools", nargs="+", help="Only benchmark these tools")
+    parser.add_argument("--output", help="Also write results as JSON to this file")
+    args = parser.parse_args()
+
+    parent_conn, child_conn = multiprocessing.Pipe()
+    fake = multiprocessing.Process(target=serve, args=(child_conn, args.dirs, args.files, args.payload_size), daemon=True)
+    fake.start()
+    port = parent_conn.recv()
+
+    os.environ["COPYPARTY_URL"] = f"http://127.0.0.1:{port}"
+    if args.no_cache:
+        os.environ["COPYPARTY_LS_CACHE_SIZE"] = "0"
+        os.environ["COPYPARTY_SEARCH_CACHE_SIZE"] = "0"
+        os.environ["COPYPARTY_CONTENT_CACHE_BYTES"] = "0"
+        os.environ["COPYPARTY_THUMB_CACHE_BYTES"] = "0"
+        os.environ["COPYPARTY_SINGLE_FLIGHT"] = "false"
+    import server
+
+    try:
+        results = asyncio.run(bench(server, args))
+    finally:
+        fake.terminate()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
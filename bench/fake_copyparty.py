@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+In-memory stand-in for the copyparty endpoints used by src/server.py.
+
+Only the behaviour the MCP tools rely on is emulated: ?ls (with ETag
+revalidation), ?tar, ?zip, ?th, ?tail, ?txt, ?v, ?ups, ?ru, ?dls, ?shares,
+?delete, ?move, ?copy, ?share, ?eshare, ?j search, multipart upload,
+act=mkdir, up2k handshakes and chunks, and plain GETs with Range support.
+
+Run standalone to poke at it with the MCP inspector:
+    python bench/fake_copyparty.py --port 3923 --dirs 20 --files 50
+"""
+import argparse
+import base64
+import hashlib
+import io
+import json
+import posixpath
+import tarfile
+import threading
+import time
+import zipfile
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+BLOCK = 64 * 1024
+THUMBNAIL = b"\xff\xd8\xff\xe0" + bytes(8 * 1024)
+
+
+class FakeFS:
+    """A thread-safe in-memory tree of directories and files."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.files = {}
+        self.mtimes = {}
+        self.dirs = {"/"}
+        self.version = 0
+        self.up2k = {}
+        # When set, every GET and POST is answered with this status (e.g. 503) to simulate an outage
+        self.fail_status = None
+        # Seconds every request waits before it is answered, to hold calls in flight
+        self.delay = 0
+        # (method, path, query) of every request received, for counting upstream calls
+        self.requests = []
+
+    @staticmethod
+    def norm(path):
+        return posixpath.normpath("/" + unquote(path).strip("/"))
+
+    def mkdir(self, path):
+        path = self.norm(path)
+        with self.lock:
+            while path not in self.dirs:
+                self.dirs.add(path)
+                path = posixpath.dirname(path)
+            self.version += 1
+
+    def write(self, path, data):
+        path = self.norm(path)
+        self.mkdir(posixpath.dirname(path))
+        with self.lock:
+            self.files[path] = bytes(data)
+            self.mtimes[path] = int(time.time())
+            self.version += 1
+
+    def children(self, path):
+        path = self.norm(path)
+        prefix = path.rstrip("/") + "/"
+        with self.lock:
+            dirs = sorted(d for d in self.dirs if d != path and posixpath.dirname(d) == path)
+            files = sorted(f for f in self.files if f.startswith(prefix) and "/" not in f[len(prefix):])
+            return dirs, [(f, self.files[f], self.mtimes[f]) for f in files]
+
+    def subtree(self, path):
+        path = self.norm(path)
+        prefix = path.rstrip("/") + "/"
+        with self.lock:
+            return [(f, self.files[f]) for f in sorted(self.files) if f.startswith(prefix)]
+
+    def remove(self, path):
+        path = self.norm(path)
+        prefix = path.rstrip("/") + "/"
+        with self.lock:
+            for f in [f for f in self.files if f == path or f.startswith(prefix)]:
+                del self.files[f]
+                self.mtimes.pop(f, None)
+            self.dirs -= {d for d in self.dirs if d == path or d.startswith(prefix)} - {"/"}
+            self.version += 1
+
+    def clone(self, src, dst, move):
+        src, dst = self.norm(src), self.norm(dst)
+        moved = [(f, data) for f, data in self.subtree(src)]
+        single = self.files.get(src)
+        if single is not None:
+            moved = [(src, single)]
+        for f, data in moved:
+            target = dst if f == src else dst + f[len(src):]
+            self.write(target, data)
+        if move:
+            self.remove(src)
+
+    def populate(self, dirs, files_per_dir, file_size, root="/bench"):
+        payload = bytes(range(256)) * (file_size // 256 + 1)
+        for d in range(dirs):
+            for f in range(files_per_dir):
+                self.write(f"{root}/d{d:04}/f{f:04}.bin", payload[:file_size])
+
+
+def make_handler(fs, rate=None):
+    """Build a request handler bound to fs; rate caps bytes/s per connection."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def parse(self):
+            parts = urlsplit(self.path)
+            return fs.norm(parts.path), parse_qs(parts.query, keep_blank_values=True)
+
+        def received(self):
+            parts = urlsplit(self.path)
+            with fs.lock:
+                fs.requests.append((self.command, fs.norm(parts.path), parts.query))
+            if fs.delay:
+                time.sleep(fs.delay)
+
+        def body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def reply(self, status, data=b"", content_type="application/octet-stream", headers=None):
+            if isinstance(data, (dict, list)):
+                data, content_type = json.dumps(data).encode(), "application/json"
+            elif isinstance(data, str):
+                data = data.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.send_paced(data)
+
+        def send_paced(self, data):
+            started = time.monotonic()
+            for ofs in range(0, len(data), BLOCK):
+                self.wfile.write(data[ofs:ofs + BLOCK])
+                if rate:
+                    ahead = (ofs + BLOCK) / rate - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+
+        def failing(self):
+            if fs.fail_status is None:
+                return False
+            self.body()
+            self.reply(fs.fail_status, "simulated outage", "text/plain")
+            return True
+
+        def do_HEAD(self):
+            self.received()
+            path, _ = self.parse()
+            data = fs.files.get(path)
+            self.send_response(200 if data is not None or path in fs.dirs else 404)
+            self.send_header("Content-Length", str(len(data or b"")))
+            self.end_headers()
+
+        def do_GET(self):
+            self.received()
+            if self.failing():
+                return
+            path, q = self.parse()
+            if "ls" in q:
+                return self.listing(path, q)
+            if "tar" in q or "zip" in q:
+                return self.archive(path, "zip" in q)
+            if "th" in q:
+                if path not in fs.files:
+                    return self.reply(404)
+                content_type = "audio/ogg" if q["th"][0] == "opus" else "image/jpeg"
+                return self.reply(200, THUMBNAIL, content_type)
+            if "tail" in q:
+                data = fs.files.get(path)
+                if data is None:
+                    return self.reply(404)
+                start = int(q["tail"][0] or 0)
+                return self.reply(200, data[start:] if start >= 0 else data[start:], "text/plain")
+            if "txt" in q:
+                charset = q["txt"][0] or "utf-8"
+                return self.reply(200, fs.files.get(path, b""), f"text/plain; charset={charset}")
+            if "v" in q:
+                return self.reply(200, "<html><body>viewer</body></html>", "text/html")
+            if "ups" in q or "ru" in q or "dls" in q or "shares" in q:
+                return self.reply(200, {"ok": True, "items": []})
+            return self.download(path)
+
+        def listing(self, path, q):
+            if path not in fs.dirs:
+                return self.reply(404)
+            etag = f'"{fs.version}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            dirs, files = fs.children(path)
+            dots = "dots" in q
+            listing = {
+                "dirs": [{"href": quote(posixpath.basename(d)) + "/", "sz": 0, "ts": 0}
+                         for d in dirs if dots or not posixpath.basename(d).startswith(".")],
+                "files": [],
+            }
+            for f, data, mtime in files:
+                name = posixpath.basename(f)
+                if name.startswith(".") and not dots:
+                    continue
+                entry = {"href": quote(name), "sz": len(data), "ts": mtime, "ext": posixpath.splitext(name)[1][1:]}
+                if "tags" in q:
+                    entry["tags"] = {".dur": 180, "artist": "bench", "title": name}
+                listing["files"].append(entry)
+            self.reply(200, listing, headers={"ETag": etag})
+
+        def archive(self, path, as_zip):
+            buf = io.BytesIO()
+            if as_zip:
+                with zipfile.ZipFile(buf, "w") as zf:
+                    for f, data in fs.subtree(path):
+                        zf.writestr(f[len(path):].lstrip("/"), data)
+                return self.reply(200, buf.getvalue(), "application/zip")
+            with tarfile.open(fileobj=buf, mode="w") as tf:
+                for f, data in fs.subtree(path):
+                    info = tarfile.TarInfo(f[len(path):].lstrip("/"))
+                    info.size = len(data)
+                    tf.addfile(info, io.BytesIO(data))
+            self.reply(200, buf.getvalue(), "application/x-tar")
+
+        def download(self, path):
+            data = fs.files.get(path)
+            if data is None:
+                if path in fs.dirs:
+                    return self.reply(200, "<html>dir</html>", "text/html")
+                return self.reply(404)
+            range_header = self.headers.get("Range", "")
+            if not range_header.startswith("bytes="):
+                return self.reply(200, data)
+            first, _, last = range_header[6:].partition("-")
+            start = int(first)
+            if start >= len(data):
+                return self.reply(416, headers={"Content-Range": f"bytes */{len(data)}"})
+            end = min(int(last) if last else len(data) - 1, len(data) - 1)
+            self.reply(206, data[start:end + 1], headers={"Content-Range": f"bytes {start}-{end}/{len(data)}"})
+
+        def do_POST(self):
+            self.received()
+            if self.failing():
+                return
+            path, q = self.parse()
+            content_type = self.headers.get("Content-Type", "")
+            body = self.body()
+            if "delete" in q:
+                targets = json.loads(body) if body else [path]
+                for target in targets:
+                    fs.remove(target)
+                return self.reply(200, "ok", "text/plain")
+            if "move" in q or "copy" in q:
+                move = "move" in q
+                fs.clone(path, q["move" if move else "copy"][0], move)
+                return self.reply(200, "ok", "text/plain")
+            if "share" in q:
+                return self.reply(200, {"url": "/s/" + hashlib.sha1(path.encode()).hexdigest()[:8]})
+            if "eshare" in q:
+                return self.reply(200, "ok", "text/plain")
+            if "X-Up2k-Hash" in self.headers:
+                return self.up2k_chunk(body)
+            if content_type.startswith("multipart/form-data"):
+                return self.multipart(path, content_type, body)
+            if content_type.startswith("application/x-www-form-urlencoded"):
+                form = parse_qs(body.decode(), keep_blank_values=True)
+                if form.get("act") == ["mkdir"]:
+                    fs.mkdir(posixpath.join(path, form["name"][0]))
+                    return self.reply(201, "ok", "text/plain")
+            if body[:1] in (b"{", b"["):
+                request = json.loads(body)
+                if isinstance(request, dict) and "hash" in request:
+                    return self.up2k_handshake(path, request)
+                if isinstance(request, dict) and "q" in request:
+                    return self.search(request)
+            self.reply(400, "unsupported request", "text/plain")
+
+        def multipart(self, path, content_type, body):
+            message = BytesParser(policy=HTTP).parsebytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode() + body
+            )
+            uploaded = []
+            for part in message.iter_parts():
+                filename = part.get_filename()
+                if filename:
+                    fs.write(posixpath.join(path, filename), part.get_payload(decode=True))
+                    uploaded.append({"url": posixpath.join(path, quote(filename)), "sz": len(part.get_payload(decode=True))})
+            self.reply(200, {"status": "OK", "files": uploaded})
+
+        def search(self, request):
+            term = request["q"].strip('"').lower()
+            scope = fs.norm(request.get("v", "/"))
+            with fs.lock:
+                hits = [{"rp": f, "sz": len(data), "ts": fs.mtimes[f]} for f, data in fs.files.items()
+                        if f.startswith(scope) and term in f.lower()]
+            self.reply(200, {"hits": hits})
+
+        def up2k_handshake(self, path, request):
+            wark = hashlib.sha512(json.dumps([request["name"], request["size"], request["hash"]]).encode()).hexdigest()[:44]
+            with fs.lock:
+                state = fs.up2k.setdefault(wark, {"path": posixpath.join(path, request["name"]),
+                                                  "size": request["size"], "hashes": request["hash"], "chunks": {}})
+                needed = [h for h in dict.fromkeys(request["hash"]) if h not in state["chunks"]]
+            if not needed:
+                chunks = state["chunks"]
+                if state["path"] not in fs.files and chunks:
+                    fs.write(state["path"], b"".join(chunks[h] for h in state["hashes"]))
+            self.reply(200, {"hash": needed, "wark": wark, "purl": path.rstrip("/") + "/", "name": request["name"]})
+
+        def up2k_chunk(self, body):
+            wark = self.headers["X-Up2k-Wark"]
+            chunk_hash = self.headers["X-Up2k-Hash"]
+            actual = base64.urlsafe_b64encode(hashlib.sha512(body).digest()[:33]).decode()
+            if actual != chunk_hash or wark not in fs.up2k:
+                return self.reply(400, "bad chunk", "text/plain")
+            with fs.lock:
+                fs.up2k[wark]["chunks"][chunk_hash] = body
+            self.reply(200, "ok", "text/plain")
+
+    return Handler
+
+
+def start(fs=None, host="127.0.0.1", port=0, rate=None):
+    """Start a fake copyparty in a background thread; returns (server, fs)."""
+    fs = fs or FakeFS()
+    httpd = ThreadingHTTPServer((host, port), make_handler(fs, rate))
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, fs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=3923)
+    parser.add_argument("--dirs", type=int, default=10, help="Directories created under /bench")
+    parser.add_argument("--files", type=int, default=100, help="Files per directory")
+    parser.add_argument("--file-size", type=int, default=4096, help="Bytes per file")
+    args = parser.parse_args()
+
+    fs = FakeFS()
+    fs.populate(args.dirs, args.files, args.file_size)
+    httpd = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(fs))
+    print(f"fake copyparty listening on http://127.0.0.1:{httpd.server_port}")
+    httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,138 @@
 import os
 import sys
 import base64
+import binascii
 import json
-from typing import Optional, Dict, Any, List
-from fastmcp import FastMCP
+import asyncio
+import bisect
+import contextlib
+import contextvars
+import fnmatch
+import hashlib
+import math
+import queue
+import posixpath
+import random
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple, Union
+from fastmcp import FastMCP, Context
+from fastmcp.exceptions import ToolError
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+import httpx
+import pydantic_core
 import requests
-from urllib.parse import urljoin
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib.parse import urljoin, quote, unquote
 
-mcp = FastMCP("copyparty MCP Server")
+try:
+    import fcntl
+except ImportError:  # Windows: worker processes share one content cache directory
+    fcntl = None
+
+# Tool results are serialised through _serialize_tool_result so tracing can time it
+mcp = FastMCP("copyparty MCP Server", tool_serializer=lambda data: _serialize_tool_result(data))
 
 # Environment variable for the copyparty server URL
 # Users should set this to their copyparty server address
 COPYPARTY_URL = os.environ.get("COPYPARTY_URL", "http://localhost:3923")
 COPYPARTY_PASSWORD = os.environ.get("COPYPARTY_PASSWORD", "")
 
+# Connection pool settings for the shared HTTP client
+# POOL_MAXSIZE is the per-host connection limit, POOL_HOSTS the number of host pools kept
+COPYPARTY_POOL_MAXSIZE = int(os.environ.get("COPYPARTY_POOL_MAXSIZE", 10))
+COPYPARTY_POOL_HOSTS = int(os.environ.get("COPYPARTY_POOL_HOSTS", 4))
+COPYPARTY_POOL_BLOCK = os.environ.get("COPYPARTY_POOL_BLOCK", "").lower() in ("1", "true", "yes")
+COPYPARTY_POOL_IDLE_TIMEOUT = float(os.environ.get("COPYPARTY_POOL_IDLE_TIMEOUT", 60))
+
+# Request timeouts in seconds: connecting, and waiting for the next bytes of a response
+COPYPARTY_CONNECT_TIMEOUT = float(os.environ.get("COPYPARTY_CONNECT_TIMEOUT", 10))
+COPYPARTY_READ_TIMEOUT = float(os.environ.get("COPYPARTY_READ_TIMEOUT", 60))
+
+# Retries of idempotent requests after connection errors and 429/502/503/504, with jittered
+# exponential backoff starting at RETRY_BACKOFF seconds and capped at RETRY_BACKOFF_MAX
+COPYPARTY_RETRIES = int(os.environ.get("COPYPARTY_RETRIES", 3))
+COPYPARTY_RETRY_BACKOFF = float(os.environ.get("COPYPARTY_RETRY_BACKOFF", 0.2))
+COPYPARTY_RETRY_BACKOFF_MAX = float(os.environ.get("COPYPARTY_RETRY_BACKOFF_MAX", 5))
+
+# Circuit breaker: consecutive failures that open it, and seconds it fails fast before a trial request
+COPYPARTY_BREAKER_THRESHOLD = int(os.environ.get("COPYPARTY_BREAKER_THRESHOLD", 5))
+COPYPARTY_BREAKER_COOLDOWN = float(os.environ.get("COPYPARTY_BREAKER_COOLDOWN", 30))
+
+# Time budget per tool call in seconds (0 for none), with per-tool overrides as "tool=seconds,..."
+COPYPARTY_TOOL_TIMEOUT = float(os.environ.get("COPYPARTY_TOOL_TIMEOUT", 120))
+COPYPARTY_TOOL_TIMEOUTS = os.environ.get("COPYPARTY_TOOL_TIMEOUTS", "")
+
+# Share one upstream request between concurrent identical reads (listings, searches, thumbnails)
+COPYPARTY_SINGLE_FLIGHT = os.environ.get("COPYPARTY_SINGLE_FLIGHT", "true").lower() in ("1", "true", "yes")
+
+# Connection limits for the async client used by the MCP tools
+COPYPARTY_ASYNC_MAX_CONNECTIONS = int(os.environ.get("COPYPARTY_ASYNC_MAX_CONNECTIONS", 500))
+COPYPARTY_ASYNC_MAX_KEEPALIVE = int(os.environ.get("COPYPARTY_ASYNC_MAX_KEEPALIVE", 50))
+
+# Directory listing cache: maximum number of listings kept and seconds before revalidation
+# Set COPYPARTY_LS_CACHE_SIZE=0 to disable the cache
+COPYPARTY_LS_CACHE_SIZE = int(os.environ.get("COPYPARTY_LS_CACHE_SIZE", 256))
+COPYPARTY_LS_CACHE_TTL = float(os.environ.get("COPYPARTY_LS_CACHE_TTL", 10))
+
+# search_files result cache: maximum number of result sets kept and seconds they stay valid,
+# plus the page size used when no limit is given. Set COPYPARTY_SEARCH_CACHE_SIZE=0 to disable the cache
+COPYPARTY_SEARCH_CACHE_SIZE = int(os.environ.get("COPYPARTY_SEARCH_CACHE_SIZE", 32))
+COPYPARTY_SEARCH_CACHE_TTL = float(os.environ.get("COPYPARTY_SEARCH_CACHE_TTL", 30))
+COPYPARTY_SEARCH_PAGE_SIZE = int(os.environ.get("COPYPARTY_SEARCH_PAGE_SIZE", 500))
+
+# Directories known to exist, remembered so create_directory(recursive=True) and
+# create_directories skip them: maximum number kept and seconds they are trusted
+COPYPARTY_DIR_CACHE_SIZE = int(os.environ.get("COPYPARTY_DIR_CACHE_SIZE", 4096))
+COPYPARTY_DIR_CACHE_TTL = float(os.environ.get("COPYPARTY_DIR_CACHE_TTL", 300))
+
+# Directory listings fetched at once by walk_files
+COPYPARTY_WALK_CONCURRENCY = int(os.environ.get("COPYPARTY_WALK_CONCURRENCY", 16))
+
+# Streaming ?tail connections tail_files keeps open at once, however many files it follows
+COPYPARTY_TAIL_CONCURRENCY = int(os.environ.get("COPYPARTY_TAIL_CONCURRENCY", 16))
+
+# Requests run at once by the bulk tools (move_files, copy_files, create_directories)
+COPYPARTY_BULK_CONCURRENCY = int(os.environ.get("COPYPARTY_BULK_CONCURRENCY", 8))
+
+# Largest body download_file returns in one call; bigger files are paged with next_offset
+COPYPARTY_MAX_DOWNLOAD_BYTES = int(os.environ.get("COPYPARTY_MAX_DOWNLOAD_BYTES", 8 * 1024 * 1024))
+
+# up2k uploads: threads hashing chunks and chunks uploaded in parallel per file
+COPYPARTY_UP2K_HASH_WORKERS = int(os.environ.get("COPYPARTY_UP2K_HASH_WORKERS", os.cpu_count() or 4))
+COPYPARTY_UP2K_UPLOAD_WORKERS = int(os.environ.get("COPYPARTY_UP2K_UPLOAD_WORKERS", 4))
+
+# Local directory for files the server downloads to disk instead of returning inline
+COPYPARTY_SPOOL_DIR = os.environ.get("COPYPARTY_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "mcp-copyparty"))
+# Spooled files older than this many seconds are removed when new ones are created
+COPYPARTY_SPOOL_MAX_AGE = float(os.environ.get("COPYPARTY_SPOOL_MAX_AGE", 24 * 3600))
+# Total size of spooled files; the oldest are removed to make room for new ones (0: no limit)
+COPYPARTY_SPOOL_MAX_BYTES = int(os.environ.get("COPYPARTY_SPOOL_MAX_BYTES", 10 * 1024 * 1024 * 1024))
+
+# upload_files: uploads run at once, and the local directory whose files it may upload by path
+# (unset: only inline content is accepted)
+COPYPARTY_UPLOAD_CONCURRENCY = int(os.environ.get("COPYPARTY_UPLOAD_CONCURRENCY", 8))
+COPYPARTY_STAGING_DIR = os.environ.get("COPYPARTY_STAGING_DIR", "")
+
+# Parallel ranged downloads: bytes per range request and ranges fetched at once
+COPYPARTY_PARALLEL_CHUNK_SIZE = int(os.environ.get("COPYPARTY_PARALLEL_CHUNK_SIZE", 16 * 1024 * 1024))
+COPYPARTY_PARALLEL_CONCURRENCY = int(os.environ.get("COPYPARTY_PARALLEL_CONCURRENCY", 4))
+
+# On-disk cache of downloaded file bodies and thumbnails; set the size to 0 to disable
+COPYPARTY_CONTENT_CACHE_DIR = os.environ.get("COPYPARTY_CONTENT_CACHE_DIR", os.path.join(COPYPARTY_SPOOL_DIR, "cache"))
+COPYPARTY_CONTENT_CACHE_BYTES = int(os.environ.get("COPYPARTY_CONTENT_CACHE_BYTES", 512 * 1024 * 1024))
+
+# In-memory thumbnail cache in front of the on-disk cache, and thumbnails get_thumbnails fetches at once
+COPYPARTY_THUMB_CACHE_BYTES = int(os.environ.get("COPYPARTY_THUMB_CACHE_BYTES", 64 * 1024 * 1024))
+COPYPARTY_THUMB_CONCURRENCY = int(os.environ.get("COPYPARTY_THUMB_CONCURRENCY", 8))
+
 
 def _get_auth():
     """Get authentication credentials if configured.
@@ -27,77 +146,2697 @@ def _get_auth():
     return None
 
 
-def _make_request(method: str, path: str, **kwargs) -> requests.Response:
-    """Make a request to the copyparty server."""
+class _PoolStats:
+    """Thread-safe counters describing how the shared connection pool is used."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "new_connections": 0, "waits": 0, "evicted_idle": 0}
+
+    def record(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+_pool_stats = _PoolStats()
+
+
+class _TrackedPoolMixin:
+    """Counts connection reuse and evicts keep-alive connections idle for too long."""
+
+    def _new_conn(self):
+        _pool_stats.record("new_connections")
+        return super()._new_conn()
+
+    def _get_conn(self, timeout=None):
+        if self.block and self.pool is not None and self.pool.empty():
+            _pool_stats.record("waits")
+        conn = super()._get_conn(timeout=timeout)
+        idle_since = getattr(conn, "_idle_since", None)
+        if idle_since is None:
+            return conn
+        conn._idle_since = None
+        if time.monotonic() - idle_since > COPYPARTY_POOL_IDLE_TIMEOUT:
+            # Closed connections reconnect lazily on their next request
+            conn.close()
+            _pool_stats.record("evicted_idle")
+            _pool_stats.record("new_connections")
+        else:
+            _pool_stats.record("hits")
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn._idle_since = time.monotonic()
+        super()._put_conn(conn)
+
+
+class _TrackedHTTPConnectionPool(_TrackedPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _TrackedHTTPSConnectionPool(_TrackedPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose per-host pools report statistics and evict idle connections."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TrackedHTTPConnectionPool,
+            "https": _TrackedHTTPSConnectionPool,
+        }
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """Get the shared keep-alive session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = _PooledAdapter(
+                    pool_connections=COPYPARTY_POOL_HOSTS,
+                    pool_maxsize=COPYPARTY_POOL_MAXSIZE,
+                    pool_block=COPYPARTY_POOL_BLOCK,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers["Connection"] = "keep-alive"
+                _session = session
+    return _session
+
+
+def _get_pool_info() -> Dict[str, Any]:
+    """Get the connection pool configuration and usage counters."""
+    return {
+        "max_connections_per_host": COPYPARTY_POOL_MAXSIZE,
+        "max_hosts": COPYPARTY_POOL_HOSTS,
+        "block_when_full": COPYPARTY_POOL_BLOCK,
+        "idle_timeout_seconds": COPYPARTY_POOL_IDLE_TIMEOUT,
+        **_pool_stats.snapshot(),
+        "async": {
+            "max_connections": COPYPARTY_ASYNC_MAX_CONNECTIONS,
+            "max_keepalive_connections": COPYPARTY_ASYNC_MAX_KEEPALIVE,
+            **_async_stats.snapshot(),
+        },
+    }
+
+
+# Latency histogram buckets in seconds, shared by tool and upstream request metrics
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+class _Counter:
+    """Labelled counter for the /metrics endpoint.
+
+    Samples are plain dict updates without a lock: on the event loop thread
+    they are exact, and the rare lost update from racing worker threads is an
+    acceptable price for keeping a sample well under a microsecond.
+    """
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in list(self._values.items()):
+            lines.append(f"{self.name}{_metric_labels(self.labels, labels)} {value!r}")
+        return lines
+
+
+class _Histogram:
+    """Labelled histogram with fixed buckets; same locking trade-off as _Counter."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...], buckets: Tuple[float, ...] = _LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series.setdefault(labels, [[0] * (len(self.buckets) + 1), 0.0])
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), list(counts)):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_metric_labels(self.labels + ('le',), labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_metric_labels(self.labels, labels)} {total!r}")
+            lines.append(f"{self.name}_count{_metric_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+def _metric_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    """Format a Prometheus label set, escaping backslashes, quotes and newlines."""
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+_tool_calls = _Counter("copyparty_mcp_tool_calls_total", "MCP tool calls by outcome.", ("tool", "outcome"))
+_tool_seconds = _Histogram("copyparty_mcp_tool_duration_seconds", "MCP tool call duration.", ("tool",))
+_upstream_requests = _Counter("copyparty_mcp_upstream_requests_total", "Requests sent to copyparty by query verb and status code.", ("method", "verb", "status"))
+_upstream_seconds = _Histogram("copyparty_mcp_upstream_duration_seconds", "Time until copyparty answered (the whole body unless streamed).", ("method", "verb"))
+_upstream_request_bytes = _Counter("copyparty_mcp_upstream_request_bytes_total", "Request body bytes sent to copyparty.", ("verb",))
+_upstream_response_bytes = _Counter("copyparty_mcp_upstream_response_bytes_total", "Response body bytes received from copyparty (streamed bodies count their Content-Length).", ("verb",))
+
+# copyparty query parameters that name the operation of a request
+_QUERY_VERBS = frozenset((
+    "ls", "tar", "zip", "th", "j", "tail", "txt", "move", "copy", "delete",
+    "share", "eshare", "shares", "ups", "ru", "dls", "v",
+))
+
+
+def _query_verb(method: str, kwargs: Dict[str, Any]) -> str:
+    """Label a copyparty request by its operation (ls, tar, th, j, upload, mkdir, ...)."""
+    if "files" in kwargs:
+        return "upload"
+    data = kwargs.get("data")
+    if isinstance(data, dict) and "act" in data:
+        return data["act"]
+    for name in kwargs.get("params") or ():
+        if name in _QUERY_VERBS:
+            return name
+    body = kwargs.get("json")
+    headers = kwargs.get("headers") or {}
+    if "X-Up2k-Hash" in headers or (isinstance(body, dict) and "hash" in body):
+        return "up2k"
+    if "Range" in headers:
+        return "range"
+    return method.lower()
+
+
+def _record_upstream(method: str, verb: str, started: float, response=None, streamed: bool = False):
+    """Record one upstream attempt; response None means it failed without a status."""
+    _upstream_seconds.observe((method, verb), time.perf_counter() - started)
+    if response is None:
+        _upstream_requests.inc((method, verb, "error"))
+        return
+    _upstream_requests.inc((method, verb, str(response.status_code)))
+    sent = response.request.headers.get("Content-Length")
+    if sent:
+        _upstream_request_bytes.inc((verb,), int(sent))
+    if streamed:
+        received = response.headers.get("Content-Length")
+        if received:
+            _upstream_response_bytes.inc((verb,), int(received))
+    else:
+        _upstream_response_bytes.inc((verb,), len(response.content))
+
+
+class _MetricsMiddleware(Middleware):
+    """Count every tool call and record its duration."""
+
+    in_flight = 0
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        name = context.message.name
+        started = time.perf_counter()
+        outcome = "error"
+        _MetricsMiddleware.in_flight += 1
+        try:
+            result = await call_next(context)
+            outcome = "ok"
+            return result
+        finally:
+            _MetricsMiddleware.in_flight -= 1
+            _tool_seconds.observe((name,), time.perf_counter() - started)
+            _tool_calls.inc((name, outcome))
+
+
+mcp.add_middleware(_MetricsMiddleware())
+
+
+def _render_metrics() -> str:
+    """Render all metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in (_tool_calls, _tool_seconds, _upstream_requests, _upstream_seconds,
+                   _upstream_request_bytes, _upstream_response_bytes):
+        lines.extend(metric.render())
+    lines.append("# HELP copyparty_mcp_upstream_in_flight Async requests to copyparty currently in flight.")
+    lines.append("# TYPE copyparty_mcp_upstream_in_flight gauge")
+    lines.append(f"copyparty_mcp_upstream_in_flight {_async_stats.in_flight}")
+    lines.append("# HELP copyparty_mcp_tool_calls_in_flight Tool calls currently running.")
+    lines.append("# TYPE copyparty_mcp_tool_calls_in_flight gauge")
+    lines.append(f"copyparty_mcp_tool_calls_in_flight {_MetricsMiddleware.in_flight}")
+    caches = {
+        "listing": _listing_cache, "search": _search_cache, "directory": _directory_cache,
+        "content": _content_cache, "thumbnail": _thumbnail_cache,
+    }
+    for kind in ("hits", "misses"):
+        lines.append(f"# HELP copyparty_mcp_cache_{kind}_total Cache {kind} by cache.")
+        lines.append(f"# TYPE copyparty_mcp_cache_{kind}_total counter")
+        for cache_name, cache in caches.items():
+            lines.append(f'copyparty_mcp_cache_{kind}_total{{cache="{cache_name}"}} {cache.info()[kind]}')
+    return "\n".join(lines) + "\n"
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> PlainTextResponse:
+    """Prometheus scrape endpoint served next to the MCP transport."""
+    return PlainTextResponse(_render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+# Worker processes for the HTTP transport; they share the listen socket, and each
+# gets GRACEFUL_TIMEOUT seconds to finish open requests when stopped or restarted
+COPYPARTY_WORKERS = int(os.environ.get("COPYPARTY_WORKERS", 1))
+COPYPARTY_GRACEFUL_TIMEOUT = float(os.environ.get("COPYPARTY_GRACEFUL_TIMEOUT", 30))
+
+_WORKER_STARTED = time.time()
+
+
+def _worker_info() -> Dict[str, Any]:
+    """Identity and load of the worker process answering this request."""
+    return {
+        "pid": os.getpid(),
+        "workers": COPYPARTY_WORKERS,
+        "started_at": _WORKER_STARTED,
+        "uptime_seconds": time.time() - _WORKER_STARTED,
+        "tool_calls_in_flight": _MetricsMiddleware.in_flight,
+        "upstream_in_flight": _async_stats.in_flight,
+    }
+
+
+@mcp.custom_route("/health", methods=["GET"])
+async def health(request: Request) -> JSONResponse:
+    """Liveness of the worker that accepted the connection.
+
+    Always 200 while the worker's event loop is serving; an open circuit breaker
+    (copyparty unreachable) reports "degraded" since every worker shares it.
+    """
+    open_breakers = [name for name, breaker in list(_breakers.items()) if breaker.info()["state"] == "open"]
+    return JSONResponse({
+        "status": "degraded" if open_breakers else "ok",
+        "open_circuit_breakers": open_breakers,
+        **_worker_info(),
+    })
+
+
+# Tracing: fraction of tool calls traced (0 disables tracing), and where spans go. Spans are
+# written as JSON lines to TRACE_FILE unless TRACE_OTLP_ENDPOINT names an OTLP/HTTP collector
+COPYPARTY_TRACE_SAMPLE_RATE = float(os.environ.get("COPYPARTY_TRACE_SAMPLE_RATE", 0))
+COPYPARTY_TRACE_FILE = os.environ.get("COPYPARTY_TRACE_FILE", os.path.join(COPYPARTY_SPOOL_DIR, "traces.jsonl"))
+COPYPARTY_TRACE_OTLP_ENDPOINT = os.environ.get("COPYPARTY_TRACE_OTLP_ENDPOINT", "")
+
+# Span kinds as numbered by OTLP
+_SPAN_INTERNAL = 1
+_SPAN_SERVER = 2
+_SPAN_CLIENT = 3
+
+
+class _Span:
+    """A finished-on-exit tracing span, encoded as an OTLP/JSON span."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start", "attributes", "error", "_token")
+
+    def __init__(self, name: str, parent: Optional["_Span"], kind: int, attributes: Dict[str, Any]):
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else ""
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.start = time.time_ns()
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def __enter__(self) -> "_Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _trace_exporter.export(self.encode(time.time_ns()))
+        return False
+
+    def encode(self, end: int) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start),
+            "endTimeUnixNano": str(end),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+
+
+class _NoSpan:
+    """Stand-in returned by _span() when the current call is not traced."""
+
+    __slots__ = ()
+
+    def set(self, key: str, value: Any):
+        pass
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+_current_span: contextvars.ContextVar[Optional[_Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _span(name: str, kind: int = _SPAN_INTERNAL, **attributes):
+    """Open a child span of the current traced tool call, or a no-op when it isn't traced."""
+    parent = _current_span.get()
+    if parent is None:
+        return _NO_SPAN
+    return _Span(name, parent, kind, attributes)
+
+
+class _TraceExporter:
+    """Batch finished spans on a background thread and write them to a file or OTLP collector."""
+
+    _BATCH_SIZE = 512
+    _FLUSH_SECONDS = 1.0
+
+    def __init__(self):
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=65536)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._counts = {"exported": 0, "dropped": 0, "failed": 0}
+
+    def export(self, span: Dict[str, Any]):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self._counts["dropped"] += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self._FLUSH_SECONDS
+            while len(batch) < self._BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+                self._counts["exported"] += len(batch)
+            except Exception as e:
+                self._counts["failed"] += len(batch)
+                print(f"Trace export failed: {e}", file=sys.stderr)
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        if COPYPARTY_TRACE_OTLP_ENDPOINT:
+            body = {"resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "copyparty-mcp"}}]},
+                "scopeSpans": [{"scope": {"name": "copyparty-mcp"}, "spans": batch}],
+            }]}
+            # Not the copyparty session: the collector is another host, and its
+            # failures must not trip the copyparty circuit breaker
+            requests.post(COPYPARTY_TRACE_OTLP_ENDPOINT.rstrip("/") + "/v1/traces", json=body, timeout=10).raise_for_status()
+            return
+        os.makedirs(os.path.dirname(COPYPARTY_TRACE_FILE) or ".", exist_ok=True)
+        data = "".join(json.dumps(span) + "\n" for span in batch).encode("utf-8")
+        # One O_APPEND write per batch, so batches from several workers never interleave
+        fd = os.open(COPYPARTY_TRACE_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "sample_rate": COPYPARTY_TRACE_SAMPLE_RATE,
+            "exporter": COPYPARTY_TRACE_OTLP_ENDPOINT or COPYPARTY_TRACE_FILE,
+            "queued": self._queue.qsize(),
+            **self._counts,
+        }
+
+
+_trace_exporter = _TraceExporter()
+
+
+class _TracingMiddleware(Middleware):
+    """Open a root span for a sampled fraction of tool calls."""
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        if random.random() >= COPYPARTY_TRACE_SAMPLE_RATE:
+            return await call_next(context)
+        with _Span(f"tool {context.message.name}", None, _SPAN_SERVER, {"mcp.tool": context.message.name}):
+            return await call_next(context)
+
+
+if COPYPARTY_TRACE_SAMPLE_RATE > 0:
+    mcp.add_middleware(_TracingMiddleware())
+
+
+def _serialize_tool_result(data: Any) -> str:
+    """Serialise a tool result to JSON text the way FastMCP does by default."""
+    with _span("json.serialize"):
+        return pydantic_core.to_json(data, fallback=str).decode()
+
+
+# Result bodies of at least ENCODE_OFFLOAD_BYTES are base64-encoded (and text-decoded) on a
+# pool of ENCODE_WORKERS threads so the event loop keeps serving other requests meanwhile
+COPYPARTY_ENCODE_OFFLOAD_BYTES = int(os.environ.get("COPYPARTY_ENCODE_OFFLOAD_BYTES", 1024 * 1024))
+COPYPARTY_ENCODE_WORKERS = int(os.environ.get("COPYPARTY_ENCODE_WORKERS", min(4, os.cpu_count() or 1)))
+
+# Input bytes encoded per step; a multiple of 3 so steps never need padding. Each step
+# is one GIL-holding C call (~0.5 ms), between which other threads get to run
+_B64_CHUNK = 3 * 256 * 1024
+
+
+def _b64encode(data: bytes) -> str:
+    """Base64-encode a body for a tool result.
+
+    Large bodies are encoded step by step, so a worker thread encoding them lets
+    go of the GIL between steps. Each step is decoded while it is still in cache
+    and the steps are joined once, which is the only pass over the whole output
+    (a preallocated output buffer would add a second one, zero-filling it).
+    """
+    with _span("base64.encode", size=len(data)):
+        view = memoryview(data)
+        return "".join(
+            binascii.b2a_base64(view[start:start + _B64_CHUNK], newline=False).decode("ascii")
+            for start in range(0, len(data), _B64_CHUNK)
+        )
+
+
+_encode_pool: Optional[ThreadPoolExecutor] = None
+_encode_pool_lock = threading.Lock()
+
+
+def _get_encode_pool() -> ThreadPoolExecutor:
+    """Get the thread pool large result bodies are encoded on, creating it on first use."""
+    global _encode_pool
+    if _encode_pool is None:
+        with _encode_pool_lock:
+            if _encode_pool is None:
+                _encode_pool = ThreadPoolExecutor(max(1, COPYPARTY_ENCODE_WORKERS), thread_name_prefix="encode")
+    return _encode_pool
+
+
+async def _aencoded(size: int, build, *args):
+    """Call the result builder build(*args), which encodes about size bytes.
+
+    Small bodies are built inline; large ones on the encode pool, in a copy of the
+    current context so their spans still nest under the tool call.
+    """
+    if size < COPYPARTY_ENCODE_OFFLOAD_BYTES:
+        return build(*args)
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(_get_encode_pool(), context.run, build, *args)
+
+
+# Tools that legitimately run long get a larger default budget than COPYPARTY_TOOL_TIMEOUT
+_LONG_TOOL_TIMEOUT = 3600
+_LONG_TOOLS = (
+    "download_file_parallel", "download_as_tar", "download_as_zip", "upload_file", "upload_files",
+    "move_files", "copy_files", "walk_files", "tail_file", "tail_files",
+)
+
+
+def _parse_tool_timeouts(spec: str) -> Dict[str, float]:
+    """Parse COPYPARTY_TOOL_TIMEOUTS ("tool=seconds,tool=seconds")."""
+    timeouts = {name: float(_LONG_TOOL_TIMEOUT) for name in _LONG_TOOLS}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, seconds = item.partition("=")
+        timeouts[name.strip()] = float(seconds)
+    return timeouts
+
+
+_tool_timeouts = _parse_tool_timeouts(COPYPARTY_TOOL_TIMEOUTS)
+
+# Monotonic deadline of the tool call being served; requests never wait past it
+_tool_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("tool_deadline", default=None)
+
+
+class _ToolTimeoutMiddleware(Middleware):
+    """Give every tool call a time budget, cancelling it once the budget is spent."""
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        name = context.message.name
+        budget = _tool_timeouts.get(name, COPYPARTY_TOOL_TIMEOUT)
+        if budget <= 0:
+            return await call_next(context)
+        token = _tool_deadline.set(time.monotonic() + budget)
+        try:
+            return await asyncio.wait_for(call_next(context), budget)
+        except asyncio.TimeoutError:
+            raise ToolError(f"{name} did not finish within its {budget:g} second budget")
+        finally:
+            _tool_deadline.reset(token)
+
+
+mcp.add_middleware(_ToolTimeoutMiddleware())
+
+
+def _remaining_budget() -> Optional[float]:
+    deadline = _tool_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _request_timeout(timeout) -> Tuple[float, float]:
+    """(connect, read) timeout for a request, shortened to what is left of the tool's budget."""
+    if timeout is None:
+        timeout = (COPYPARTY_CONNECT_TIMEOUT, COPYPARTY_READ_TIMEOUT)
+    elif not isinstance(timeout, tuple):
+        timeout = (timeout, timeout)
+    remaining = _remaining_budget()
+    if remaining is not None:
+        remaining = max(remaining, 0.001)
+        timeout = (min(timeout[0], remaining), min(timeout[1], remaining))
+    return timeout
+
+
+class _CircuitOpenError(httpx.TransportError, requests.ConnectionError):
+    """Raised instead of contacting a backend whose circuit breaker is open.
+
+    It is a connection error to both HTTP clients, so every handler written
+    for an unreachable copyparty (sync or async) handles it as one.
+    """
+
+
+class _CircuitBreaker:
+    """Consecutive-failure circuit breaker for one copyparty backend.
+
+    After COPYPARTY_BREAKER_THRESHOLD connection errors or 5xx responses in a
+    row, requests fail fast for COPYPARTY_BREAKER_COOLDOWN seconds. Then a
+    single trial request is let through: success closes the breaker, failure
+    opens it for another cooldown. A trial that ends any other way (read
+    timeout, cancellation) counts as a failure, so the breaker never waits on
+    a trial nobody will finish.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._open_until = 0.0
+        self._trial = False
+        self._counts = {"opened": 0, "rejected": 0, "retries": 0}
+
+    def check(self) -> bool:
+        """Raise if requests must fail fast; returns True for the half-open trial."""
+        if COPYPARTY_BREAKER_THRESHOLD <= 0:
+            return False
+        with self._lock:
+            if self._failures < COPYPARTY_BREAKER_THRESHOLD:
+                return False
+            if time.monotonic() >= self._open_until and not self._trial:
+                self._trial = True
+                return True
+            self._counts["rejected"] += 1
+        raise _CircuitOpenError(f"copyparty at {self.name} is unavailable (circuit breaker open after {self._failures} consecutive failures)")
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self._fail()
+
+    def release(self, trial: bool):
+        """End an attempt check() let through; an unresolved trial counts as failed."""
+        if trial:
+            with self._lock:
+                if self._trial:
+                    self._fail()
+
+    def _fail(self):
+        self._failures += 1
+        if self._trial or self._failures == COPYPARTY_BREAKER_THRESHOLD:
+            self._counts["opened"] += 1
+            self._open_until = time.monotonic() + COPYPARTY_BREAKER_COOLDOWN
+        self._trial = False
+
+    def record_retry(self):
+        with self._lock:
+            self._counts["retries"] += 1
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            is_open = self._failures >= COPYPARTY_BREAKER_THRESHOLD > 0
+            return {
+                "state": ("half-open" if time.monotonic() >= self._open_until else "open") if is_open else "closed",
+                "consecutive_failures": self._failures,
+                **self._counts,
+            }
+
+
+_breakers: Dict[str, _CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def _get_breaker(url: str) -> _CircuitBreaker:
+    """Get the circuit breaker for the backend (scheme and host) serving url."""
+    name = urljoin(url, "/")
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = _CircuitBreaker(name)
+        return _breakers[name]
+
+
+# Responses worth retrying; the 5xx ones also count as breaker failures
+_RETRY_STATUSES = (429, 502, 503, 504)
+_IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+def _retry_delay(attempt: int, retries: int, retry_after: Optional[str] = None) -> Optional[float]:
+    """Seconds to wait before retry number attempt+1, or None to give up."""
+    if attempt >= retries:
+        return None
+    delay = random.uniform(0, min(COPYPARTY_RETRY_BACKOFF_MAX, COPYPARTY_RETRY_BACKOFF * 2 ** attempt))
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, min(float(retry_after), COPYPARTY_RETRY_BACKOFF_MAX))
+    remaining = _remaining_budget()
+    if remaining is not None and delay >= remaining:
+        return None
+    return delay
+
+
+def _retries_for(method: str, idempotent: Optional[bool]) -> int:
+    if idempotent is None:
+        idempotent = method.upper() in _IDEMPOTENT_METHODS
+    return COPYPARTY_RETRIES if idempotent else 0
+
+
+def _make_request(method: str, path: str, idempotent: Optional[bool] = None, **kwargs) -> requests.Response:
+    """Make a request to the copyparty server over the shared connection pool.
+
+    Idempotent requests (GET/HEAD/..., or idempotent=True) are retried after
+    connection errors and 429/502/503/504 responses with jittered exponential
+    backoff, within the time budget of the current tool call.
+    """
     url = urljoin(COPYPARTY_URL, path)
     auth = _get_auth()
     if auth:
         kwargs['auth'] = auth
+    timeout = kwargs.pop("timeout", None)
+    breaker = _get_breaker(url)
+    retries = _retries_for(method, idempotent)
+    verb = _query_verb(method, kwargs)
+    attempt = 0
     
-    response = requests.request(method, url, **kwargs)
-    response.raise_for_status()
-    return response
+    while True:
+        trial = breaker.check()
+        started = time.perf_counter()
+        try:
+            with _span(f"copyparty {method} {verb}", _SPAN_CLIENT, **{"http.method": method, "url.path": path}) as span:
+                # Traced calls stream the body so reading it gets its own span
+                read_body = span is not _NO_SPAN and not kwargs.get("stream")
+                response = _get_session().request(method, url, timeout=_request_timeout(timeout), **(dict(kwargs, stream=True) if read_body else kwargs))
+                span.set("http.status_code", response.status_code)
+                if read_body:
+                    with _span("body.read") as read_span:
+                        read_span.set("size", len(response.content))
+            _record_upstream(method, verb, started, response, kwargs.get("stream", False))
+        except (requests.ConnectionError, requests.Timeout) as e:
+            _record_upstream(method, verb, started)
+            # Read timeouts mean a slow server rather than a down one
+            if not isinstance(e, requests.ReadTimeout):
+                breaker.failure()
+            delay = _retry_delay(attempt, retries)
+            if delay is None:
+                raise
+        else:
+            if response.status_code not in _RETRY_STATUSES:
+                breaker.success()
+                response.raise_for_status()
+                return response
+            # A 429 still shows the server is up
+            if response.status_code >= 500:
+                breaker.failure()
+            else:
+                breaker.success()
+            delay = _retry_delay(attempt, retries, response.headers.get("Retry-After"))
+            if delay is None:
+                response.raise_for_status()
+            response.close()
+        finally:
+            breaker.release(trial)
+        breaker.record_retry()
+        time.sleep(delay)
+        attempt += 1
 
 
-@mcp.tool(description="List files and folders in a directory on the copyparty server. Returns JSON with file information including names, sizes, timestamps, and metadata/tags if available.")
-def list_files(path: str = "/", include_dotfiles: bool = False, include_tags: bool = False) -> Dict[str, Any]:
+class _AsyncStats:
+    """Counters for requests issued through the async client.
+
+    Only touched from the event loop thread, so no locking is needed.
     """
-    List files and folders at the specified path.
-    
-    Args:
-        path: Directory path to list (default: "/")
-        include_dotfiles: Include hidden files starting with dot (default: False)
-        include_tags: Include file metadata/tags in the response (default: False)
-    
-    Returns:
-        Dictionary containing file and folder information, with tags if requested
+
+    def __init__(self):
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+        }
+
+
+_async_stats = _AsyncStats()
+_async_client: Optional[httpx.AsyncClient] = None
+_async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    """Get the async client for the running event loop, creating it on first use.
+
+    httpx connections are bound to the loop that opened them, so a new client
+    is created if called from a different loop (e.g. repeated asyncio.run()).
     """
-    params = {"ls": ""}
-    if include_dotfiles:
-        params["dots"] = ""
-    if include_tags:
-        params["tags"] = ""
-    
-    response = _make_request("GET", path, params=params)
-    return response.json()
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client.is_closed or _async_client_loop is not loop:
+        _async_client = httpx.AsyncClient(
+            auth=_get_auth(),
+            follow_redirects=True,
+            timeout=None,
+            limits=httpx.Limits(
+                max_connections=COPYPARTY_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=COPYPARTY_ASYNC_MAX_KEEPALIVE,
+                keepalive_expiry=COPYPARTY_POOL_IDLE_TIMEOUT,
+            ),
+        )
+        _async_client_loop = loop
+    return _async_client
+
+
+def _ahttpx_timeout(timeout) -> httpx.Timeout:
+    connect, read = _request_timeout(timeout)
+    return httpx.Timeout(read, connect=connect)
+
 
+async def _asend(method: str, path: str, idempotent: Optional[bool], stream: bool, kwargs: Dict[str, Any]) -> httpx.Response:
+    """Send a request with the retry and circuit breaker rules of _make_request.
 
-@mcp.tool(description="Download a file from the copyparty server. Returns the file content as base64-encoded string for binary files or as text for text files.")
-def download_file(path: str, as_base64: bool = False) -> Dict[str, Any]:
+    Returns the response without checking its status; with stream, the body
+    is left unread for the caller to consume and close.
     """
-    Download a file from the copyparty server.
-    
-    Args:
-        path: File path to download
-        as_base64: Return content as base64-encoded string (useful for binary files)
+    url = urljoin(COPYPARTY_URL, path)
+    client = _get_async_client()
+    timeout = kwargs.pop("timeout", None)
+    breaker = _get_breaker(url)
+    retries = _retries_for(method, idempotent)
+    verb = _query_verb(method, kwargs)
+    attempt = 0
     
-    Returns:
-        Dictionary with file content and metadata
+    while True:
+        trial = breaker.check()
+        started = time.perf_counter()
+        try:
+            request = client.build_request(method, url, timeout=_ahttpx_timeout(timeout), **kwargs)
+            with _span(f"copyparty {method} {verb}", _SPAN_CLIENT, **{"http.method": method, "url.path": path}) as span:
+                response = await client.send(request, stream=True)
+                span.set("http.status_code", response.status_code)
+                if not stream:
+                    try:
+                        with _span("body.read") as read_span:
+                            await response.aread()
+                            read_span.set("size", len(response.content))
+                    except BaseException:
+                        await response.aclose()
+                        raise
+            _record_upstream(method, verb, started, response, stream)
+        except httpx.TransportError as e:
+            _record_upstream(method, verb, started)
+            # Read timeouts mean a slow server rather than a down one
+            if not isinstance(e, httpx.ReadTimeout):
+                breaker.failure()
+            delay = _retry_delay(attempt, retries)
+            if delay is None:
+                raise
+        else:
+            if response.status_code not in _RETRY_STATUSES:
+                breaker.success()
+                return response
+            # A 429 still shows the server is up
+            if response.status_code >= 500:
+                breaker.failure()
+            else:
+                breaker.success()
+            delay = _retry_delay(attempt, retries, response.headers.get("Retry-After"))
+            if delay is None:
+                return response
+            await response.aclose()
+        finally:
+            breaker.release(trial)
+        breaker.record_retry()
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+async def _asend_counted(method: str, path: str, idempotent: Optional[bool], kwargs: Dict[str, Any]) -> httpx.Response:
+    """_asend a request whose body is read in full, counted in the async request stats."""
+    _async_stats.requests += 1
+    _async_stats.in_flight += 1
+    _async_stats.peak_in_flight = max(_async_stats.peak_in_flight, _async_stats.in_flight)
+    try:
+        return await _asend(method, path, idempotent, False, kwargs)
+    finally:
+        _async_stats.in_flight -= 1
+
+
+async def _amake_request(method: str, path: str, idempotent: Optional[bool] = None, **kwargs) -> httpx.Response:
+    """Make a request to the copyparty server without blocking the event loop."""
+    response = await _asend_counted(method, path, idempotent, kwargs)
+    response.raise_for_status()
+    return response
+
+
+async def _amake_conditional_request(method: str, path: str, **kwargs) -> httpx.Response:
+    """Like _amake_request, but a 304 Not Modified is returned instead of raised.
+
+    httpx treats every non-2xx status as an error, while a revalidated cache
+    entry (If-None-Match / If-Modified-Since) expects the 304 back.
     """
-    response = _make_request("GET", path)
-    
+    response = await _asend_counted(method, path, None, kwargs)
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response
+
+
+@contextlib.asynccontextmanager
+async def _astream_request(method: str, path: str, idempotent: Optional[bool] = None, **kwargs):
+    """Make a request whose body is read incrementally inside the context."""
+    _async_stats.requests += 1
+    _async_stats.in_flight += 1
+    _async_stats.peak_in_flight = max(_async_stats.peak_in_flight, _async_stats.in_flight)
+    try:
+        response = await _asend(method, path, idempotent, True, kwargs)
+        try:
+            response.raise_for_status()
+            yield response
+        finally:
+            await response.aclose()
+    finally:
+        _async_stats.in_flight -= 1
+
+
+class _SingleFlight:
+    """Coalesce concurrent identical reads into one upstream call.
+
+    The first caller for a key runs the call; callers arriving while it is in
+    flight wait for and share its result (or exception). Nothing is kept once
+    the call finishes, so this only deduplicates, it never caches. The async
+    call runs as its own task, so a cancelled caller does not cancel it for
+    the others.
+    """
+
+    class _Call:
+        __slots__ = ("done", "result", "error")
+
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Any, "_SingleFlight._Call"] = {}
+        self._tasks: Dict[Any, asyncio.Task] = {}
+        self._counts = {"calls": 0, "coalesced": 0}
+
+    def do(self, key, fn):
+        """Run fn() for key in this thread, or wait for the thread already running it."""
+        if not COPYPARTY_SINGLE_FLIGHT:
+            return fn()
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+                self._counts["calls"] += 1
+            else:
+                self._counts["coalesced"] += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key, factory):
+        """Await factory() for key, or the task already running it on this loop."""
+        if not COPYPARTY_SINGLE_FLIGHT:
+            return await factory()
+        loop_key = (id(asyncio.get_running_loop()), key)
+        task = self._tasks.get(loop_key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._tasks[loop_key] = task
+            task.add_done_callback(lambda done: self._finish(loop_key, done))
+            self._counts["calls"] += 1
+        else:
+            self._counts["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, loop_key, task: asyncio.Task):
+        if self._tasks.get(loop_key) is task:
+            del self._tasks[loop_key]
+        # Mark the exception retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": COPYPARTY_SINGLE_FLIGHT,
+                "in_flight": len(self._calls) + len(self._tasks),
+                **self._counts,
+            }
+
+
+_single_flight = _SingleFlight()
+
+
+def _normalize_dir(path: str) -> str:
+    """Normalize a directory path so "/a/b", "a/b/" and "/a/b/" compare equal."""
+    return "/" + path.strip("/")
+
+
+def _parent_dir(path: str) -> str:
+    """Get the normalized parent directory of a file or directory path."""
+    return _normalize_dir(os.path.dirname(_normalize_dir(path)))
+
+
+def _concurrency(concurrency: Optional[int], default: int) -> int:
+    """Number of operations a batch tool runs at once: concurrency, or default if unset."""
+    if concurrency is None:
+        return default
+    if concurrency < 1:
+        raise ValueError(f"Invalid concurrency {concurrency}: must be 1 or more")
+    return concurrency
+
+
+def _entry_name(info: Dict[str, Any]) -> str:
+    """Name of a file or directory entry in a ?ls listing (copyparty sends url-quoted hrefs)."""
+    return info.get("name") or unquote(info.get("href", "")).rstrip("/")
+
+
+class _CachedListing:
+    """A directory listing plus the validators needed to revalidate it."""
+
+    __slots__ = ("data", "etag", "last_modified", "expires", "_file_index")
+
+    def __init__(self, data: Dict[str, Any], etag: Optional[str], last_modified: Optional[str]):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = time.monotonic() + COPYPARTY_LS_CACHE_TTL
+        self._file_index = None
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires
+
+    def file_index(self) -> Dict[str, Dict[str, Any]]:
+        """Map file names to their listing entries, built once per listing."""
+        if self._file_index is None:
+            self._file_index = {_entry_name(f): f for f in self.data.get("files", [])}
+        return self._file_index
+
+
+class _ListingCache:
+    """Bounded LRU cache of ?ls responses keyed by (path, include_dotfiles, include_tags).
+
+    Expired entries are kept so they can be revalidated with If-None-Match /
+    If-Modified-Since; a 304 from copyparty renews them without a new body.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, bool, bool], _CachedListing]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so that listings fetched before a local
+        # write finished are not stored afterwards
+        self._generation = 0
+        self._counts = {"hits": 0, "misses": 0, "revalidated": 0}
+
+    def lookup(self, key: Tuple[str, bool, bool]) -> Tuple[Optional[_CachedListing], int]:
+        """Get the entry for key (fresh or stale) and the current generation."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if entry.is_fresh():
+                    self._counts["hits"] += 1
+            if entry is None or not entry.is_fresh():
+                self._counts["misses"] += 1
+            return entry, self._generation
+
+    def peek(self, key: Tuple[str, bool, bool]) -> Optional[_CachedListing]:
+        """Get the fresh entry for key without touching its LRU position or the counts."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry if entry is not None and entry.is_fresh() else None
+
+    @staticmethod
+    def conditional_headers(entry: Optional[_CachedListing]) -> Dict[str, str]:
+        """Build revalidation headers for a stale entry."""
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def store(self, key: Tuple[str, bool, bool], entry: Optional[_CachedListing], generation: int, response) -> _CachedListing:
+        """Store a fresh ?ls response (or renew entry on 304) and return the entry."""
+        if response.status_code == 304 and entry is not None:
+            with self._lock:
+                entry.expires = time.monotonic() + COPYPARTY_LS_CACHE_TTL
+                self._counts["revalidated"] += 1
+            return entry
+        new_entry = _CachedListing(response.json(), response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        if self.max_entries <= 0:
+            return new_entry
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = new_entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return new_entry
+
+    def invalidate(self, path: str):
+        """Drop cached listings of path, everything below it, and its parent directory."""
+        path = _normalize_dir(path)
+        parent = _parent_dir(path)
+        prefix = path.rstrip("/") + "/"
+        with self._lock:
+            self._generation += 1
+            for key in [k for k in self._entries if k[0] in (path, parent) or k[0].startswith(prefix)]:
+                del self._entries[key]
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": COPYPARTY_LS_CACHE_TTL,
+                **self._counts,
+            }
+
+
+_listing_cache = _ListingCache(COPYPARTY_LS_CACHE_SIZE)
+
+
+class _SearchCache:
+    """Bounded LRU cache of search responses keyed by normalised (query, path), with a TTL."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Same role as in _ListingCache: results fetched across a local write are not stored
+        self._generation = 0
+        self._counts = {"hits": 0, "misses": 0}
+
+    def lookup(self, key: Tuple[str, str]) -> Tuple[Optional[Dict[str, Any]], int]:
+        """Get the fresh response for key, if any, and the current generation."""
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] <= time.monotonic():
+                del self._entries[key]
+                cached = None
+            if cached is None:
+                self._counts["misses"] += 1
+                return None, self._generation
+            self._entries.move_to_end(key)
+            self._counts["hits"] += 1
+            return cached[1], self._generation
+
+    def store(self, key: Tuple[str, str], generation: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        if self.max_entries > 0:
+            with self._lock:
+                if generation == self._generation:
+                    self._entries[key] = (time.monotonic() + COPYPARTY_SEARCH_CACHE_TTL, data)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        return data
+
+    def invalidate(self, path: str):
+        """Drop cached searches whose scope contains path or lies below it."""
+        path = _normalize_dir(path)
+        prefix = path.rstrip("/") + "/"
+        with self._lock:
+            self._generation += 1
+            for key in [k for k in self._entries
+                        if k[1] == "/" or path == k[1] or path.startswith(k[1] + "/") or k[1].startswith(prefix)]:
+                del self._entries[key]
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": COPYPARTY_SEARCH_CACHE_TTL,
+                **self._counts,
+            }
+
+
+_search_cache = _SearchCache(COPYPARTY_SEARCH_CACHE_SIZE)
+
+
+def _invalidate_listings(*paths: str):
+    """Forget cached listings and search results touched by a local write to any of paths."""
+    for path in paths:
+        _listing_cache.invalidate(path)
+        _search_cache.invalidate(path)
+
+
+def _get_listing_entry(path: str, include_dotfiles: bool = False, include_tags: bool = False) -> _CachedListing:
+    """Get a directory listing, served from the listing cache when fresh."""
+    key = (_normalize_dir(path), include_dotfiles, include_tags)
+    entry, generation = _listing_cache.lookup(key)
+    if entry is not None and entry.is_fresh():
+        return entry
+    
+    def fetch() -> _CachedListing:
+        response = _make_request(
+            "GET", path,
+            params=_list_params(include_dotfiles, include_tags),
+            headers=_listing_cache.conditional_headers(entry),
+        )
+        return _listing_cache.store(key, entry, generation, response)
+    
+    return _single_flight.do(("ls",) + key, fetch)
+
+
+async def _aget_listing_entry(path: str, include_dotfiles: bool = False, include_tags: bool = False) -> _CachedListing:
+    """Async variant of _get_listing_entry."""
+    key = (_normalize_dir(path), include_dotfiles, include_tags)
+    entry, generation = _listing_cache.lookup(key)
+    if entry is not None and entry.is_fresh():
+        return entry
+    
+    async def fetch() -> _CachedListing:
+        response = await _amake_conditional_request(
+            "GET", path,
+            params=_list_params(include_dotfiles, include_tags),
+            headers=_listing_cache.conditional_headers(entry),
+        )
+        return _listing_cache.store(key, entry, generation, response)
+    
+    return await _single_flight.ado(("ls",) + key, fetch)
+
+
+async def _apeek_listing_entry(path: str, include_dotfiles: bool = False) -> _CachedListing:
+    """Get a directory listing for a tree walk.
+
+    A fresh cached listing is used as is; anything else is fetched and not
+    stored, so one walk over thousands of directories does not evict the
+    listings other calls keep hitting.
+    """
+    entry = _listing_cache.peek((_normalize_dir(path), include_dotfiles, False))
+    if entry is not None:
+        return entry
+    response = await _amake_request("GET", path, params=_list_params(include_dotfiles, False))
+    return _CachedListing(response.json(), response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+
+class _ContentCache:
+    """Byte-bounded LRU cache of response bodies stored on local disk.
+
+    Keys include the file's size and mtime from its directory listing, so a
+    changed file simply misses; the listing itself is revalidated through the
+    listing cache. Each entry is one file holding a JSON header line followed
+    by the body, written to a temporary name and renamed into place so a crash
+    never leaves a partial entry behind. Recency survives restarts through the
+    entries' mtimes.
+
+    The header also records the copyparty path, so that a local write can
+    purge the entries of what it changed: a rewrite of the same size within
+    the same second keeps the listed size and mtime, and so the key.
+
+    With several worker processes each one claims a worker-<n> subdirectory
+    and 1/workers of the byte budget, so the accounting of one process covers
+    everything in its directory and the total stays within max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, workers: int = 1):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self._slot_lock = None
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._paths: Dict[str, str] = {}
+        self._total = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._counts = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def _claim_slot(self):
+        """Switch to this worker's share of the directory and byte budget.
+
+        Slots are held with an exclusive lock on worker-<n>.lock for the life of
+        the process, so a restarted worker takes over the slot (and the entries)
+        of the one it replaces. Runs on first use, never in the supervisor.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes //= self.workers
+        if fcntl is None:
+            return
+        for slot in range(self.workers):
+            lock = open(os.path.join(self.directory, f"worker-{slot}.lock"), "a")
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock.close()
+                continue
+            self._slot_lock = lock
+            self.directory = os.path.join(self.directory, f"worker-{slot}")
+            return
+        # More processes than slots (e.g. overlapping restarts): run without a disk cache
+        self.max_bytes = 0
+
+    def _load(self):
+        """Index entries left by earlier runs, oldest first, and drop stray temp files
+        and entries whose path cannot be read back."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.workers > 1:
+            self._claim_slot()
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith("."):
+                with contextlib.suppress(OSError):
+                    os.remove(entry.path)
+            elif entry.is_file() and not entry.name.endswith(".lock"):
+                try:
+                    with open(entry.path, "rb") as f:
+                        path = json.loads(f.readline())["path"]
+                    stat = entry.stat()
+                except (OSError, ValueError, KeyError):
+                    with contextlib.suppress(OSError):
+                        os.remove(entry.path)
+                    continue
+                found.append((stat.st_mtime, entry.name, stat.st_size, path))
+        for _, key, size, path in sorted(found):
+            self._entries[key] = size
+            self._paths[key] = path
+            self._total += size
+        self._evict()
+
+    def _evict(self):
+        while self._total > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._paths.pop(key, None)
+            self._total -= size
+            self._counts["evictions"] += 1
+            with contextlib.suppress(OSError):
+                os.remove(self._path(key))
+
+    def read(self, key: str, offset: int = 0, length: Optional[int] = None) -> Optional[Tuple[Dict[str, Any], bytes, int]]:
+        """Get (metadata, body slice, total body size) for key, or None on a miss."""
+        with self._lock:
+            self._load()
+            if not self.enabled or key not in self._entries:
+                self._counts["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counts["hits"] += 1
+        try:
+            with open(self._path(key), "rb") as f:
+                meta = json.loads(f.readline())
+                f.seek(offset, os.SEEK_CUR)
+                data = f.read() if length is None else f.read(length)
+            os.utime(self._path(key))
+        except (OSError, ValueError):
+            with self._lock:
+                self._total -= self._entries.pop(key, 0)
+                self._paths.pop(key, None)
+            return None
+        return meta, data, meta["size"]
+
+    def put(self, key: str, path: str, meta: Dict[str, Any], data: bytes, generation: int):
+        """Store data for path under key with an atomic rename.
+
+        Nothing is stored if content was purged since generation was read
+        (_content_generation before the body was fetched).
+        """
+        header = json.dumps({**meta, "path": _normalize_dir(path), "size": len(data)}).encode() + b"\n"
+        size = len(header) + len(data)
+        with self._lock:
+            self._load()
+        if size > self.max_bytes:
+            return
+        fd, tmp_path = tempfile.mkstemp(prefix=".", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(header)
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            with self._lock:
+                if generation != _content_generation:
+                    os.remove(tmp_path)
+                    return
+                os.replace(tmp_path, self._path(key))
+                self._total += size - self._entries.pop(key, 0)
+                self._entries[key] = size
+                self._paths[key] = _normalize_dir(path)
+                self._evict()
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+
+    def purge(self, paths: List[str]):
+        """Drop the entries of paths and of everything below them."""
+        with self._lock:
+            self._load()
+            for key in [k for k, path in self._paths.items() if _is_under(path, paths)]:
+                self._total -= self._entries.pop(key, 0)
+                del self._paths[key]
+                with contextlib.suppress(OSError):
+                    os.remove(self._path(key))
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "entries": len(self._entries),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                **self._counts,
+            }
+
+
+_content_cache = _ContentCache(COPYPARTY_CONTENT_CACHE_DIR, COPYPARTY_CONTENT_CACHE_BYTES, COPYPARTY_WORKERS)
+
+
+class _MemoryCache:
+    """Byte-bounded in-memory LRU of (metadata, body) pairs, keyed like _ContentCache."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], bytes]]" = OrderedDict()
+        self._paths: Dict[str, str] = {}
+        self._total = 0
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None:
+                self._counts["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counts["hits"] += 1
+            return hit
+
+    def put(self, key: str, path: str, meta: Dict[str, Any], data: bytes, generation: int):
+        """Store (meta, data) for path, unless content was purged since generation was read."""
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if generation != _content_generation:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total -= len(old[1])
+            self._entries[key] = (meta, data)
+            self._paths[key] = _normalize_dir(path)
+            self._total += len(data)
+            while self._total > self.max_bytes:
+                evicted_key, (_, evicted) = self._entries.popitem(last=False)
+                del self._paths[evicted_key]
+                self._total -= len(evicted)
+                self._counts["evictions"] += 1
+
+    def purge(self, paths: List[str]):
+        """Drop the entries of paths and of everything below them."""
+        with self._lock:
+            for key in [k for k, path in self._paths.items() if _is_under(path, paths)]:
+                self._total -= len(self._entries.pop(key)[1])
+                del self._paths[key]
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                **self._counts,
+            }
+
+
+_thumbnail_cache = _MemoryCache(COPYPARTY_THUMB_CACHE_BYTES)
+
+# Bumped by _forget_content; a body fetched before a local write to its path
+# is not cached after the write purged that path
+_content_generation = 0
+_content_generation_lock = threading.Lock()
+
+
+def _is_under(path: str, roots: List[str]) -> bool:
+    """Whether normalised path is one of roots or lies below one of them."""
+    return any(path == root or path.startswith(root.rstrip("/") + "/") for root in roots)
+
+
+def _forget_content(*paths: str):
+    """Purge cached bodies of paths (and everything below them) after a local write."""
+    global _content_generation
+    roots = [_normalize_dir(path) for path in paths]
+    with _content_generation_lock:
+        _content_generation += 1
+    if _content_cache.enabled:
+        _content_cache.purge(roots)
+    _thumbnail_cache.purge(roots)
+
+
+def _content_key(variant: str, path: str, file_info: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Cache key for a rendition (raw body, ?txt, ?th) of path at its listed size and mtime."""
+    if file_info is None:
+        return None
+    ident = f"{variant}\0{path}\0{file_info.get('sz')}\0{file_info.get('ts')}"
+    return hashlib.sha256(ident.encode('utf-8')).hexdigest()
+
+
+def _cache_file_info(path: str, memory: Optional[_MemoryCache] = None) -> Optional[Dict[str, Any]]:
+    """Listing entry for path used to validate content cache entries, if available."""
+    if not _content_cache.enabled and not (memory and memory.enabled):
+        return None
+    dir_path, name, dots = _metadata_location(path)
+    try:
+        entry = _get_listing_entry(dir_path, dots, False)
+    except requests.RequestException:
+        return None
+    return entry.file_index().get(name)
+
+
+async def _acache_file_info(path: str, memory: Optional[_MemoryCache] = None) -> Optional[Dict[str, Any]]:
+    """Async variant of _cache_file_info."""
+    if not _content_cache.enabled and not (memory and memory.enabled):
+        return None
+    dir_path, name, dots = _metadata_location(path)
+    try:
+        entry = await _aget_listing_entry(dir_path, dots, False)
+    except httpx.HTTPError:
+        return None
+    return entry.file_index().get(name)
+
+
+def _response_meta(response) -> Dict[str, Any]:
+    """Headers worth keeping alongside a cached body."""
+    return {
+        "content_type": response.headers.get("Content-Type"),
+        "encoding": response.encoding or "utf-8",
+    }
+
+
+def _cache_lookup(key: Optional[str], path: str, memory: Optional[_MemoryCache], generation: int) -> Optional[Tuple[Dict[str, Any], bytes]]:
+    """Look key up in the memory cache, then on disk (promoting disk hits to memory)."""
+    if not key:
+        return None
+    if memory and memory.enabled:
+        hit = memory.get(key)
+        if hit:
+            return hit
+    hit = _content_cache.read(key) if _content_cache.enabled else None
+    if not hit:
+        return None
+    if memory and memory.enabled:
+        memory.put(key, path, hit[0], hit[1], generation)
+    return hit[0], hit[1]
+
+
+def _cache_fill(key: Optional[str], path: str, memory: Optional[_MemoryCache], meta: Dict[str, Any], data: bytes, generation: int):
+    if not key:
+        return
+    if memory and memory.enabled:
+        memory.put(key, path, meta, data, generation)
+    if _content_cache.enabled:
+        _content_cache.put(key, path, meta, data, generation)
+
+
+async def _acache_lookup(key: Optional[str], path: str, memory: Optional[_MemoryCache], generation: int) -> Optional[Tuple[Dict[str, Any], bytes]]:
+    """Async variant of _cache_lookup; memory hits are served inline, disk reads in a thread."""
+    if not key:
+        return None
+    if memory and memory.enabled:
+        hit = memory.get(key)
+        if hit:
+            return hit
+    hit = await asyncio.to_thread(_content_cache.read, key) if _content_cache.enabled else None
+    if not hit:
+        return None
+    if memory and memory.enabled:
+        memory.put(key, path, hit[0], hit[1], generation)
+    return hit[0], hit[1]
+
+
+async def _acache_fill(key: Optional[str], path: str, memory: Optional[_MemoryCache], meta: Dict[str, Any], data: bytes, generation: int):
+    """Async variant of _cache_fill; the disk write (and its fsync) runs in a thread."""
+    if not key:
+        return
+    if memory and memory.enabled:
+        memory.put(key, path, meta, data, generation)
+    if _content_cache.enabled:
+        await asyncio.to_thread(_content_cache.put, key, path, meta, data, generation)
+
+
+def _cached_get(variant: str, path: str, params: Dict[str, str], memory: Optional[_MemoryCache] = None) -> Tuple[Dict[str, Any], bytes]:
+    """GET path with params, serving and filling the content cache (and memory, if given)."""
+    
+    def fetch() -> Tuple[Dict[str, Any], bytes]:
+        generation = _content_generation
+        key = _content_key(variant, path, _cache_file_info(path, memory))
+        hit = _cache_lookup(key, path, memory, generation)
+        if hit:
+            return hit
+        response = _make_request("GET", path, params=params)
+        meta = _response_meta(response)
+        _cache_fill(key, path, memory, meta, response.content, generation)
+        return meta, response.content
+    
+    return _single_flight.do(("get", variant, path), fetch)
+
+
+async def _acached_get(variant: str, path: str, params: Dict[str, str], memory: Optional[_MemoryCache] = None) -> Tuple[Dict[str, Any], bytes]:
+    """Async variant of _cached_get."""
+    
+    async def fetch() -> Tuple[Dict[str, Any], bytes]:
+        generation = _content_generation
+        key = _content_key(variant, path, await _acache_file_info(path, memory))
+        hit = await _acache_lookup(key, path, memory, generation)
+        if hit:
+            return hit
+        response = await _amake_request("GET", path, params=params)
+        meta = _response_meta(response)
+        await _acache_fill(key, path, memory, meta, response.content, generation)
+        return meta, response.content
+    
+    return await _single_flight.ado(("get", variant, path), fetch)
+
+
+def _list_params(include_dotfiles: bool, include_tags: bool) -> Dict[str, str]:
+    """Build the query parameters for a ?ls directory listing."""
+    params = {"ls": ""}
+    if include_dotfiles:
+        params["dots"] = ""
+    if include_tags:
+        params["tags"] = ""
+    return params
+
+
+def list_files(path: str = "/", include_dotfiles: bool = False, include_tags: bool = False) -> Dict[str, Any]:
+    """
+    List files and folders at the specified path.
+    
+    Args:
+        path: Directory path to list (default: "/")
+        include_dotfiles: Include hidden files starting with dot (default: False)
+        include_tags: Include file metadata/tags in the response (default: False)
+    
+    Returns:
+        Dictionary containing file and folder information, with tags if requested
+    """
+    return _get_listing_entry(path, include_dotfiles, include_tags).data
+
+
+@mcp.tool(name="list_files", description="List files and folders in a directory on the copyparty server. Returns JSON with file information including names, sizes, timestamps, and metadata/tags if available.")
+async def list_files_async(path: str = "/", include_dotfiles: bool = False, include_tags: bool = False) -> Dict[str, Any]:
+    """Async variant of list_files."""
+    return (await _aget_listing_entry(path, include_dotfiles, include_tags)).data
+
+
+def _matches_any(rel_path: str, patterns: Optional[List[str]]) -> bool:
+    """Whether rel_path or its last component matches one of the glob patterns."""
+    name = rel_path.rsplit("/", 1)[-1]
+    return any(fnmatch.fnmatchcase(rel_path, p) or fnmatch.fnmatchcase(name, p) for p in patterns or [])
+
+
+def _walk_entry(path: str, info: Dict[str, Any], entry_type: str) -> Dict[str, Any]:
+    """Compact walk_files record for a listing entry."""
+    return {
+        "path": path,
+        "type": entry_type,
+        "size": info.get("sz"),
+        "modified": info.get("ts")
+    }
+
+
+@mcp.tool(name="walk_files", description="Recursively list a directory tree on the copyparty server in one call. Directories are listed concurrently; supports max depth, glob include/exclude filters and a result cap. New results are also streamed as progress notifications while the walk runs.")
+async def walk_files_async(
+    path: str = "/",
+    max_depth: Optional[int] = None,
+    include: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+    include_dirs: bool = False,
+    include_dotfiles: bool = False,
+    max_results: int = 10000,
+    concurrency: Optional[int] = None,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """
+    Walk the tree under path with a bounded pool of concurrent ?ls requests.
+    
+    Args:
+        path: Directory to start from (default: "/")
+        max_depth: How many levels below path to descend (None for unlimited, 0 for path only)
+        include: Glob patterns a file must match, against its relative path or name (default: all)
+        exclude: Glob patterns for files and directories to skip; excluded directories are not descended into
+        include_dirs: Also return directories matching the filters (default: False)
+        include_dotfiles: Include hidden files and directories (default: False)
+        max_results: Stop the walk once this many entries were found (default: 10000)
+        concurrency: Directory listings fetched at once (default: COPYPARTY_WALK_CONCURRENCY)
+        ctx: MCP context used to stream results as progress notifications
+    
+    Returns:
+        Dictionary with the matching entries, whether the walk stopped early, and per-directory errors
+    """
+    concurrency = _concurrency(concurrency, COPYPARTY_WALK_CONCURRENCY)
+    root = _normalize_dir(path)
+    queue: asyncio.Queue = asyncio.Queue()
+    queue.put_nowait((root, 0))
+    results: List[Dict[str, Any]] = []
+    errors: List[Dict[str, str]] = []
+    scanned = 0
+    full = asyncio.Event()
+    
+    def relative(child: str) -> str:
+        return child[len(root):].lstrip("/")
+    
+    async def scan(dir_path: str, depth: int):
+        nonlocal scanned
+        entry = await _apeek_listing_entry(dir_path.rstrip("/") + "/", include_dotfiles)
+        scanned += 1
+        found = []
+        for info in entry.data.get("dirs", []):
+            child = dir_path.rstrip("/") + "/" + _entry_name(info)
+            rel = relative(child)
+            if _matches_any(rel, exclude):
+                continue
+            if include_dirs and (not include or _matches_any(rel, include)):
+                found.append(_walk_entry(child, info, "dir"))
+            if max_depth is None or depth < max_depth:
+                queue.put_nowait((child, depth + 1))
+        for info in entry.data.get("files", []):
+            child = dir_path.rstrip("/") + "/" + _entry_name(info)
+            rel = relative(child)
+            if (not include or _matches_any(rel, include)) and not _matches_any(rel, exclude):
+                found.append(_walk_entry(child, info, "file"))
+        
+        found = found[:max_results - len(results)]
+        results.extend(found)
+        if len(results) >= max_results:
+            full.set()
+        if ctx is not None and found:
+            await ctx.report_progress(len(results), None, "\n".join(r["path"] for r in found))
+    
+    async def worker():
+        while True:
+            dir_path, depth = await queue.get()
+            try:
+                if not full.is_set():
+                    await scan(dir_path, depth)
+            except (httpx.HTTPError, ValueError) as e:
+                errors.append({"path": dir_path, "error": str(e)})
+            finally:
+                queue.task_done()
+    
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    waiters = [asyncio.create_task(queue.join()), asyncio.create_task(full.wait())]
+    try:
+        # Workers only return by raising; waiting on them too means an unexpected
+        # error ends the walk instead of leaving queue.join() waiting forever
+        done, _ = await asyncio.wait(waiters + workers, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task in workers:
+                task.result()
+    finally:
+        for task in workers + waiters:
+            task.cancel()
+        await asyncio.gather(*workers, *waiters, return_exceptions=True)
+    
+    return {
+        "success": not errors,
+        "path": root,
+        "count": len(results),
+        "truncated": full.is_set(),
+        "directories_scanned": scanned,
+        "results": results,
+        "errors": errors
+    }
+
+
+_CONTENT_RANGE_RE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+_CHARSET_RE = re.compile(r"charset=([\w.:-]+)", re.IGNORECASE)
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _check_offset(offset: int):
+    """Reject negative read offsets, which would otherwise become suffix ranges or seek errors."""
+    if offset < 0:
+        raise ValueError(f"Invalid range offset {offset}: must be 0 or more")
+
+
+def _range_budget(length: Optional[int]) -> int:
+    """Number of bytes a single download may return."""
+    if length is None or length <= 0:
+        return COPYPARTY_MAX_DOWNLOAD_BYTES
+    return min(length, COPYPARTY_MAX_DOWNLOAD_BYTES)
+
+
+def _range_headers(offset: int, budget: int) -> Dict[str, str]:
+    """Build a Range header asking for budget bytes starting at offset.
+
+    One extra byte is requested so a truncated read can be told apart from
+    one that ends exactly at EOF when the server omits the total size.
+    """
+    return {"Range": f"bytes={offset}-{offset + budget}"}
+
+
+class _BoundedBody:
+    """Collects at most budget bytes of a streamed body, starting at offset.
+
+    If the server ignored the Range header (status 200) the first offset bytes
+    are skipped locally; reading stops as soon as the budget is exceeded, so
+    nothing beyond budget + one chunk is ever held in memory.
+    """
+
+    def __init__(self, status_code: int, offset: int, budget: int):
+        self.skip = offset if status_code == 200 else 0
+        self.budget = budget
+        self.buffer = bytearray()
+        self.truncated = False
+
+    def feed(self, chunk: bytes) -> bool:
+        """Add a chunk; returns True once no more data is needed."""
+        if self.skip:
+            dropped = min(self.skip, len(chunk))
+            chunk = chunk[dropped:]
+            self.skip -= dropped
+        self.buffer += chunk
+        if len(self.buffer) > self.budget:
+            del self.buffer[self.budget:]
+            self.truncated = True
+            return True
+        return False
+
+
+def _range_extent(headers, offset: int, body: _BoundedBody) -> Tuple[Optional[int], bool]:
+    """Get (total file size if known, whether more follows) for a (possibly partial) body."""
+    total_size = None
+    match = _CONTENT_RANGE_RE.match(headers.get("Content-Range", ""))
+    if match and match.group(3) != "*":
+        total_size = int(match.group(3))
+    elif "Content-Range" not in headers and headers.get("Content-Length"):
+        total_size = int(headers["Content-Length"])
+    return total_size, body.truncated or (total_size is not None and offset + len(body.buffer) < total_size)
+
+
+def _decode_page(data: bytes, content_type: str, truncated: bool) -> Optional[Tuple[str, bytes]]:
+    """Decode a page in its declared charset; returns (text, bytes it covers) or None if binary.
+
+    A page boundary may split a multi-byte character; the partial character
+    is left for the next page instead of declaring the page binary.
+    """
+    charset_match = _CHARSET_RE.search(content_type)
+    charset = charset_match.group(1) if charset_match else "utf-8"
+    for cut in range(4 if truncated else 1):
+        try:
+            return data[:len(data) - cut].decode(charset), data[:len(data) - cut]
+        except (UnicodeDecodeError, LookupError):
+            continue
+    return None
+
+
+def _range_result(path: str, headers, offset: int, body: _BoundedBody, as_base64: bool) -> Dict[str, Any]:
+    """Build the download_file result for a (possibly partial) body."""
+    data = bytes(body.buffer)
+    total_size, truncated = _range_extent(headers, offset, body)
+    
+    content_type = headers.get("Content-Type", "application/octet-stream")
     result = {
         "path": path,
-        "content_type": response.headers.get("Content-Type", "application/octet-stream"),
-        "size": len(response.content)
+        "content_type": content_type,
+        "offset": offset,
+        "total_size": total_size,
+        "truncated": truncated
     }
     
-    if as_base64:
-        result["content"] = base64.b64encode(response.content).decode('utf-8')
-        result["encoding"] = "base64"
-    else:
-        try:
-            result["content"] = response.text
-            result["encoding"] = "text"
-        except UnicodeDecodeError:
-            result["content"] = base64.b64encode(response.content).decode('utf-8')
-            result["encoding"] = "base64"
+    content = None
+    if not as_base64:
+        decoded = _decode_page(data, content_type, truncated)
+        if decoded:
+            content, data = decoded
+    
+    if content is not None:
+        result["content"] = content
+        result["encoding"] = "text"
+    else:
+        result["content"] = _b64encode(data)
+        result["encoding"] = "base64"
+    result["size"] = len(data)
+    
+    if truncated:
+        result["next_offset"] = offset + len(data)
+    return result
+
+
+def _cached_body(key: Optional[str], offset: int, budget: int) -> Optional[Tuple[Dict[str, str], _BoundedBody]]:
+    """Read a range from the content cache as (headers, body) shaped like a 206 reply."""
+    hit = _content_cache.read(key, offset, budget + 1) if key else None
+    if hit is None:
+        return None
+    meta, data, total = hit
+    body = _BoundedBody(206, offset, budget)
+    body.feed(data)
+    headers = {
+        "Content-Range": f"bytes {offset}-{offset + len(body.buffer) - 1}/{total}",
+        "Content-Type": meta.get("content_type") or "application/octet-stream",
+    }
+    return headers, body
+
+
+def _cache_full_body(key: Optional[str], path: str, file_info: Optional[Dict[str, Any]], offset: int, body: "_BoundedBody", headers, generation: int):
+    """Store a download_file body in the content cache when it is the whole, unchanged file."""
+    if key and offset == 0 and not body.truncated and len(body.buffer) == file_info.get("sz"):
+        _content_cache.put(key, path, {"content_type": headers.get("Content-Type")}, bytes(body.buffer), generation)
+
+
+def _empty_range_result(path: str, offset: int) -> Dict[str, Any]:
+    """Build the download_file result for an offset at or past the end of the file."""
+    return {
+        "path": path,
+        "offset": offset,
+        "truncated": False,
+        "content": "",
+        "encoding": "text",
+        "size": 0
+    }
+
+
+def download_file(path: str, as_base64: bool = False, offset: int = 0, length: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Download a file from the copyparty server.
+    
+    The body is streamed and at most COPYPARTY_MAX_DOWNLOAD_BYTES are returned per
+    call. When more data remains, the result has truncated=True and a next_offset
+    to pass as offset on the following call.
+    
+    Args:
+        path: File path to download
+        as_base64: Return content as base64-encoded string (useful for binary files)
+        offset: Byte position to start reading from (default: 0)
+        length: Maximum number of bytes to return (default: up to the size limit)
+    
+    Returns:
+        Dictionary with file content and metadata
+    """
+    _check_offset(offset)
+    return _page_result(path, offset, _read_range(path, offset, _range_budget(length)), as_base64)
+
+
+def _read_range(path: str, offset: int, budget: int) -> Optional[Tuple[Any, _BoundedBody, bool]]:
+    """Read up to budget bytes of path from offset as raw bytes, through the content cache.
+
+    Returns (headers, body, served from cache), or None when offset is at or
+    past the end of the file.
+    """
+    generation = _content_generation
+    file_info = _cache_file_info(path)
+    key = _content_key("raw", path, file_info)
+    hit = _cached_body(key, offset, budget)
+    if hit:
+        return hit[0], hit[1], True
+    
+    try:
+        response = _make_request("GET", path, headers=_range_headers(offset, budget), stream=True)
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 416:
+            return None
+        raise
+    
+    with response:
+        body = _BoundedBody(response.status_code, offset, budget)
+        for chunk in response.iter_content(chunk_size=_STREAM_CHUNK_SIZE):
+            if body.feed(chunk):
+                break
+    _cache_full_body(key, path, file_info, offset, body, response.headers, generation)
+    return response.headers, body, False
+
+
+def _page_result(path: str, offset: int, page: Optional[Tuple[Any, _BoundedBody, bool]], as_base64: bool) -> Dict[str, Any]:
+    """Build the download_file result for a page read by _read_range or _aread_range."""
+    if page is None:
+        return _empty_range_result(path, offset)
+    headers, body, cached = page
+    result = _range_result(path, headers, offset, body, as_base64)
+    if cached:
+        result["cached"] = True
+    return result
+
+
+@mcp.tool(name="download_file", description="Download a file from the copyparty server. Returns the file content as base64-encoded string for binary files or as text for text files. Large files are returned in pages: pass offset/length to read a byte range, and when the result is truncated call again with offset=next_offset.")
+async def download_file_async(path: str, as_base64: bool = False, offset: int = 0, length: Optional[int] = None) -> Dict[str, Any]:
+    """Async variant of download_file."""
+    _check_offset(offset)
+    page = await _aread_range(path, offset, _range_budget(length))
+    return await _aencoded(len(page[1].buffer) if page else 0, _page_result, path, offset, page, as_base64)
+
+
+async def _aread_range(path: str, offset: int, budget: int) -> Optional[Tuple[Any, _BoundedBody, bool]]:
+    """Async variant of _read_range."""
+    generation = _content_generation
+    file_info = await _acache_file_info(path)
+    key = _content_key("raw", path, file_info)
+    # Content cache reads and writes are disk I/O (writes fsync), so they run off the event loop
+    hit = await asyncio.to_thread(_cached_body, key, offset, budget) if key else None
+    if hit:
+        return hit[0], hit[1], True
+    
+    try:
+        async with _astream_request("GET", path, headers=_range_headers(offset, budget)) as response:
+            body = _BoundedBody(response.status_code, offset, budget)
+            async for chunk in response.aiter_bytes(_STREAM_CHUNK_SIZE):
+                if body.feed(chunk):
+                    break
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 416:
+            return None
+        raise
+    if key:
+        await asyncio.to_thread(_cache_full_body, key, path, file_info, offset, body, response.headers, generation)
+    return response.headers, body, False
+
+
+# MCP resources: bytes returned by a plain copyparty:// read; other slices are read
+# through copyparty-range:// URIs, so a resource read never pulls in the whole file
+COPYPARTY_RESOURCE_PAGE_BYTES = int(os.environ.get("COPYPARTY_RESOURCE_PAGE_BYTES", 64 * 1024))
+
+
+def _resource_path(path: str) -> str:
+    """copyparty path named by the path part of a resource URI."""
+    return "/" + unquote(path).lstrip("/")
+
+
+def _resource_uri(path: str) -> str:
+    """copyparty:// URI of a copyparty path."""
+    return "copyparty://" + quote(path.lstrip("/"))
+
+
+async def _aresource_listing(path: str) -> Dict[str, Any]:
+    """Directory resource: its entries, each with the URI to read it by."""
+    data = (await _aget_listing_entry(path)).data
+    base = path.rstrip("/") + "/"
+    return {
+        "path": path,
+        "dirs": [
+            {"name": _entry_name(info), "uri": _resource_uri(base + _entry_name(info) + "/"), "modified": info.get("ts")}
+            for info in data.get("dirs", [])
+        ],
+        "files": [
+            {"name": _entry_name(info), "uri": _resource_uri(base + _entry_name(info)), "size": info.get("sz"), "modified": info.get("ts")}
+            for info in data.get("files", [])
+        ],
+    }
+
+
+async def _aresource_slice(path: str, offset: int, length: int) -> Union[str, bytes]:
+    """One range of a file resource: text if it decodes in the file's charset, else raw bytes.
+
+    A text slice may end up to 3 bytes early so it never splits a character;
+    the next slice starts at offset plus the encoded length of the text.
+    """
+    _check_offset(offset)
+    page = await _aread_range(path, offset, _range_budget(max(1, length)))
+    if page is None:
+        return ""
+    headers, body, _ = page
+    data = bytes(body.buffer)
+    _, truncated = _range_extent(headers, offset, body)
+    decoded = _decode_page(data, headers.get("Content-Type", "application/octet-stream"), truncated)
+    return decoded[0] if decoded else data
+
+
+@mcp.resource(
+    "copyparty://{path*}",
+    name="copyparty_path",
+    description=f"A file or directory on the copyparty server, e.g. copyparty://music/album/cover.jpg. A path ending in / reads as a JSON listing whose entries carry their own URIs. A file reads as its first {COPYPARTY_RESOURCE_PAGE_BYTES} bytes (text, or binary if it does not decode); read copyparty-range://{{offset}}/{{length}}/<path> for any other slice.",
+)
+async def read_path_resource(path: str) -> Union[str, bytes, Dict[str, Any]]:
+    """Read a copyparty path as an MCP resource."""
+    if path.endswith("/"):
+        return await _aresource_listing(_resource_path(path))
+    return await _aresource_slice(_resource_path(path), 0, COPYPARTY_RESOURCE_PAGE_BYTES)
+
+
+@mcp.resource(
+    "copyparty-range://{offset}/{length}/{path*}",
+    name="copyparty_range",
+    description="length bytes of a copyparty file starting at byte offset, fetched with a range request, e.g. copyparty-range://0/512/video/clip.mp4 for a header. length is capped at the server's download page size; a slice past the end of the file is empty.",
+)
+async def read_range_resource(offset: int, length: int, path: str) -> Union[str, bytes]:
+    """Read a byte range of a copyparty file as an MCP resource."""
+    return await _aresource_slice(_resource_path(path), offset, length)
+
+
+_SPOOL_PREFIXES = ("dl-", "ar-")
+# Room made under COPYPARTY_SPOOL_MAX_BYTES at a time for bodies of unknown size
+_SPOOL_APPEND_STEP = 64 * 1024 * 1024
+# Spools this process is still writing; never evicted to make room
+_open_spools = set()
+_open_spools_lock = threading.Lock()
+
+
+def _prune_spool(reserve: int = 0):
+    """Remove spooled files older than COPYPARTY_SPOOL_MAX_AGE, then the oldest
+    until reserve more bytes fit under COPYPARTY_SPOOL_MAX_BYTES."""
+    cutoff = time.time() - COPYPARTY_SPOOL_MAX_AGE
+    kept = []
+    with contextlib.suppress(OSError):
+        for entry in os.scandir(COPYPARTY_SPOOL_DIR):
+            if not (entry.name.startswith(_SPOOL_PREFIXES) and entry.is_file()):
+                continue
+            with contextlib.suppress(OSError):
+                st = entry.stat()
+                if st.st_mtime < cutoff:
+                    os.remove(entry.path)
+                else:
+                    kept.append((st.st_mtime, st.st_size, entry.path))
+    if COPYPARTY_SPOOL_MAX_BYTES <= 0:
+        return
+    total = sum(size for _, size, _ in kept) + reserve
+    with _open_spools_lock:
+        busy = set(_open_spools)
+    for _, size, path in sorted(kept):
+        if total <= COPYPARTY_SPOOL_MAX_BYTES:
+            break
+        if path in busy:
+            continue
+        with contextlib.suppress(OSError):
+            os.remove(path)
+            total -= size
+
+
+class _SpoolFile:
+    """A local file that concurrent workers fill at arbitrary offsets (or append to in order).
+
+    The file is preallocated to its expected size, so its size on disk says
+    nothing about what arrived; written counts the bytes actually written.
+    Appended bodies have no expected size: room is made for them in
+    _SPOOL_APPEND_STEP steps as they grow, and one that alone outgrows
+    COPYPARTY_SPOOL_MAX_BYTES fails.
+    """
+
+    def __init__(self, name: str, size: int, prefix: str = "dl-"):
+        os.makedirs(COPYPARTY_SPOOL_DIR, exist_ok=True)
+        _prune_spool(size)
+        fd, self.path = tempfile.mkstemp(prefix=prefix, suffix="-" + os.path.basename(name.rstrip("/")), dir=COPYPARTY_SPOOL_DIR)
+        with _open_spools_lock:
+            _open_spools.add(self.path)
+        self._file = os.fdopen(fd, "r+b")
+        self._file.truncate(size)
+        self._reserved = size
+        self._lock = threading.Lock()
+        self.sha256 = hashlib.sha256()
+        self.written = 0
+
+    @property
+    def spool_id(self) -> str:
+        return os.path.basename(self.path)
+
+    def write(self, offset: int, data: bytes):
+        with self._lock:
+            self._file.seek(offset)
+            self._file.write(data)
+            self.written += len(data)
+
+    def append(self, data: bytes):
+        """Write the next chunk of a sequentially streamed body, updating its checksum."""
+        end = self.written + len(data)
+        if end > self._reserved:
+            if 0 < COPYPARTY_SPOOL_MAX_BYTES < end:
+                raise IOError(f"Spooled body exceeds COPYPARTY_SPOOL_MAX_BYTES ({COPYPARTY_SPOOL_MAX_BYTES} bytes)")
+            _prune_spool(len(data) + _SPOOL_APPEND_STEP)
+            self._reserved = end + _SPOOL_APPEND_STEP
+        self._file.write(data)
+        self.sha256.update(data)
+        self.written += len(data)
+
+    def close(self) -> int:
+        """Close the file and return its size on disk."""
+        self._file.close()
+        with _open_spools_lock:
+            _open_spools.discard(self.path)
+        return os.path.getsize(self.path)
+
+    def discard(self):
+        self._file.close()
+        with _open_spools_lock:
+            _open_spools.discard(self.path)
+        with contextlib.suppress(OSError):
+            os.remove(self.path)
+
+
+def _plan_ranges(size: int, chunk_size: int) -> List[Tuple[int, int]]:
+    """Split size bytes into inclusive (start, end) byte ranges of chunk_size."""
+    return [(start, min(start + chunk_size, size) - 1) for start in range(0, size, chunk_size)]
+
+
+def _probe_size(headers, status_code: int) -> Tuple[Optional[int], bool]:
+    """Get (total size, whether ranges are supported) from the reply to a bytes=0-0 probe."""
+    match = _CONTENT_RANGE_RE.match(headers.get("Content-Range", ""))
+    if status_code == 206 and match and match.group(3) != "*":
+        return int(match.group(3)), True
+    content_length = headers.get("Content-Length")
+    return (int(content_length) if content_length else None), False
+
+
+def _spool_result(path: str, spool: _SpoolFile, expected_size: Optional[int], ranges: int, started: float) -> Dict[str, Any]:
+    """Verify the number of bytes spooled and describe the file."""
+    size = spool.close()
+    if expected_size is not None and spool.written != expected_size:
+        with contextlib.suppress(OSError):
+            os.remove(spool.path)
+        raise IOError(f"Downloaded {spool.written} bytes of {path}, expected {expected_size}")
+    elapsed = time.monotonic() - started
+    return {
+        "success": True,
+        "path": path,
+        "spool_id": spool.spool_id,
+        "local_path": spool.path,
+        "size": size,
+        "ranges": ranges,
+        "elapsed_seconds": round(elapsed, 3),
+        "bytes_per_second": int(size / elapsed) if elapsed > 0 else None
+    }
+
+
+def _parallel_settings(chunk_size: Optional[int], concurrency: Optional[int]) -> Tuple[int, int]:
+    """Range size and concurrency for download_file_parallel, capped at the per-host pool size."""
+    return (chunk_size or COPYPARTY_PARALLEL_CHUNK_SIZE,
+            min(_concurrency(concurrency, COPYPARTY_PARALLEL_CONCURRENCY), COPYPARTY_POOL_MAXSIZE))
+
+
+class _SpoolWriter:
+    """Writes a streamed body into a spool from offset start.
+
+    Given the end of a requested range, the reply must be a 206 and must fill
+    the range exactly.
+    """
+
+    def __init__(self, path: str, spool: _SpoolFile, status_code: int, start: int = 0, end: Optional[int] = None):
+        if end is not None and status_code != 206:
+            raise IOError(f"Server ignored range request for {path}")
+        self.path = path
+        self.spool = spool
+        self.start = start
+        self.end = end
+        self.pos = start
+
+    def feed(self, chunk: bytes):
+        self.spool.write(self.pos, chunk)
+        self.pos += len(chunk)
+
+    def finish(self):
+        if self.end is not None and self.pos != self.end + 1:
+            raise IOError(f"Short read for {self.path} bytes {self.start}-{self.end}: got {self.pos - self.start}")
+
+
+def _fetch_range(path: str, start: int, end: int, spool: _SpoolFile):
+    """Download bytes start..end of path into spool at the same offset."""
+    response = _make_request("GET", path, headers={"Range": f"bytes={start}-{end}"}, stream=True)
+    with response:
+        writer = _SpoolWriter(path, spool, response.status_code, start, end)
+        for chunk in response.iter_content(chunk_size=_STREAM_CHUNK_SIZE):
+            writer.feed(chunk)
+    writer.finish()
+
+
+def download_file_parallel(path: str, chunk_size: Optional[int] = None, concurrency: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Download a large file to local disk using concurrent HTTP range requests.
+    
+    Args:
+        path: File path to download
+        chunk_size: Bytes per range request (default: COPYPARTY_PARALLEL_CHUNK_SIZE)
+        concurrency: Ranges fetched at once (default: COPYPARTY_PARALLEL_CONCURRENCY,
+            capped at the per-host connection pool size)
+    
+    Returns:
+        Dictionary with the local spool path, verified size and throughput
+    """
+    chunk_size, concurrency = _parallel_settings(chunk_size, concurrency)
+    started = time.monotonic()
+    
+    try:
+        probe = _make_request("GET", path, headers={"Range": "bytes=0-0"}, stream=True)
+    except requests.HTTPError as e:
+        if e.response is None or e.response.status_code != 416:
+            raise
+        # Range not satisfiable on a probe of byte 0 means the file is empty
+        return _spool_result(path, _SpoolFile(path, 0), 0, 0, started)
+    
+    size, ranged = _probe_size(probe.headers, probe.status_code)
+    spool = _SpoolFile(path, size or 0)
+    try:
+        if not ranged:
+            # No range support: the probe response is the whole file, stream it through
+            with probe:
+                writer = _SpoolWriter(path, spool, probe.status_code)
+                for chunk in probe.iter_content(chunk_size=_STREAM_CHUNK_SIZE):
+                    writer.feed(chunk)
+            return _spool_result(path, spool, size, 1, started)
+        
+        probe.close()
+        ranges = _plan_ranges(size, chunk_size)
+        with ThreadPoolExecutor(concurrency, thread_name_prefix="range-dl") as pool:
+            futures = [pool.submit(_fetch_range, path, start, end, spool) for start, end in ranges]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        return _spool_result(path, spool, size, len(ranges), started)
+    except BaseException:
+        spool.discard()
+        raise
+
+
+@mcp.tool(name="download_file_parallel", description="Download a large file from the copyparty server to the MCP server's local disk using several concurrent HTTP range requests. Returns the local spool path and the verified size instead of the file content.")
+async def download_file_parallel_async(path: str, chunk_size: Optional[int] = None, concurrency: Optional[int] = None) -> Dict[str, Any]:
+    """Async variant of download_file_parallel; spool creation, writes and the
+    final check run in worker threads, off the event loop."""
+    chunk_size, concurrency = _parallel_settings(chunk_size, concurrency)
+    started = time.monotonic()
+    
+    try:
+        async with _astream_request("GET", path, headers={"Range": "bytes=0-0"}) as probe:
+            size, ranged = _probe_size(probe.headers, probe.status_code)
+            spool = await asyncio.to_thread(_SpoolFile, path, size or 0)
+            if not ranged:
+                try:
+                    writer = _SpoolWriter(path, spool, probe.status_code)
+                    async for chunk in probe.aiter_bytes(_STREAM_CHUNK_SIZE):
+                        await asyncio.to_thread(writer.feed, chunk)
+                except BaseException:
+                    await asyncio.to_thread(spool.discard)
+                    raise
+                return await asyncio.to_thread(_spool_result, path, spool, size, 1, started)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 416:
+            raise
+        spool = await asyncio.to_thread(_SpoolFile, path, 0)
+        return await asyncio.to_thread(_spool_result, path, spool, 0, 0, started)
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def fetch(start: int, end: int):
+        async with semaphore:
+            async with _astream_request("GET", path, headers={"Range": f"bytes={start}-{end}"}) as response:
+                writer = _SpoolWriter(path, spool, response.status_code, start, end)
+                async for chunk in response.aiter_bytes(_STREAM_CHUNK_SIZE):
+                    await asyncio.to_thread(writer.feed, chunk)
+        writer.finish()
+    
+    ranges = _plan_ranges(size, chunk_size)
+    tasks = [asyncio.ensure_future(fetch(start, end)) for start, end in ranges]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.to_thread(spool.discard)
+        raise
+    return await asyncio.to_thread(_spool_result, path, spool, size, len(ranges), started)
+
+
+def _spool_stream_result(path: str, spool: _SpoolFile, content_type: str) -> Dict[str, Any]:
+    """Describe a body that was streamed into spool."""
+    return {
+        "success": True,
+        "path": path,
+        "spooled": True,
+        "spool_id": spool.spool_id,
+        "local_path": spool.path,
+        "size": spool.close(),
+        "sha256": spool.sha256.hexdigest(),
+        "content_type": content_type
+    }
+
+
+def _spool_response(path: str, params: Dict[str, str], default_type: str) -> Dict[str, Any]:
+    """Stream a GET response to a spool file in fixed-size chunks."""
+    response = _make_request("GET", path, params=params, stream=True)
+    spool = _SpoolFile(path, 0, prefix="ar-")
+    try:
+        with response:
+            for chunk in response.iter_content(chunk_size=_STREAM_CHUNK_SIZE):
+                spool.append(chunk)
+    except BaseException:
+        spool.discard()
+        raise
+    return _spool_stream_result(path, spool, response.headers.get("Content-Type", default_type))
+
+
+async def _aspool_response(path: str, params: Dict[str, str], default_type: str) -> Dict[str, Any]:
+    """Async variant of _spool_response; spool creation and writes run in worker threads."""
+    async with _astream_request("GET", path, params=params) as response:
+        spool = await asyncio.to_thread(_SpoolFile, path, 0, prefix="ar-")
+        try:
+            async for chunk in response.aiter_bytes(_STREAM_CHUNK_SIZE):
+                await asyncio.to_thread(spool.append, chunk)
+        except BaseException:
+            await asyncio.to_thread(spool.discard)
+            raise
+    return await asyncio.to_thread(_spool_stream_result, path, spool, response.headers.get("Content-Type", default_type))
+
+
+def _spool_path(spool_id: str) -> str:
+    """Resolve a spool id to its local file, refusing anything outside the spool directory."""
+    if os.path.basename(spool_id) != spool_id or not spool_id.startswith(_SPOOL_PREFIXES):
+        raise ValueError(f"Invalid spool id: {spool_id}")
+    local_path = os.path.join(COPYPARTY_SPOOL_DIR, spool_id)
+    if not os.path.isfile(local_path):
+        raise FileNotFoundError(f"Spooled file {spool_id} not found (it may have expired)")
+    return local_path
+
+
+def read_spooled_file(spool_id: str, offset: int = 0, length: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Read a slice of a spooled file.
+    
+    Args:
+        spool_id: Spool id returned by the tool that created the file
+        offset: Byte position to start reading from (default: 0)
+        length: Maximum number of bytes to return (default: up to COPYPARTY_MAX_DOWNLOAD_BYTES)
+    
+    Returns:
+        Dictionary with the base64-encoded slice and the offset of the next page
+    """
+    _check_offset(offset)
+    local_path = _spool_path(spool_id)
+    total_size = os.path.getsize(local_path)
+    with open(local_path, "rb") as f:
+        f.seek(offset)
+        data = f.read(_range_budget(length))
+    
+    result = {
+        "success": True,
+        "spool_id": spool_id,
+        "offset": offset,
+        "size": len(data),
+        "total_size": total_size,
+        "content": _b64encode(data),
+        "encoding": "base64",
+        "truncated": offset + len(data) < total_size
+    }
+    if result["truncated"]:
+        result["next_offset"] = offset + len(data)
+    return result
+
+
+@mcp.tool(name="read_spooled_file", description="Read a page of a file spooled to the MCP server's disk (by download_as_tar/download_as_zip with spool=true or download_file_parallel) as base64. Call again with offset=next_offset until truncated is false.")
+async def read_spooled_file_async(spool_id: str, offset: int = 0, length: Optional[int] = None) -> Dict[str, Any]:
+    """Async variant of read_spooled_file; the disk read runs in a worker thread."""
+    return await asyncio.to_thread(read_spooled_file, spool_id, offset, length)
+
+
+def delete_spooled_file(spool_id: str) -> Dict[str, Any]:
+    """
+    Delete a spooled file.
+    
+    Args:
+        spool_id: Spool id returned by the tool that created the file
+    
+    Returns:
+        Dictionary with deletion result
+    """
+    os.remove(_spool_path(spool_id))
+    return {
+        "success": True,
+        "spool_id": spool_id,
+        "message": f"Deleted spooled file {spool_id}"
+    }
+
+
+@mcp.tool(name="delete_spooled_file", description="Delete a file spooled to the MCP server's disk once it is no longer needed.")
+async def delete_spooled_file_async(spool_id: str) -> Dict[str, Any]:
+    """Async variant of delete_spooled_file."""
+    return await asyncio.to_thread(delete_spooled_file, spool_id)
+
+
+def _decode_content(content: str, is_base64: bool) -> bytes:
+    """Turn tool-supplied file content into bytes."""
+    if is_base64:
+        return base64.b64decode(content)
+    return content.encode('utf-8')
+
+
+def _upload_request(content: str, filename: str, is_base64: bool, replace: bool):
+    """Build the query parameters and multipart body for an upload."""
+    file_data = _decode_content(content, is_base64)
+    
+    params = {"j": ""}  # Return JSON response
+    if replace:
+        params["replace"] = ""
+    
+    files = {"f": (filename, file_data)}
+    return params, files
+
+
+# Handshake rounds before giving up on an up2k upload that keeps missing chunks
+_UP2K_MAX_HANDSHAKES = 5
+
+_up2k_hash_pool: Optional[ThreadPoolExecutor] = None
+_up2k_upload_pool: Optional[ThreadPoolExecutor] = None
+_up2k_pool_lock = threading.Lock()
+
+
+def _get_up2k_pools() -> Tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+    """Get the (hashing, chunk upload) thread pools, creating them on first use."""
+    global _up2k_hash_pool, _up2k_upload_pool
+    if _up2k_hash_pool is None:
+        with _up2k_pool_lock:
+            if _up2k_hash_pool is None:
+                _up2k_upload_pool = ThreadPoolExecutor(COPYPARTY_UP2K_UPLOAD_WORKERS, thread_name_prefix="up2k-upload")
+                _up2k_hash_pool = ThreadPoolExecutor(COPYPARTY_UP2K_HASH_WORKERS, thread_name_prefix="up2k-hash")
+    return _up2k_hash_pool, _up2k_upload_pool
+
+
+def _up2k_chunksize(filesize: int) -> int:
+    """Chunk size copyparty expects for a file of filesize bytes (mirrors up2k.js/u2c.py)."""
+    chunksize = 1024 * 1024
+    stepsize = 512 * 1024
+    while True:
+        for mul in [1, 2]:
+            nchunks = math.ceil(filesize * 1.0 / chunksize)
+            if nchunks <= 256 or (chunksize >= 32 * 1024 * 1024 and nchunks <= 4096):
+                return chunksize
+            chunksize += stepsize
+            stepsize *= mul
+
+
+def _up2k_hash(chunk: memoryview) -> str:
+    """up2k chunk id: urlsafe base64 of the first 33 bytes of the chunk's sha512."""
+    # hashlib releases the GIL for large buffers, so chunks hash in parallel threads
+    return base64.urlsafe_b64encode(hashlib.sha512(chunk).digest()[:33]).decode('ascii')
+
+
+class _Up2kFile:
+    """A file being uploaded with copyparty's up2k protocol.
+
+    The server answers each handshake with the chunk hashes it still needs;
+    re-sending the handshake for the same content resumes an interrupted
+    upload, and an empty answer on the first handshake means the server
+    already had the file (deduplicated).
+    """
+
+    def __init__(self, filename: str, data: bytes, replace: bool):
+        self.filename = filename
+        self.data = memoryview(data)
+        self.size = len(data)
+        self.replace = replace
+        self.chunksize = _up2k_chunksize(self.size)
+        self.hashes: List[str] = []
+        self._offsets: Dict[str, int] = {}
+        self.wark = None
+        self.purl = None
+        self.chunks_uploaded = 0
+
+    def chunks(self) -> List[memoryview]:
+        return [self.data[ofs:ofs + self.chunksize] for ofs in range(0, self.size, self.chunksize)]
+
+    def set_hashes(self, hashes: List[str]):
+        self.hashes = hashes
+        for i, chunk_hash in enumerate(hashes):
+            self._offsets.setdefault(chunk_hash, i * self.chunksize)
+
+    def handshake_body(self) -> Dict[str, Any]:
+        body = {
+            "name": self.filename,
+            "size": self.size,
+            "lmod": int(time.time()),
+            "hash": self.hashes,
+        }
+        if self.replace:
+            body["replace"] = True
+        return body
+
+    def accept_handshake(self, reply: Dict[str, Any], upload_dir: str) -> List[str]:
+        """Record the server's reply and return the chunk hashes it still needs."""
+        self.wark = reply.get("wark")
+        self.purl = reply.get("purl") or upload_dir
+        self.filename = reply.get("name", self.filename)
+        return reply.get("hash", [])
+
+    def chunk_request(self, chunk_hash: str) -> Dict[str, Any]:
+        """Keyword arguments for the POST that uploads one chunk."""
+        ofs = self._offsets[chunk_hash]
+        return {
+            "data": bytes(self.data[ofs:ofs + self.chunksize]),
+            "headers": {
+                "X-Up2k-Hash": chunk_hash,
+                "X-Up2k-Wark": self.wark,
+                "Content-Type": "application/octet-stream",
+            },
+        }
+
+    def result(self, path: str, deduplicated: bool) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "path": path,
+            "name": self.filename,
+            "size": self.size,
+            "mode": "up2k",
+            "wark": self.wark,
+            "chunks_total": len(self.hashes),
+            "chunks_uploaded": self.chunks_uploaded,
+            "deduplicated": deduplicated
+        }
+
+
+def _up2k_upload(path: str, filename: str, file_data: bytes, replace: bool) -> Dict[str, Any]:
+    """Upload file_data to directory path with up2k, sending only chunks the server lacks."""
+    hash_pool, upload_pool = _get_up2k_pools()
+    up = _Up2kFile(filename, file_data, replace)
+    up.set_hashes(list(hash_pool.map(_up2k_hash, up.chunks())))
+    
+    for attempt in range(_UP2K_MAX_HANDSHAKES):
+        response = _make_request("POST", path, json=up.handshake_body())
+        needed = up.accept_handshake(response.json(), path)
+        if not needed:
+            return up.result(path, deduplicated=attempt == 0)
+        uploads = [upload_pool.submit(_make_request, "POST", up.purl, **up.chunk_request(h)) for h in needed]
+        for future in uploads:
+            future.result()
+        up.chunks_uploaded += len(needed)
+    
+    raise RuntimeError(f"up2k upload of {filename} did not complete after {_UP2K_MAX_HANDSHAKES} handshakes")
+
+
+async def _aup2k_upload(path: str, filename: str, file_data: bytes, replace: bool) -> Dict[str, Any]:
+    """Async variant of _up2k_upload; chunk uploads share the async connection pool."""
+    hash_pool, _ = _get_up2k_pools()
+    loop = asyncio.get_running_loop()
+    up = _Up2kFile(filename, file_data, replace)
+    up.set_hashes(list(await asyncio.gather(*(loop.run_in_executor(hash_pool, _up2k_hash, c) for c in up.chunks()))))
+    semaphore = asyncio.Semaphore(COPYPARTY_UP2K_UPLOAD_WORKERS)
+    
+    async def upload_chunk(chunk_hash: str):
+        # httpx takes a raw body as content=; data= is for form fields
+        request = up.chunk_request(chunk_hash)
+        request["content"] = request.pop("data")
+        async with semaphore:
+            await _amake_request("POST", up.purl, **request)
+    
+    for attempt in range(_UP2K_MAX_HANDSHAKES):
+        response = await _amake_request("POST", path, json=up.handshake_body())
+        needed = up.accept_handshake(response.json(), path)
+        if not needed:
+            return up.result(path, deduplicated=attempt == 0)
+        await asyncio.gather(*(upload_chunk(h) for h in needed))
+        up.chunks_uploaded += len(needed)
     
-    return result
+    raise RuntimeError(f"up2k upload of {filename} did not complete after {_UP2K_MAX_HANDSHAKES} handshakes")
 
 
-@mcp.tool(description="Upload a file to the copyparty server. Supports uploading text content or base64-encoded binary data to a specified path.")
-def upload_file(path: str, content: str, filename: str, is_base64: bool = False, replace: bool = False) -> Dict[str, Any]:
+def upload_file(path: str, content: str, filename: str, is_base64: bool = False, replace: bool = False, up2k: bool = False) -> Dict[str, Any]:
     """
     Upload a file to the copyparty server.
     
@@ -107,39 +2846,356 @@ def upload_file(path: str, content: str, filename: str, is_base64: bool = False,
         filename: Name of the file to create
         is_base64: Whether content is base64-encoded
         replace: Whether to replace the file if it exists
+        up2k: Use copyparty's chunked up2k protocol, which skips chunks the server
+            already has and resumes interrupted uploads (default: False)
     
     Returns:
         Dictionary with upload result information
     """
-    if is_base64:
-        file_data = base64.b64decode(content)
-    else:
-        file_data = content.encode('utf-8')
-    
-    params = {"j": ""}  # Return JSON response
-    if replace:
-        params["replace"] = ""
+    if up2k and content:
+        result = _up2k_upload(path, filename, _decode_content(content, is_base64), replace)
+        _invalidate_listings(path)
+        _forget_content(posixpath.join(path, filename))
+        return result
     
-    files = {"f": (filename, file_data)}
+    params, files = _upload_request(content, filename, is_base64, replace)
     response = _make_request("POST", path, params=params, files=files)
+    _invalidate_listings(path)
+    _forget_content(posixpath.join(path, filename))
+    
+    return response.json()
+
+
+@mcp.tool(name="upload_file", description="Upload a file to the copyparty server. Supports uploading text content or base64-encoded binary data to a specified path. Set up2k=true to use copyparty's chunked, deduplicating upload protocol (only chunks the server lacks are sent; repeat the call to resume an interrupted upload).")
+async def upload_file_async(path: str, content: str, filename: str, is_base64: bool = False, replace: bool = False, up2k: bool = False) -> Dict[str, Any]:
+    """Async variant of upload_file."""
+    if up2k and content:
+        result = await _aup2k_upload(path, filename, _decode_content(content, is_base64), replace)
+        _invalidate_listings(path)
+        _forget_content(posixpath.join(path, filename))
+        return result
     
+    params, files = _upload_request(content, filename, is_base64, replace)
+    response = await _amake_request("POST", path, params=params, files=files)
+    _invalidate_listings(path)
+    _forget_content(posixpath.join(path, filename))
     return response.json()
 
 
-@mcp.tool(description="Create a new directory on the copyparty server at the specified path.")
-def create_directory(path: str, name: str) -> Dict[str, Any]:
+def _staging_path(local_path: str) -> str:
+    """Resolve local_path inside COPYPARTY_STAGING_DIR, refusing anything outside it."""
+    if not COPYPARTY_STAGING_DIR:
+        raise ValueError("Uploading local files requires COPYPARTY_STAGING_DIR to be set")
+    root = os.path.realpath(COPYPARTY_STAGING_DIR)
+    full = os.path.realpath(os.path.join(root, local_path))
+    if os.path.commonpath([root, full]) != root:
+        raise ValueError(f"{local_path} is outside the staging directory")
+    return full
+
+
+def _expand_upload_items(files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Turn upload_files items into one item per file, expanding staged directories.
+
+    Each result has "name" (relative to the target directory) and either
+    "content"/"is_base64" or a resolved "source" path on local disk.
+    """
+    items = []
+    for item in files:
+        if "local_path" not in item:
+            items.append({"name": item["name"], "content": item.get("content", ""), "is_base64": item.get("is_base64", False)})
+            continue
+        source = _staging_path(item["local_path"])
+        if not os.path.isdir(source):
+            items.append({"name": item.get("name") or os.path.basename(source), "source": source})
+            continue
+        prefix = item.get("name", "").strip("/")
+        for dir_path, dir_names, file_names in os.walk(source):
+            dir_names.sort()
+            for file_name in sorted(file_names):
+                relative = os.path.relpath(os.path.join(dir_path, file_name), source).replace(os.sep, "/")
+                items.append({"name": f"{prefix}/{relative}" if prefix else relative, "source": os.path.join(dir_path, file_name)})
+    return items
+
+
+def _read_local(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@mcp.tool(name="upload_files", description="Upload many files to the copyparty server in one call. Each file is either inline content (text or base64) with a name, or a local_path inside the configured staging directory (a directory uploads its whole tree). Names may contain subdirectories; missing target directories are created once up front. Uploads run concurrently and the result reports per-file status and total throughput.")
+async def upload_files_async(
+    path: str,
+    files: List[Dict[str, Any]],
+    replace: bool = False,
+    concurrency: Optional[int] = None,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """
+    Upload many files under path with a bounded pool of concurrent multipart uploads.
+    
+    Args:
+        path: Directory the files are uploaded into
+        files: Items with "name" (may include subdirectories, e.g. "css/site.css") and either
+               "content" (plus optional "is_base64") or "local_path" relative to COPYPARTY_STAGING_DIR
+        replace: Whether to replace files that already exist
+        concurrency: Uploads run at once (default: COPYPARTY_UPLOAD_CONCURRENCY)
+        ctx: MCP context used to report progress
+    
+    Returns:
+        Dictionary with per-file results, success/failure counts, total bytes and throughput
+    """
+    concurrency = _concurrency(concurrency, COPYPARTY_UPLOAD_CONCURRENCY)
+    started = time.monotonic()
+    items = await asyncio.to_thread(_expand_upload_items, files)
+    root = _normalize_dir(path)
+    targets = {i: _normalize_dir(f"{root}/{posixpath.dirname(item['name'])}") for i, item in enumerate(items)}
+    
+    # Create every target directory once before any upload needs it
+    _, mkdir_errors = await _amkdirs(sorted(set(targets.values())))
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    total_bytes = 0
+    completed = 0
+    
+    async def upload(i: int):
+        nonlocal total_bytes, completed
+        item = items[i]
+        target = targets[i]
+        result = {"name": item["name"], "path": target.rstrip("/") + "/" + posixpath.basename(item["name"])}
+        async with semaphore:
+            try:
+                if "source" in item:
+                    data = await asyncio.to_thread(_read_local, item["source"])
+                else:
+                    data = _decode_content(item["content"], item["is_base64"])
+                params = {"j": "", **({"replace": ""} if replace else {})}
+                await _amake_request("POST", target.rstrip("/") + "/", params=params, files={"f": (posixpath.basename(item["name"]), data)})
+                result.update(success=True, size=len(data))
+                total_bytes += len(data)
+            except (httpx.HTTPError, OSError, ValueError) as e:
+                result.update(success=False, error=str(e))
+        results[i] = result
+        completed += 1
+        if ctx is not None:
+            await ctx.report_progress(completed, len(items))
+    
+    await asyncio.gather(*(upload(i) for i in range(len(items))))
+    _invalidate_listings(*set(targets.values()))
+    _forget_content(*(result["path"] for result in results))
+    
+    elapsed = time.monotonic() - started
+    failed = sum(1 for result in results if not result["success"])
+    return {
+        "success": not failed and not mkdir_errors,
+        "path": root,
+        "count": len(items),
+        "succeeded": len(items) - failed,
+        "failed": failed,
+        "bytes": total_bytes,
+        "elapsed_seconds": round(elapsed, 3),
+        "bytes_per_second": round(total_bytes / elapsed) if elapsed > 0 else 0,
+        "directory_errors": mkdir_errors,
+        "results": results
+    }
+
+
+class _DirectoryCache:
+    """Bounded LRU set of directories known to exist on copyparty, with a TTL.
+
+    Filled by directory creation and by the listings it reads; deletes and
+    moves made through this server forget the affected subtree.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0}
+
+    def known(self, path: str) -> bool:
+        with self._lock:
+            expires = self._entries.get(path)
+            if expires is not None and expires > time.monotonic():
+                self._entries.move_to_end(path)
+                self._counts["hits"] += 1
+                return True
+            self._entries.pop(path, None)
+            self._counts["misses"] += 1
+            return False
+
+    def add(self, *paths: str):
+        if self.max_entries <= 0:
+            return
+        expires = time.monotonic() + COPYPARTY_DIR_CACHE_TTL
+        with self._lock:
+            for path in paths:
+                self._entries[path] = expires
+                self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, *paths: str):
+        """Forget paths and everything below them."""
+        with self._lock:
+            for path in map(_normalize_dir, paths):
+                prefix = path.rstrip("/") + "/"
+                for key in [k for k in self._entries if k == path or k.startswith(prefix)]:
+                    del self._entries[key]
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": COPYPARTY_DIR_CACHE_TTL,
+                **self._counts,
+            }
+
+
+_directory_cache = _DirectoryCache(COPYPARTY_DIR_CACHE_SIZE)
+
+
+def _mkdir_levels(paths: List[str]) -> List[List[str]]:
+    """Directories missing for paths (and their parents), grouped by depth, shallowest first."""
+    needed = set()
+    for path in paths:
+        path = _normalize_dir(path)
+        while path != "/" and path not in needed and not _directory_cache.known(path):
+            needed.add(path)
+            path = _parent_dir(path)
+    levels: Dict[int, List[str]] = {}
+    for path in needed:
+        levels.setdefault(path.count("/"), []).append(path)
+    return [sorted(levels[depth]) for depth in sorted(levels)]
+
+
+def _listed_dirs(parent: str, entry: _CachedListing) -> List[str]:
+    """Full paths of the subdirectories in a listing of parent, remembered as existing."""
+    found = [parent.rstrip("/") + "/" + _entry_name(info) for info in entry.data.get("dirs", [])]
+    _directory_cache.add(*found)
+    return found
+
+
+def _mkdirs(paths: List[str]) -> Tuple[List[str], Dict[str, str]]:
+    """Create paths and their missing parents (mkdir -p); returns (created, errors by path)."""
+    created: List[str] = []
+    errors: Dict[str, str] = {}
+    for level in _mkdir_levels(paths):
+        existing = set()
+        # Parents made in this run are empty; the others are listed once per level
+        for parent in sorted({_parent_dir(d) for d in level} - set(created) - set(errors)):
+            try:
+                existing.update(_listed_dirs(parent, _get_listing_entry(parent.rstrip("/") + "/", True, False)))
+            except (requests.RequestException, ValueError) as e:
+                errors[parent] = str(e)
+        for directory in level:
+            parent = _parent_dir(directory)
+            if parent in errors:
+                errors[directory] = f"Parent directory {parent} is unavailable"
+            elif directory not in existing:
+                try:
+                    _make_request("POST", parent, data={"act": "mkdir", "name": posixpath.basename(directory)})
+                except requests.RequestException as e:
+                    errors[directory] = str(e)
+                    continue
+                _directory_cache.add(directory)
+                _invalidate_listings(parent)
+                created.append(directory)
+    return created, errors
+
+
+async def _amkdirs(paths: List[str], concurrency: Optional[int] = None) -> Tuple[List[str], Dict[str, str]]:
+    """Async variant of _mkdirs; directories at the same depth are created concurrently."""
+    created: List[str] = []
+    errors: Dict[str, str] = {}
+    semaphore = asyncio.Semaphore(_concurrency(concurrency, COPYPARTY_BULK_CONCURRENCY))
+    
+    for level in _mkdir_levels(paths):
+        existing = set()
+        
+        async def probe(parent: str):
+            async with semaphore:
+                try:
+                    existing.update(_listed_dirs(parent, await _aget_listing_entry(parent.rstrip("/") + "/", True, False)))
+                except (httpx.HTTPError, ValueError) as e:
+                    errors[parent] = str(e)
+        
+        async def make(directory: str):
+            parent = _parent_dir(directory)
+            if parent in errors:
+                errors[directory] = f"Parent directory {parent} is unavailable"
+                return
+            if directory in existing:
+                return
+            async with semaphore:
+                try:
+                    await _amake_request("POST", parent, data={"act": "mkdir", "name": posixpath.basename(directory)})
+                except httpx.HTTPError as e:
+                    errors[directory] = str(e)
+                    return
+            _directory_cache.add(directory)
+            _invalidate_listings(parent)
+            created.append(directory)
+        
+        await asyncio.gather(*(probe(parent) for parent in {_parent_dir(d) for d in level} - set(created) - set(errors)))
+        await asyncio.gather(*(make(directory) for directory in level))
+    return sorted(created), errors
+
+
+def _mkdirs_result(path: str, created: List[str], errors: Dict[str, str]) -> Dict[str, Any]:
+    """Build the create_directory result for recursive mode."""
+    result = {
+        "success": not errors,
+        "path": path,
+        "created": created,
+        "message": f"Created {len(created)} missing directories for {path}" if not errors else f"Could not create {path}"
+    }
+    if errors:
+        result["errors"] = errors
+    return result
+
+
+def create_directory(path: str, name: str, recursive: bool = False) -> Dict[str, Any]:
     """
     Create a new directory on the copyparty server.
     
     Args:
         path: Parent directory path
-        name: Name of the new directory
+        name: Name of the new directory; with recursive, may be a nested path like "2024/06/01"
+        recursive: Create missing parents too and skip directories that already exist (like mkdir -p)
     
     Returns:
         Dictionary with creation result
     """
+    if recursive:
+        target = _normalize_dir(f"{path}/{name}")
+        return _mkdirs_result(target, *_mkdirs([target]))
+    
     data = {"act": "mkdir", "name": name}
     response = _make_request("POST", path, data=data)
+    _invalidate_listings(path)
+    _directory_cache.add(_normalize_dir(f"{path}/{name}"))
+    
+    return {
+        "success": True,
+        "path": path,
+        "directory": name,
+        "message": f"Directory '{name}' created successfully at {path}"
+    }
+
+
+@mcp.tool(name="create_directory", description="Create a new directory on the copyparty server at the specified path. Set recursive=true to create a nested path like 2024/06/01 including any missing parents (like mkdir -p); directories that already exist are skipped.")
+async def create_directory_async(path: str, name: str, recursive: bool = False) -> Dict[str, Any]:
+    """Async variant of create_directory."""
+    if recursive:
+        target = _normalize_dir(f"{path}/{name}")
+        return _mkdirs_result(target, *await _amkdirs([target]))
+    
+    data = {"act": "mkdir", "name": name}
+    await _amake_request("POST", path, data=data)
+    _invalidate_listings(path)
+    _directory_cache.add(_normalize_dir(f"{path}/{name}"))
     
     return {
         "success": True,
@@ -149,7 +3205,27 @@ def create_directory(path: str, name: str) -> Dict[str, Any]:
     }
 
 
-@mcp.tool(description="Delete a file or directory recursively from the copyparty server. Use with caution as this operation cannot be undone.")
+@mcp.tool(name="create_directories", description="Create many directories on the copyparty server in one call, each including any missing parents (like mkdir -p). Directories that already exist are skipped and sibling directories are created concurrently.")
+async def create_directories_async(paths: List[str], concurrency: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Create every path in paths with mkdir -p semantics.
+    
+    Args:
+        paths: Full directory paths to create
+        concurrency: Requests run at once (default: COPYPARTY_BULK_CONCURRENCY)
+    
+    Returns:
+        Dictionary with the directories created and per-path errors
+    """
+    created, errors = await _amkdirs(paths, concurrency)
+    return {
+        "success": not errors,
+        "count": len(paths),
+        "created": created,
+        "errors": errors
+    }
+
+
 def delete_file(path: str) -> Dict[str, Any]:
     """
     Delete a file or directory from the copyparty server.
@@ -162,6 +3238,24 @@ def delete_file(path: str) -> Dict[str, Any]:
     """
     params = {"delete": ""}
     response = _make_request("POST", path, params=params)
+    _invalidate_listings(path)
+    _forget_content(path)
+    _directory_cache.forget(path)
+    
+    return {
+        "success": True,
+        "path": path,
+        "message": f"Successfully deleted {path}"
+    }
+
+
+@mcp.tool(name="delete_file", description="Delete a file or directory recursively from the copyparty server. Use with caution as this operation cannot be undone.")
+async def delete_file_async(path: str) -> Dict[str, Any]:
+    """Async variant of delete_file."""
+    await _amake_request("POST", path, params={"delete": ""})
+    _invalidate_listings(path)
+    _forget_content(path)
+    _directory_cache.forget(path)
     
     return {
         "success": True,
@@ -170,7 +3264,6 @@ def delete_file(path: str) -> Dict[str, Any]:
     }
 
 
-@mcp.tool(description="Move or rename a file or directory on the copyparty server from one path to another.")
 def move_file(source_path: str, destination_path: str) -> Dict[str, Any]:
     """
     Move or rename a file or directory.
@@ -184,6 +3277,25 @@ def move_file(source_path: str, destination_path: str) -> Dict[str, Any]:
     """
     params = {"move": destination_path}
     response = _make_request("POST", source_path, params=params)
+    _invalidate_listings(source_path, destination_path)
+    _forget_content(source_path, destination_path)
+    _directory_cache.forget(source_path)
+    
+    return {
+        "success": True,
+        "source": source_path,
+        "destination": destination_path,
+        "message": f"Successfully moved {source_path} to {destination_path}"
+    }
+
+
+@mcp.tool(name="move_file", description="Move or rename a file or directory on the copyparty server from one path to another.")
+async def move_file_async(source_path: str, destination_path: str) -> Dict[str, Any]:
+    """Async variant of move_file."""
+    await _amake_request("POST", source_path, params={"move": destination_path})
+    _invalidate_listings(source_path, destination_path)
+    _forget_content(source_path, destination_path)
+    _directory_cache.forget(source_path)
     
     return {
         "success": True,
@@ -193,7 +3305,6 @@ def move_file(source_path: str, destination_path: str) -> Dict[str, Any]:
     }
 
 
-@mcp.tool(description="Copy a file or directory on the copyparty server from one path to another, creating a duplicate.")
 def copy_file(source_path: str, destination_path: str) -> Dict[str, Any]:
     """
     Copy a file or directory.
@@ -207,6 +3318,23 @@ def copy_file(source_path: str, destination_path: str) -> Dict[str, Any]:
     """
     params = {"copy": destination_path}
     response = _make_request("POST", source_path, params=params)
+    _invalidate_listings(destination_path)
+    _forget_content(destination_path)
+    
+    return {
+        "success": True,
+        "source": source_path,
+        "destination": destination_path,
+        "message": f"Successfully copied {source_path} to {destination_path}"
+    }
+
+
+@mcp.tool(name="copy_file", description="Copy a file or directory on the copyparty server from one path to another, creating a duplicate.")
+async def copy_file_async(source_path: str, destination_path: str) -> Dict[str, Any]:
+    """Async variant of copy_file."""
+    await _amake_request("POST", source_path, params={"copy": destination_path})
+    _invalidate_listings(destination_path)
+    _forget_content(destination_path)
     
     return {
         "success": True,
@@ -216,7 +3344,135 @@ def copy_file(source_path: str, destination_path: str) -> Dict[str, Any]:
     }
 
 
-@mcp.tool(description="Get information about recent uploads to the copyparty server, optionally filtered by path pattern.")
+def _ancestors(path: str):
+    """Yield the normalised parent directories of path, nearest first (excluding "/")."""
+    path = _parent_dir(path)
+    while path != "/":
+        yield path
+        path = _parent_dir(path)
+
+
+def _transfer_waves(pairs: List[Tuple[str, str]], op: str) -> List[List[int]]:
+    """Group pair indexes into waves that can run concurrently, in dependency order.
+
+    A pair whose destination lies inside another pair's destination waits for
+    that one to create its parent. For moves, a pair whose source lies inside
+    another pair's source runs before that one takes the folder away.
+    """
+    by_destination = {_normalize_dir(dst): i for i, (_, dst) in enumerate(pairs)}
+    by_source = {_normalize_dir(src): i for i, (src, _) in enumerate(pairs)}
+    after: List[List[int]] = [[] for _ in pairs]
+    blockers = [0] * len(pairs)
+    
+    def edge(first: int, then: int):
+        if first != then:
+            after[first].append(then)
+            blockers[then] += 1
+    
+    for i, (src, dst) in enumerate(pairs):
+        for parent in _ancestors(dst):
+            if parent in by_destination:
+                edge(by_destination[parent], i)
+                break
+        if op == "move":
+            for parent in _ancestors(src):
+                if parent in by_source:
+                    edge(i, by_source[parent])
+                    break
+    
+    waves = []
+    ready = [i for i in range(len(pairs)) if not blockers[i]]
+    done = 0
+    while ready:
+        waves.append(ready)
+        done += len(ready)
+        following = []
+        for i in ready:
+            for j in after[i]:
+                blockers[j] -= 1
+                if not blockers[j]:
+                    following.append(j)
+        ready = following
+    if done < len(pairs):
+        # Contradictory pairs (e.g. a folder moved into its own child); run them last
+        waves.append([i for i in range(len(pairs)) if blockers[i]])
+    return waves
+
+
+async def _abulk_transfer(op: str, pairs: List[Tuple[str, str]], concurrency: Optional[int], ctx: Optional[Context]) -> Dict[str, Any]:
+    """Run ?move or ?copy for every (source, destination) pair, wave by wave."""
+    pairs = [(src, dst) for src, dst in pairs]
+    semaphore = asyncio.Semaphore(_concurrency(concurrency, COPYPARTY_BULK_CONCURRENCY))
+    results: List[Optional[Dict[str, Any]]] = [None] * len(pairs)
+    completed = 0
+    
+    async def transfer(i: int):
+        nonlocal completed
+        src, dst = pairs[i]
+        async with semaphore:
+            try:
+                await _amake_request("POST", src, params={op: dst})
+                results[i] = {"source": src, "destination": dst, "success": True}
+            except (httpx.HTTPError, ValueError) as e:
+                results[i] = {"source": src, "destination": dst, "success": False, "error": str(e)}
+        _invalidate_listings(*((src, dst) if op == "move" else (dst,)))
+        _forget_content(*((src, dst) if op == "move" else (dst,)))
+        if op == "move":
+            _directory_cache.forget(src)
+        completed += 1
+        if ctx is not None:
+            await ctx.report_progress(completed, len(pairs))
+    
+    for wave in _transfer_waves(pairs, op):
+        # Let the whole wave settle before raising, so no transfer keeps running
+        # after the tool call has failed
+        outcomes = await asyncio.gather(*(transfer(i) for i in wave), return_exceptions=True)
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+    
+    failed = sum(1 for result in results if not result["success"])
+    return {
+        "success": not failed,
+        "count": len(pairs),
+        "succeeded": len(pairs) - failed,
+        "failed": failed,
+        "results": results
+    }
+
+
+@mcp.tool(name="move_files", description="Move or rename many files or directories on the copyparty server in one call. Takes a list of [source, destination] pairs, runs them concurrently (parents before children where one pair depends on another) and returns a per-pair success/failure report.")
+async def move_files_async(pairs: List[Tuple[str, str]], concurrency: Optional[int] = None, ctx: Optional[Context] = None) -> Dict[str, Any]:
+    """
+    Move many files or directories with a bounded pool of concurrent requests.
+    
+    Args:
+        pairs: (source, destination) paths, as for move_file
+        concurrency: Moves run at once (default: COPYPARTY_BULK_CONCURRENCY)
+        ctx: MCP context used to report progress
+    
+    Returns:
+        Dictionary with success/failure counts and a result per pair in input order
+    """
+    return await _abulk_transfer("move", pairs, concurrency, ctx)
+
+
+@mcp.tool(name="copy_files", description="Copy many files or directories on the copyparty server in one call. Takes a list of [source, destination] pairs, runs them concurrently (parents before children where one pair depends on another) and returns a per-pair success/failure report.")
+async def copy_files_async(pairs: List[Tuple[str, str]], concurrency: Optional[int] = None, ctx: Optional[Context] = None) -> Dict[str, Any]:
+    """
+    Copy many files or directories with a bounded pool of concurrent requests.
+    
+    Args:
+        pairs: (source, destination) paths, as for copy_file
+        concurrency: Copies run at once (default: COPYPARTY_BULK_CONCURRENCY)
+        ctx: MCP context used to report progress
+    
+    Returns:
+        Dictionary with success/failure counts and a result per pair in input order
+    """
+    return await _abulk_transfer("copy", pairs, concurrency, ctx)
+
+
 def get_recent_uploads(filter_path: Optional[str] = None) -> Dict[str, Any]:
     """
     Get recent uploads from your IP or all recent uploads (if admin).
@@ -239,8 +3495,77 @@ def get_recent_uploads(filter_path: Optional[str] = None) -> Dict[str, Any]:
     }
 
 
-@mcp.tool(description="Search for files on the copyparty server using server-wide search. Supports advanced search syntax including file content search, metadata queries, and more. Much more powerful than simple pattern matching.")
-def search_files(query: str, path: str = "/") -> Dict[str, Any]:
+@mcp.tool(name="get_recent_uploads", description="Get information about recent uploads to the copyparty server, optionally filtered by path pattern.")
+async def get_recent_uploads_async(filter_path: Optional[str] = None) -> Dict[str, Any]:
+    """Async variant of get_recent_uploads."""
+    params = {"ups": ""}
+    if filter_path:
+        params["filter"] = filter_path
+    
+    response = await _amake_request("GET", "/", params=params)
+    
+    return {
+        "success": True,
+        "uploads": response.text
+    }
+
+
+def _search_body(query: str, path: str) -> Dict[str, Any]:
+    """Build the JSON body for a server-wide search."""
+    # Use JSON POST for server-wide search
+    search_data = {"q": query}
+    if path != "/":
+        search_data["v"] = path
+    return search_data
+
+
+def _search_key(query: str, path: str) -> Tuple[str, str]:
+    """Cache key for a search: whitespace-collapsed query and normalised scope."""
+    return " ".join(query.split()), _normalize_dir(path)
+
+
+def _search_fingerprint(key: Tuple[str, str]) -> str:
+    return hashlib.sha1("\0".join(key).encode()).hexdigest()[:12]
+
+
+def _search_offset(key: Tuple[str, str], cursor: Optional[str]) -> int:
+    """Decode a next_cursor from an earlier page of the same search."""
+    if not cursor:
+        return 0
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        fingerprint, offset = state["k"], int(state["o"])
+    except (ValueError, TypeError, KeyError):
+        raise ValueError(f"Invalid search cursor: {cursor}")
+    if fingerprint != _search_fingerprint(key) or offset < 0:
+        raise ValueError("Search cursor belongs to a different query or path")
+    return offset
+
+
+def _search_page(key: Tuple[str, str], data: Dict[str, Any], cached: bool, offset: int,
+                 limit: Optional[int], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Slice one page of hits out of a search response, keeping only the requested fields."""
+    hits = data.get("hits", [])
+    limit = limit if limit and limit > 0 else COPYPARTY_SEARCH_PAGE_SIZE
+    page = hits[offset:offset + limit]
+    if fields:
+        page = [{name: hit[name] for name in fields if name in hit} for hit in page]
+    end = offset + len(page)
+    next_cursor = None
+    if end < len(hits):
+        next_cursor = base64.urlsafe_b64encode(json.dumps({"k": _search_fingerprint(key), "o": end}).encode()).decode()
+    return {
+        **{name: value for name, value in data.items() if name != "hits"},
+        "hits": page,
+        "total": len(hits),
+        "offset": offset,
+        "next_cursor": next_cursor,
+        "cached": cached
+    }
+
+
+def search_files(query: str, path: str = "/", limit: Optional[int] = None, cursor: Optional[str] = None,
+                 fields: Optional[List[str]] = None) -> Dict[str, Any]:
     """
     Search for files server-wide using advanced search syntax.
     
@@ -254,20 +3579,82 @@ def search_files(query: str, path: str = "/") -> Dict[str, Any]:
             - size>1M: files larger than 1MB
             - date>2023-01-01: files modified after date
         path: Optional path to limit search scope (default: "/")
+        limit: Maximum hits to return (default: COPYPARTY_SEARCH_PAGE_SIZE)
+        cursor: next_cursor from the previous page of the same search
+        fields: Only return these fields of each hit (e.g. ["rp", "sz"]; default: all)
     
     Returns:
-        Dictionary with search results
+        Dictionary with one page of search results, the total hit count and next_cursor
     """
-    # Use JSON POST for server-wide search
-    search_data = {"q": query}
-    if path != "/":
-        search_data["v"] = path
+    key = _search_key(query, path)
+    offset = _search_offset(key, cursor)
+    data, generation = _search_cache.lookup(key)
+    cached = data is not None
+    if data is None:
+        def fetch() -> Dict[str, Any]:
+            response = _make_request("POST", "/", params={"j": ""}, json=_search_body(*key), idempotent=True)
+            return _search_cache.store(key, generation, response.json())
+        
+        data = _single_flight.do(("search",) + key, fetch)
+    return _search_page(key, data, cached, offset, limit, fields)
+
+
+@mcp.tool(name="search_files", description="Search for files on the copyparty server using server-wide search. Supports advanced search syntax including file content search, metadata queries, and more. Much more powerful than simple pattern matching. Results are paged: pass next_cursor back as cursor (with the same query and path) for the next page, and use fields to return only some fields of each hit.")
+async def search_files_async(query: str, path: str = "/", limit: Optional[int] = None, cursor: Optional[str] = None,
+                             fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Async variant of search_files."""
+    key = _search_key(query, path)
+    offset = _search_offset(key, cursor)
+    data, generation = _search_cache.lookup(key)
+    cached = data is not None
+    if data is None:
+        async def fetch() -> Dict[str, Any]:
+            response = await _amake_request("POST", "/", params={"j": ""}, json=_search_body(*key), idempotent=True)
+            return _search_cache.store(key, generation, response.json())
+        
+        data = await _single_flight.ado(("search",) + key, fetch)
+    return _search_page(key, data, cached, offset, limit, fields)
+
+
+def _metadata_location(path: str) -> Tuple[str, str, bool]:
+    """Split a file path into (parent directory, file name, needs dotfiles listing)."""
+    # The parent directory is needed to get the file info from the listing
+    filename = os.path.basename(path.rstrip("/"))
+    return _parent_dir(path), filename, filename.startswith(".")
+
+
+def _metadata_result(path: str, entry: _CachedListing) -> Dict[str, Any]:
+    """Look up path in the file index of its parent directory listing."""
+    filename = os.path.basename(path.rstrip("/"))
+    file_info = entry.file_index().get(filename)
     
-    response = _make_request("POST", "/", params={"j": ""}, json=search_data)
-    return response.json()
+    if file_info is not None:
+        result = {
+            "success": True,
+            "path": path,
+            "name": filename,
+            "size": file_info.get("sz"),
+            "modified": file_info.get("ts"),
+        }
+        
+        # Include all tags if present
+        if "tags" in file_info:
+            result["tags"] = file_info["tags"]
+        
+        # Also include raw file info for any additional metadata
+        result["raw_metadata"] = file_info
+        
+        return result
+    
+    # If file not found or no metadata available
+    return {
+        "success": False,
+        "path": path,
+        "error": "File not found or metadata not available",
+        "note": "Ensure the copyparty server has metadata indexing enabled with -e2ts flag"
+    }
 
 
-@mcp.tool(description="Get file metadata and tags (audio metadata like artist, album, title, etc.) for a specific file on the copyparty server. Requires the copyparty server to have metadata indexing enabled with -e2ts flag.")
 def get_file_metadata(path: str) -> Dict[str, Any]:
     """
     Get metadata/tags for a file (especially useful for audio files with ID3 tags, etc.).
@@ -278,59 +3665,88 @@ def get_file_metadata(path: str) -> Dict[str, Any]:
     Returns:
         Dictionary with file metadata including tags like artist, album, title, duration, etc.
     """
-    # Request file listing with metadata by adding ?tags parameter
-    # The parent directory is needed to get the file info from the listing
-    dir_path = os.path.dirname(path) or "/"
-    filename = os.path.basename(path)
-    
-    # Get directory listing with tags
-    params = {"ls": "", "tags": ""}
-    response = _make_request("GET", dir_path, params=params)
-    data = response.json()
-    
-    # Find the specific file in the listing
-    if "files" in data:
-        for file_info in data["files"]:
-            if file_info.get("name") == filename:
-                result = {
-                    "success": True,
-                    "path": path,
-                    "name": filename,
-                    "size": file_info.get("sz"),
-                    "modified": file_info.get("ts"),
-                }
-                
-                # Include all tags if present
-                if "tags" in file_info:
-                    result["tags"] = file_info["tags"]
-                
-                # Also include raw file info for any additional metadata
-                result["raw_metadata"] = file_info
-                
-                return result
-    
-    # If file not found or no metadata available
+    # Request file listing with metadata by adding ?tags parameter; the listing
+    # and its name index are cached, so lookups in the same folder skip the network
+    dir_path, _, dots = _metadata_location(path)
+    return _metadata_result(path, _get_listing_entry(dir_path, dots, True))
+
+
+@mcp.tool(name="get_file_metadata", description="Get file metadata and tags (audio metadata like artist, album, title, etc.) for a specific file on the copyparty server. Requires the copyparty server to have metadata indexing enabled with -e2ts flag.")
+async def get_file_metadata_async(path: str) -> Dict[str, Any]:
+    """Async variant of get_file_metadata."""
+    dir_path, _, dots = _metadata_location(path)
+    return _metadata_result(path, await _aget_listing_entry(dir_path, dots, True))
+
+
+def _group_by_listing(paths: List[str]) -> Dict[Tuple[str, bool], List[str]]:
+    """Group file paths by the (parent directory, dotfiles) listing that describes them."""
+    groups: Dict[Tuple[str, bool], List[str]] = {}
+    for path in paths:
+        dir_path, _, dots = _metadata_location(path)
+        groups.setdefault((dir_path, dots), []).append(path)
+    return groups
+
+
+def _metadata_error(path: str, error: Exception) -> Dict[str, Any]:
+    """Build the per-path result for a directory listing that failed."""
     return {
         "success": False,
         "path": path,
-        "error": "File not found or metadata not available",
-        "note": "Ensure the copyparty server has metadata indexing enabled with -e2ts flag"
+        "error": str(error)
     }
 
 
-@mcp.tool(description="Create a temporary shareable URL for a file or folder on the copyparty server. The share can have an expiration time and custom permissions.")
-def create_share(path: str, expiration_minutes: Optional[int] = None, read_only: bool = True) -> Dict[str, Any]:
+def get_files_metadata(paths: List[str]) -> Dict[str, Any]:
     """
-    Create a temporary share URL for a file or folder.
+    Get metadata/tags for many files, fetching each parent directory only once.
     
     Args:
-        path: Path to the file or folder to share
-        expiration_minutes: Minutes until share expires (None for no expiration)
-        read_only: Whether the share is read-only (default: True)
+        paths: File paths to get metadata for
     
     Returns:
-        Dictionary with share URL and information
+        Dictionary with one metadata result per path, in the order given
     """
+    by_path = {}
+    for (dir_path, dots), group in _group_by_listing(paths).items():
+        try:
+            entry = _get_listing_entry(dir_path, dots, True)
+        except requests.RequestException as e:
+            by_path.update((p, _metadata_error(p, e)) for p in group)
+            continue
+        by_path.update((p, _metadata_result(p, entry)) for p in group)
+    
+    return {
+        "success": all(by_path[p]["success"] for p in paths),
+        "count": len(paths),
+        "results": [by_path[p] for p in paths]
+    }
+
+
+@mcp.tool(name="get_files_metadata", description="Get file metadata and tags for many files at once. Paths are grouped by parent directory so each directory listing is fetched only once.")
+async def get_files_metadata_async(paths: List[str]) -> Dict[str, Any]:
+    """Async variant of get_files_metadata; parent directories are fetched concurrently."""
+    groups = list(_group_by_listing(paths).items())
+    entries = await asyncio.gather(
+        *(_aget_listing_entry(dir_path, dots, True) for (dir_path, dots), _ in groups),
+        return_exceptions=True,
+    )
+    
+    by_path = {}
+    for (_, group), entry in zip(groups, entries):
+        if isinstance(entry, BaseException):
+            by_path.update((p, _metadata_error(p, entry)) for p in group)
+        else:
+            by_path.update((p, _metadata_result(p, entry)) for p in group)
+    
+    return {
+        "success": all(by_path[p]["success"] for p in paths),
+        "count": len(paths),
+        "results": [by_path[p] for p in paths]
+    }
+
+
+def _share_body(path: str, expiration_minutes: Optional[int], read_only: bool) -> Dict[str, Any]:
+    """Build the JSON body for creating a share."""
     share_data = {
         "v": path,
         "rd": 1 if read_only else 0
@@ -338,10 +3754,11 @@ def create_share(path: str, expiration_minutes: Optional[int] = None, read_only:
     
     if expiration_minutes:
         share_data["life"] = expiration_minutes
-    
-    response = _make_request("POST", path, params={"share": ""}, json=share_data)
-    result = response.json()
-    
+    return share_data
+
+
+def _share_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the absolute share URL to a create_share response."""
     # Construct full share URL
     if "url" in result:
         share_url = urljoin(COPYPARTY_URL, result["url"])
@@ -350,7 +3767,43 @@ def create_share(path: str, expiration_minutes: Optional[int] = None, read_only:
     return result
 
 
-@mcp.tool(description="List all shared files and folders on the copyparty server that you have access to.")
+def create_share(path: str, expiration_minutes: Optional[int] = None, read_only: bool = True) -> Dict[str, Any]:
+    """
+    Create a temporary share URL for a file or folder.
+    
+    Args:
+        path: Path to the file or folder to share
+        expiration_minutes: Minutes until share expires (None for no expiration)
+        read_only: Whether the share is read-only (default: True)
+    
+    Returns:
+        Dictionary with share URL and information
+    """
+    share_data = _share_body(path, expiration_minutes, read_only)
+    response = _make_request("POST", path, params={"share": ""}, json=share_data)
+    return _share_result(response.json())
+
+
+@mcp.tool(name="create_share", description="Create a temporary shareable URL for a file or folder on the copyparty server. The share can have an expiration time and custom permissions.")
+async def create_share_async(path: str, expiration_minutes: Optional[int] = None, read_only: bool = True) -> Dict[str, Any]:
+    """Async variant of create_share."""
+    share_data = _share_body(path, expiration_minutes, read_only)
+    response = await _amake_request("POST", path, params={"share": ""}, json=share_data)
+    return _share_result(response.json())
+
+
+def _json_or_text(response, text_key: str) -> Dict[str, Any]:
+    """Parse a response as JSON, falling back to its text under text_key."""
+    # Try to parse as JSON, fallback to text
+    try:
+        return response.json()
+    except (ValueError, json.JSONDecodeError):
+        return {
+            "success": True,
+            text_key: response.text
+        }
+
+
 def list_shares() -> Dict[str, Any]:
     """
     List all your shared files and folders.
@@ -359,18 +3812,16 @@ def list_shares() -> Dict[str, Any]:
         Dictionary with list of active shares
     """
     response = _make_request("GET", "/", params={"shares": ""})
-    
-    # Try to parse as JSON, fallback to text
-    try:
-        return response.json()
-    except (ValueError, json.JSONDecodeError):
-        return {
-            "success": True,
-            "shares": response.text
-        }
+    return _json_or_text(response, "shares")
+
+
+@mcp.tool(name="list_shares", description="List all shared files and folders on the copyparty server that you have access to.")
+async def list_shares_async() -> Dict[str, Any]:
+    """Async variant of list_shares."""
+    response = await _amake_request("GET", "/", params={"shares": ""})
+    return _json_or_text(response, "shares")
 
 
-@mcp.tool(description="Update the expiration time of an existing share on the copyparty server.")
 def update_share_expiration(path: str, expiration_minutes: int) -> Dict[str, Any]:
     """
     Update the expiration time of a shared file or folder.
@@ -393,7 +3844,19 @@ def update_share_expiration(path: str, expiration_minutes: int) -> Dict[str, Any
     }
 
 
-@mcp.tool(description="Delete/stop sharing a file or folder on the copyparty server.")
+@mcp.tool(name="update_share_expiration", description="Update the expiration time of an existing share on the copyparty server.")
+async def update_share_expiration_async(path: str, expiration_minutes: int) -> Dict[str, Any]:
+    """Async variant of update_share_expiration."""
+    await _amake_request("POST", path, params={"eshare": str(expiration_minutes)})
+    
+    return {
+        "success": True,
+        "path": path,
+        "expiration_minutes": expiration_minutes,
+        "message": f"Share expiration updated to {expiration_minutes} minutes"
+    }
+
+
 def delete_share(path: str) -> Dict[str, Any]:
     """
     Stop sharing a file or folder.
@@ -414,100 +3877,463 @@ def delete_share(path: str) -> Dict[str, Any]:
     }
 
 
-@mcp.tool(description="Download a folder and its contents as a tar archive from the copyparty server. Supports various compression formats.")
-def download_as_tar(path: str, compression: Optional[str] = None, level: int = 1) -> Dict[str, Any]:
-    """
-    Download folder contents as a tar archive.
+@mcp.tool(name="delete_share", description="Delete/stop sharing a file or folder on the copyparty server.")
+async def delete_share_async(path: str) -> Dict[str, Any]:
+    """Async variant of delete_share."""
+    await _amake_request("POST", path, params={"eshare": "rm"})
     
-    Args:
-        path: Path to the folder to download
-        compression: Compression type: None (no compression), 'gz' (gzip), 'xz' (xz)
-        level: Compression level 1-9 (default: 1)
-    
-    Returns:
-        Dictionary with download information and base64-encoded tar file
-    """
+    return {
+        "success": True,
+        "path": path,
+        "message": f"Share removed for {path}"
+    }
+
+
+def _tar_params(compression: Optional[str], level: int) -> Dict[str, str]:
+    """Build the ?tar query parameter."""
     params = {}
     if compression:
         params["tar"] = f"{compression}:{level}"
     else:
         params["tar"] = ""
-    
-    response = _make_request("GET", path, params=params)
-    
+    return params
+
+
+def _tar_result(path: str, compression: Optional[str], response) -> Dict[str, Any]:
+    """Build the download_as_tar result from a sync or async response."""
     return {
         "success": True,
         "path": path,
         "compression": compression or "none",
-        "content": base64.b64encode(response.content).decode('utf-8'),
+        "content": _b64encode(response.content),
         "encoding": "base64",
         "size": len(response.content),
         "content_type": response.headers.get("Content-Type", "application/x-tar")
     }
 
 
-@mcp.tool(description="Download a folder and its contents as a zip archive from the copyparty server. Supports compatibility modes for older systems.")
-def download_as_zip(path: str, compatibility: Optional[str] = None) -> Dict[str, Any]:
+def download_as_tar(path: str, compression: Optional[str] = None, level: int = 1, spool: bool = False) -> Dict[str, Any]:
     """
-    Download folder contents as a zip archive.
+    Download folder contents as a tar archive.
     
     Args:
         path: Path to the folder to download
-        compatibility: Compatibility mode: None (modern), 'dos' (WinXP), 'crc' (MSDOS)
+        compression: Compression type: None (no compression), 'gz' (gzip), 'xz' (xz)
+        level: Compression level 1-9 (default: 1)
+        spool: Stream the archive to a local spool file with bounded memory and
+            return a handle for read_spooled_file instead of the content
     
     Returns:
-        Dictionary with download information and base64-encoded zip file
+        Dictionary with download information and base64-encoded tar file (or a spool handle)
     """
-    params = {}
-    if compatibility:
-        params["zip"] = compatibility
-    else:
-        params["zip"] = ""
+    if spool:
+        result = _spool_response(path, _tar_params(compression, level), "application/x-tar")
+        result["compression"] = compression or "none"
+        return result
     
-    response = _make_request("GET", path, params=params)
+    response = _make_request("GET", path, params=_tar_params(compression, level))
+    return _tar_result(path, compression, response)
+
+
+@mcp.tool(name="download_as_tar", description="Download a folder and its contents as a tar archive from the copyparty server. Supports various compression formats. For large folders set spool=true: the archive is streamed to the MCP server's disk and a handle (spool_id, size, sha256) is returned for paged reads with read_spooled_file.")
+async def download_as_tar_async(path: str, compression: Optional[str] = None, level: int = 1, spool: bool = False) -> Dict[str, Any]:
+    """Async variant of download_as_tar."""
+    if spool:
+        result = await _aspool_response(path, _tar_params(compression, level), "application/x-tar")
+        result["compression"] = compression or "none"
+        return result
     
+    response = await _amake_request("GET", path, params=_tar_params(compression, level))
+    return await _aencoded(len(response.content), _tar_result, path, compression, response)
+
+
+def _zip_result(path: str, compatibility: Optional[str], response) -> Dict[str, Any]:
+    """Build the download_as_zip result from a sync or async response."""
     return {
         "success": True,
         "path": path,
         "compatibility": compatibility or "modern",
-        "content": base64.b64encode(response.content).decode('utf-8'),
+        "content": _b64encode(response.content),
         "encoding": "base64",
         "size": len(response.content),
         "content_type": response.headers.get("Content-Type", "application/zip")
     }
 
 
-@mcp.tool(description="Stream a growing file from the copyparty server, useful for log files or files being written. Supports starting from a specific position.")
-def tail_file(path: str, start_byte: Optional[int] = None) -> Dict[str, Any]:
+def download_as_zip(path: str, compatibility: Optional[str] = None, spool: bool = False) -> Dict[str, Any]:
+    """
+    Download folder contents as a zip archive.
+    
+    Args:
+        path: Path to the folder to download
+        compatibility: Compatibility mode: None (modern), 'dos' (WinXP), 'crc' (MSDOS)
+        spool: Stream the archive to a local spool file with bounded memory and
+            return a handle for read_spooled_file instead of the content
+    
+    Returns:
+        Dictionary with download information and base64-encoded zip file (or a spool handle)
+    """
+    if spool:
+        result = _spool_response(path, {"zip": compatibility or ""}, "application/zip")
+        result["compatibility"] = compatibility or "modern"
+        return result
+    
+    response = _make_request("GET", path, params={"zip": compatibility or ""})
+    return _zip_result(path, compatibility, response)
+
+
+@mcp.tool(name="download_as_zip", description="Download a folder and its contents as a zip archive from the copyparty server. Supports compatibility modes for older systems. For large folders set spool=true: the archive is streamed to the MCP server's disk and a handle (spool_id, size, sha256) is returned for paged reads with read_spooled_file.")
+async def download_as_zip_async(path: str, compatibility: Optional[str] = None, spool: bool = False) -> Dict[str, Any]:
+    """Async variant of download_as_zip."""
+    if spool:
+        result = await _aspool_response(path, {"zip": compatibility or ""}, "application/zip")
+        result["compatibility"] = compatibility or "modern"
+        return result
+    
+    response = await _amake_request("GET", path, params={"zip": compatibility or ""})
+    return await _aencoded(len(response.content), _zip_result, path, compatibility, response)
+
+
+# A tail read returns once no new bytes arrived for this long after the first ones
+_TAIL_SETTLE_SECONDS = 0.5
+# Upper bound on how long a single tail read keeps collecting a busy file
+_TAIL_MAX_READ_SECONDS = 10.0
+
+
+def _decode_partial(data: bytes) -> Tuple[str, int]:
+    """Decode UTF-8 text that may end mid-character; returns (text, bytes consumed)."""
+    for cut in range(4):
+        try:
+            return data[:len(data) - cut].decode('utf-8'), len(data) - cut
+        except UnicodeDecodeError:
+            continue
+    return data.decode('utf-8', errors='replace'), len(data)
+
+
+class _TailRead:
+    """Bytes collected by one tail call, starting at an absolute file offset."""
+
+    def __init__(self, offset: int, budget: int):
+        self.offset = offset
+        self.budget = budget
+        self.buffer = bytearray()
+        self.full = False
+
+    @property
+    def next_offset(self) -> int:
+        return self.offset + len(self.buffer)
+
+    def feed(self, chunk: bytes) -> bool:
+        """Add a chunk; returns True once the size budget is used up."""
+        self.buffer += chunk[:self.budget - len(self.buffer)]
+        self.full = len(self.buffer) >= self.budget
+        return self.full
+
+    def result(self, path: str, start_byte: Optional[int]) -> Dict[str, Any]:
+        content, consumed = _decode_partial(bytes(self.buffer))
+        return {
+            "success": True,
+            "path": path,
+            "start_byte": start_byte,
+            "offset": self.offset,
+            "content": content,
+            "size": consumed,
+            "next_offset": self.offset + consumed,
+            "has_new_data": consumed > 0,
+            "truncated": self.full
+        }
+
+
+def _tail_offset(start_byte: Optional[int], file_size: Optional[int]) -> int:
+    """Absolute offset for start_byte (None = beginning, negative = bytes from end)."""
+    if start_byte is None:
+        return 0
+    if start_byte >= 0:
+        return start_byte
+    return max(0, (file_size or 0) + start_byte)
+
+
+def _tail_request(tail: _TailRead) -> Dict[str, Any]:
+    """Request arguments for streaming path from tail's next offset.
+
+    Not retried by the request layer: the tail loops reopen the stream
+    themselves, paced by _tail_pause, until their wait deadline.
     """
-    Continuously stream a growing file (like tail -f).
+    return {"params": {"tail": str(tail.next_offset)}, "idempotent": False}
+
+
+def _tail_pause(attempt_started: float, wait_deadline: float) -> float:
+    """Seconds to wait before reopening a tail stream that failed or closed.
+
+    An attempt that already waited out _TAIL_SETTLE_SECONDS (a quiet file)
+    reopens at once; one that failed fast (connection refused) waits the rest.
+    """
+    now = time.monotonic()
+    return max(0.0, min(_TAIL_SETTLE_SECONDS - (now - attempt_started), wait_deadline - now))
+
+
+def tail_file(path: str, start_byte: Optional[int] = None, wait_seconds: float = 0, max_bytes: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Read new bytes of a growing file (like tail -f) with a resumable cursor.
+    
+    Pass the returned next_offset as start_byte on the next call to receive only
+    bytes written since. With wait_seconds > 0 the call long-polls until new
+    bytes arrive or the timeout expires.
     
     Args:
         path: Path to the file to tail
         start_byte: Starting byte position (None for beginning, negative for bytes from end)
+        wait_seconds: How long to wait for new bytes when none are available yet (default: 0)
+        max_bytes: Maximum number of bytes to return (default: up to COPYPARTY_MAX_DOWNLOAD_BYTES)
     
     Returns:
-        Dictionary with file content from the specified position
+        Dictionary with file content from the specified position and the next_offset cursor
     """
-    params = {}
-    if start_byte is not None:
-        params["tail"] = str(start_byte)
-    else:
-        params["tail"] = ""
+    file_size = None
+    if start_byte is not None and start_byte < 0:
+        file_size = int(_make_request("HEAD", path).headers.get("Content-Length", 0))
+    tail = _TailRead(_tail_offset(start_byte, file_size), _range_budget(max_bytes))
+    started = time.monotonic()
+    wait_deadline = started + max(wait_seconds, _TAIL_SETTLE_SECONDS)
     
-    response = _make_request("GET", path, params=params)
+    # The read timeout doubles as the quiet-gap detector; while long-polling an
+    # idle file the stream is simply reopened at the same offset
+    while not tail.full and time.monotonic() < wait_deadline:
+        attempt_started = time.monotonic()
+        try:
+            response = _make_request("GET", path, stream=True, timeout=(COPYPARTY_CONNECT_TIMEOUT, _TAIL_SETTLE_SECONDS), **_tail_request(tail))
+            with response:
+                for chunk in response.iter_content(chunk_size=_STREAM_CHUNK_SIZE):
+                    if tail.feed(chunk) or time.monotonic() - started > wait_seconds + _TAIL_MAX_READ_SECONDS:
+                        break
+        except _CircuitOpenError:
+            raise
+        except (requests.ConnectionError, requests.Timeout):
+            if tail.buffer:
+                break
+            time.sleep(_tail_pause(attempt_started, wait_deadline))
+            continue
+        if tail.buffer:
+            break
+        # copyparty closed the stream without new data; poll again shortly
+        time.sleep(_tail_pause(attempt_started, wait_deadline))
+    
+    return tail.result(path, start_byte)
+
+
+async def _atail_read(path: str, tail: _TailRead, wait_deadline: float, follow: bool, on_chunk=None):
+    """Collect new bytes of path into tail over a streamed ?tail request.
+
+    Without follow, returns after the first bytes once the file goes quiet for
+    _TAIL_SETTLE_SECONDS; with follow, keeps reading until wait_deadline.
+    on_chunk, if given, is awaited with every chunk as it arrives.
+    """
+    hard_deadline = wait_deadline + _TAIL_MAX_READ_SECONDS
+    while not tail.full and time.monotonic() < wait_deadline:
+        attempt_started = time.monotonic()
+        ended = False
+        try:
+            async with _astream_request("GET", path, **_tail_request(tail)) as response:
+                chunks = response.aiter_bytes(_STREAM_CHUNK_SIZE)
+                opened = True
+                while True:
+                    now = time.monotonic()
+                    if follow or not tail.buffer:
+                        timeout = wait_deadline - now
+                    else:
+                        timeout = min(_TAIL_SETTLE_SECONDS, hard_deadline - now)
+                    if opened:
+                        # Opening the stream may have used up the wait; still read what it brought
+                        timeout = max(timeout, min(_TAIL_SETTLE_SECONDS, hard_deadline - now))
+                        opened = False
+                    if timeout <= 0:
+                        break
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    except StopAsyncIteration:
+                        ended = True
+                        break
+                    if on_chunk is not None:
+                        await on_chunk(chunk)
+                    if tail.feed(chunk):
+                        break
+        except _CircuitOpenError:
+            raise
+        except httpx.TransportError:
+            ended = True
+        if tail.buffer and not follow:
+            return
+        if ended:
+            # copyparty closed or dropped the stream; poll again shortly from the same offset
+            await asyncio.sleep(_tail_pause(attempt_started, wait_deadline))
+
+
+async def _atail_start(path: str, start_byte: Optional[int]) -> int:
+    """Async variant of the absolute start offset lookup in tail_file."""
+    file_size = None
+    if start_byte is not None and start_byte < 0:
+        response = await _amake_request("HEAD", path)
+        file_size = int(response.headers.get("Content-Length", 0))
+    return _tail_offset(start_byte, file_size)
+
+
+@mcp.tool(name="tail_file", description="Read new data from a growing file on the copyparty server, useful for log files or files being written. Each result carries next_offset; pass it as start_byte on the next call to get only bytes written since. Set wait_seconds to long-poll until new bytes arrive, and stream_progress=true to also receive new data as progress notifications while waiting.")
+async def tail_file_async(
+    path: str,
+    start_byte: Optional[int] = None,
+    wait_seconds: float = 0,
+    max_bytes: Optional[int] = None,
+    stream_progress: bool = False,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """Async variant of tail_file; with stream_progress, follows the file for wait_seconds and pushes each chunk as a progress notification."""
+    tail = _TailRead(await _atail_start(path, start_byte), _range_budget(max_bytes))
+    follow = stream_progress and ctx is not None
+    
+    async def push(chunk: bytes):
+        await ctx.report_progress(tail.next_offset + len(chunk), None, chunk.decode('utf-8', errors='replace'))
+    
+    wait_deadline = time.monotonic() + max(wait_seconds, _TAIL_SETTLE_SECONDS)
+    await _atail_read(path, tail, wait_deadline, follow, push if follow else None)
+    return tail.result(path, start_byte)
+
+
+def _tail_lines(path: str, tail: _TailRead, arrivals: List[Tuple[int, float]]) -> List[Dict[str, Any]]:
+    """Split complete lines off tail, stamped with the time their last byte arrived.
+
+    An unterminated last line stays unread so the next call picks it up whole,
+    unless the read filled its budget without finding any line break.
+    """
+    data = bytes(tail.buffer)
+    end = data.rfind(b"\n") + 1
+    if not end and tail.full:
+        end = len(data)
+    del tail.buffer[end:]
+    lines = []
+    pos = 0
+    arrival = iter(arrivals)
+    received_upto, received_at = next(arrival, (len(data), time.time()))
+    while pos < end:
+        stop = data.find(b"\n", pos, end)
+        stop = end if stop < 0 else stop + 1
+        while received_upto < stop:
+            received_upto, received_at = next(arrival, (len(data), received_at))
+        lines.append({
+            "path": path,
+            "offset": tail.offset + pos,
+            "line": data[pos:stop].rstrip(b"\r\n").decode("utf-8", errors="replace"),
+            "received_at": received_at
+        })
+        pos = stop
+    return lines
+
+
+@mcp.tool(name="tail_files", description="Follow many growing files on the copyparty server at once, e.g. a set of log files. New lines from all files are merged into one time-ordered list labelled with their path. Pass the returned offsets back on the next call to receive only new lines. Set wait_seconds to long-poll, and stream_progress=true to receive lines as progress notifications while waiting.")
+async def tail_files_async(
+    paths: List[str],
+    offsets: Optional[Dict[str, int]] = None,
+    wait_seconds: float = 0,
+    max_bytes: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    stream_progress: bool = False,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """
+    Poll a set of files for new complete lines over a bounded pool of ?tail streams.
+    
+    Each poll round gives every file a short streamed read; at most `concurrency`
+    of them are open at once, so following hundreds of files needs neither a
+    thread nor a connection per file. Rounds repeat until a file has new lines
+    or wait_seconds runs out (with stream_progress, until wait_seconds runs out).
+    
+    Args:
+        paths: Files to follow
+        offsets: Byte position per path to resume from, as returned in the previous result's offsets
+                 (paths missing here start at their current end; negative values count from the end)
+        wait_seconds: How long to wait for new lines when none are available yet (default: 0)
+        max_bytes: Bytes returned per call across all files (default: up to COPYPARTY_MAX_DOWNLOAD_BYTES)
+        concurrency: Streaming connections open at once (default: COPYPARTY_TAIL_CONCURRENCY)
+        stream_progress: Keep following for the whole wait_seconds and push new lines as progress notifications
+        ctx: MCP context used for progress notifications
+    
+    Returns:
+        Dictionary with the merged lines, the offsets to pass on the next call, and per-file errors
+    """
+    offsets = dict(offsets or {})
+    paths = list(dict.fromkeys(paths))
+    budget = max(1, _range_budget(max_bytes) // max(1, len(paths)))
+    semaphore = asyncio.Semaphore(_concurrency(concurrency, COPYPARTY_TAIL_CONCURRENCY))
+    follow = stream_progress and ctx is not None
+    cursors: Dict[str, int] = {}
+    errors: Dict[str, str] = {}
+    lines: List[Dict[str, Any]] = []
+    
+    async def start(path: str):
+        async with semaphore:
+            try:
+                if path in offsets:
+                    cursors[path] = await _atail_start(path, offsets[path])
+                else:
+                    # Files without an offset start at their current end, like tail -f
+                    response = await _amake_request("HEAD", path)
+                    cursors[path] = int(response.headers.get("Content-Length", 0))
+            except (httpx.HTTPError, ValueError) as e:
+                errors[path] = str(e)
+    
+    async def poll(path: str) -> List[Dict[str, Any]]:
+        tail = _TailRead(cursors[path], budget)
+        arrivals: List[Tuple[int, float]] = []
+        
+        async def stamp(chunk: bytes):
+            arrivals.append((len(tail.buffer) + len(chunk), time.time()))
+        
+        async with semaphore:
+            try:
+                await _atail_read(path, tail, time.monotonic() + _TAIL_SETTLE_SECONDS, False, stamp)
+            except (httpx.HTTPError, ValueError) as e:
+                errors[path] = str(e)
+                return []
+        found = _tail_lines(path, tail, arrivals)
+        cursors[path] = tail.next_offset
+        return found
+    
+    await asyncio.gather(*(start(path) for path in paths))
+    deadline = time.monotonic() + wait_seconds
+    while True:
+        active = [path for path in paths if path not in errors]
+        rounds = await asyncio.gather(*(poll(path) for path in active))
+        found = sorted((line for batch in rounds for line in batch), key=lambda line: line["received_at"])
+        lines.extend(found)
+        if follow and found:
+            await ctx.report_progress(len(lines), None, "\n".join(f"[{line['path']}] {line['line']}" for line in found))
+        if not active or time.monotonic() >= deadline or (lines and not follow):
+            break
+        await asyncio.sleep(min(_TAIL_SETTLE_SECONDS, max(0.0, deadline - time.monotonic())))
     
+    return {
+        "success": not errors,
+        "count": len(lines),
+        "lines": lines,
+        "offsets": cursors,
+        "errors": errors
+    }
+
+
+def _thumbnail_result(path: str, format: Optional[str], meta: Dict[str, Any], data: bytes) -> Dict[str, Any]:
+    """Build the get_thumbnail result from a (possibly cached) body."""
     return {
         "success": True,
         "path": path,
-        "start_byte": start_byte,
-        "content": response.text,
-        "size": len(response.content),
-        "note": "This is a snapshot. For continuous streaming, call again or use WebSocket"
+        "format": format or "thumbnail",
+        "content": _b64encode(data),
+        "encoding": "base64",
+        "size": len(data),
+        "content_type": meta.get("content_type") or "image/jpeg"
     }
 
 
-@mcp.tool(description="Get a thumbnail for an image/video or transcode audio file on the copyparty server.")
 def get_thumbnail(path: str, format: Optional[str] = None) -> Dict[str, Any]:
     """
     Get a thumbnail for media files or transcode audio.
@@ -519,26 +4345,90 @@ def get_thumbnail(path: str, format: Optional[str] = None) -> Dict[str, Any]:
     Returns:
         Dictionary with thumbnail/transcoded content as base64
     """
-    params = {}
-    if format:
-        params["th"] = format
-    else:
-        params["th"] = ""
+    meta, data = _cached_get(f"th:{format or ''}", path, {"th": format or ""}, _thumbnail_cache)
+    return _thumbnail_result(path, format, meta, data)
+
+
+async def _aget_thumbnail(path: str, format: Optional[str]) -> Dict[str, Any]:
+    """Fetch one thumbnail; shared by get_thumbnail and get_thumbnails, since a tool cannot call another tool."""
+    meta, data = await _acached_get(f"th:{format or ''}", path, {"th": format or ""}, _thumbnail_cache)
+    return await _aencoded(len(data), _thumbnail_result, path, format, meta, data)
+
+
+@mcp.tool(name="get_thumbnail", description="Get a thumbnail for an image/video or transcode audio file on the copyparty server.")
+async def get_thumbnail_async(path: str, format: Optional[str] = None) -> Dict[str, Any]:
+    """Async variant of get_thumbnail."""
+    return await _aget_thumbnail(path, format)
+
+
+@mcp.tool(name="get_thumbnails", description="Get thumbnails for many images/videos (or transcode many audio files) on the copyparty server in one call. Fetches run concurrently; each completion (path, success and size) is streamed as a progress notification, and failures are reported per path.")
+async def get_thumbnails_async(
+    paths: List[str],
+    format: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """
+    Fetch thumbnails for paths with a bounded pool of concurrent requests.
     
-    response = _make_request("GET", path, params=params)
+    Args:
+        paths: Paths to the media files
+        format: Format for audio transcoding: 'opus', 'caf', or None for image/video thumbnails
+        concurrency: Thumbnails fetched at once (default: COPYPARTY_THUMB_CONCURRENCY)
+        ctx: MCP context used to report each completed path as a progress notification
+    
+    Returns:
+        Dictionary with per-path results in input order and the number of failures
+    """
+    paths = list(dict.fromkeys(paths))
+    semaphore = asyncio.Semaphore(_concurrency(concurrency, COPYPARTY_THUMB_CONCURRENCY))
+    results: Dict[str, Dict[str, Any]] = {}
+    
+    # Warm the listing cache once per directory so the cache keys below don't
+    # each trigger their own ?ls of the same folder
+    async def warm(dir_path: str, dots: bool):
+        async with semaphore:
+            with contextlib.suppress(httpx.HTTPError, ValueError):
+                await _aget_listing_entry(dir_path, dots, False)
+    
+    if _content_cache.enabled or _thumbnail_cache.enabled:
+        dirs = {_metadata_location(path)[::2] for path in paths}
+        await asyncio.gather(*(warm(dir_path, dots) for dir_path, dots in dirs))
     
+    async def fetch(path: str):
+        async with semaphore:
+            try:
+                result = await _aget_thumbnail(path, format)
+            except (httpx.HTTPError, ValueError) as e:
+                result = {"success": False, "path": path, "error": str(e)}
+        results[path] = result
+        if ctx is not None:
+            # Only a summary: the thumbnail itself is in the final result, and
+            # repeating its base64 here would send every image twice
+            await ctx.report_progress(len(results), len(paths), json.dumps(
+                {"path": path, "success": result["success"], "size": result.get("size")}))
+    
+    await asyncio.gather(*(fetch(path) for path in paths))
+    failed = sum(1 for result in results.values() if not result["success"])
+    return {
+        "success": not failed,
+        "count": len(paths),
+        "failed": failed,
+        "results": [results[path] for path in paths]
+    }
+
+
+def _text_result(path: str, charset: str, meta: Dict[str, Any], data: bytes) -> Dict[str, Any]:
+    """Build the download_file_as_text result from a (possibly cached) body."""
     return {
         "success": True,
         "path": path,
-        "format": format or "thumbnail",
-        "content": base64.b64encode(response.content).decode('utf-8'),
-        "encoding": "base64",
-        "size": len(response.content),
-        "content_type": response.headers.get("Content-Type", "image/jpeg")
+        "charset": charset,
+        "content": data.decode(meta.get("encoding") or "utf-8", errors="replace"),
+        "size": len(data)
     }
 
 
-@mcp.tool(description="Download a file as text with specific character encoding from the copyparty server.")
 def download_file_as_text(path: str, charset: str = "utf-8") -> Dict[str, Any]:
     """
     Get file content as text with specific character encoding.
@@ -556,18 +4446,18 @@ def download_file_as_text(path: str, charset: str = "utf-8") -> Dict[str, Any]:
     else:
         params["txt"] = ""
     
-    response = _make_request("GET", path, params=params)
-    
-    return {
-        "success": True,
-        "path": path,
-        "charset": charset,
-        "content": response.text,
-        "size": len(response.content)
-    }
+    meta, data = _cached_get(f"txt:{charset}", path, params)
+    return _text_result(path, charset, meta, data)
+
+
+@mcp.tool(name="download_file_as_text", description="Download a file as text with specific character encoding from the copyparty server.")
+async def download_file_as_text_async(path: str, charset: str = "utf-8") -> Dict[str, Any]:
+    """Async variant of download_file_as_text."""
+    params = {"txt": charset if charset != "utf-8" else ""}
+    meta, data = await _acached_get(f"txt:{charset}", path, params)
+    return _text_result(path, charset, meta, data)
 
 
-@mcp.tool(description="Render a markdown file as HTML or open media files in the viewer on the copyparty server.")
 def render_markdown(path: str) -> Dict[str, Any]:
     """
     Render a markdown file or open media in viewer.
@@ -589,7 +4479,19 @@ def render_markdown(path: str) -> Dict[str, Any]:
     }
 
 
-@mcp.tool(description="Delete multiple files or folders at once on the copyparty server using a single request.")
+@mcp.tool(name="render_markdown", description="Render a markdown file as HTML or open media files in the viewer on the copyparty server.")
+async def render_markdown_async(path: str) -> Dict[str, Any]:
+    """Async variant of render_markdown."""
+    response = await _amake_request("GET", path, params={"v": ""})
+    
+    return {
+        "success": True,
+        "path": path,
+        "content": response.text,
+        "content_type": response.headers.get("Content-Type", "text/html")
+    }
+
+
 def delete_multiple_files(paths: List[str]) -> Dict[str, Any]:
     """
     Delete multiple files or folders in a single operation.
@@ -601,6 +4503,25 @@ def delete_multiple_files(paths: List[str]) -> Dict[str, Any]:
         Dictionary with deletion results
     """
     response = _make_request("POST", "/", params={"delete": ""}, json=paths)
+    _invalidate_listings(*paths)
+    _forget_content(*paths)
+    _directory_cache.forget(*paths)
+    
+    return {
+        "success": True,
+        "deleted_paths": paths,
+        "count": len(paths),
+        "message": f"Successfully deleted {len(paths)} items"
+    }
+
+
+@mcp.tool(name="delete_multiple_files", description="Delete multiple files or folders at once on the copyparty server using a single request.")
+async def delete_multiple_files_async(paths: List[str]) -> Dict[str, Any]:
+    """Async variant of delete_multiple_files."""
+    await _amake_request("POST", "/", params={"delete": ""}, json=paths)
+    _invalidate_listings(*paths)
+    _forget_content(*paths)
+    _directory_cache.forget(*paths)
     
     return {
         "success": True,
@@ -610,7 +4531,6 @@ def delete_multiple_files(paths: List[str]) -> Dict[str, Any]:
     }
 
 
-@mcp.tool(description="Show active downloads on the copyparty server (admin only). Useful for monitoring server activity.")
 def get_active_downloads() -> Dict[str, Any]:
     """
     Get list of active downloads (requires admin permissions).
@@ -619,17 +4539,26 @@ def get_active_downloads() -> Dict[str, Any]:
         Dictionary with active download information
     """
     response = _make_request("GET", "/", params={"dls": ""})
-    
-    try:
-        return response.json()
-    except (ValueError, json.JSONDecodeError):
-        return {
-            "success": True,
-            "downloads": response.text
-        }
+    return _json_or_text(response, "downloads")
+
+
+@mcp.tool(name="get_active_downloads", description="Show active downloads on the copyparty server (admin only). Useful for monitoring server activity.")
+async def get_active_downloads_async() -> Dict[str, Any]:
+    """Async variant of get_active_downloads."""
+    response = await _amake_request("GET", "/", params={"dls": ""})
+    return _json_or_text(response, "downloads")
+
+
+def _recent_uploads_params(filter_path: Optional[str], as_json: bool) -> Dict[str, str]:
+    """Build the query parameters for ?ru."""
+    params = {"ru": ""}
+    if filter_path:
+        params["filter"] = filter_path
+    if as_json:
+        params["j"] = ""
+    return params
 
 
-@mcp.tool(description="Show all recent uploads on the copyparty server (admin only), optionally filtered by path pattern.")
 def get_all_recent_uploads(filter_path: Optional[str] = None, as_json: bool = False) -> Dict[str, Any]:
     """
     Get all recent uploads from all users (requires admin permissions).
@@ -641,24 +4570,41 @@ def get_all_recent_uploads(filter_path: Optional[str] = None, as_json: bool = Fa
     Returns:
         Dictionary with recent upload information
     """
-    params = {"ru": ""}
-    if filter_path:
-        params["filter"] = filter_path
-    if as_json:
-        params["j"] = ""
-    
-    response = _make_request("GET", "/", params=params)
-    
-    try:
-        return response.json()
-    except (ValueError, json.JSONDecodeError):
-        return {
-            "success": True,
-            "uploads": response.text
-        }
+    response = _make_request("GET", "/", params=_recent_uploads_params(filter_path, as_json))
+    return _json_or_text(response, "uploads")
+
+
+@mcp.tool(name="get_all_recent_uploads", description="Show all recent uploads on the copyparty server (admin only), optionally filtered by path pattern.")
+async def get_all_recent_uploads_async(filter_path: Optional[str] = None, as_json: bool = False) -> Dict[str, Any]:
+    """Async variant of get_all_recent_uploads."""
+    response = await _amake_request("GET", "/", params=_recent_uploads_params(filter_path, as_json))
+    return _json_or_text(response, "uploads")
+
+
+def _server_info(copyparty_status: str, copyparty_accessible: bool) -> Dict[str, Any]:
+    """Build the get_server_info result."""
+    return {
+        "mcp_server_name": "copyparty MCP Server",
+        "version": "1.0.0",
+        "environment": os.environ.get("ENVIRONMENT", "development"),
+        "python_version": sys.version.split()[0],
+        "copyparty_url": COPYPARTY_URL,
+        "copyparty_status": copyparty_status,
+        "copyparty_accessible": copyparty_accessible,
+        "authentication_configured": bool(COPYPARTY_PASSWORD),
+        "connection_pool": _get_pool_info(),
+        "circuit_breakers": {name: breaker.info() for name, breaker in list(_breakers.items())},
+        "request_coalescing": _single_flight.info(),
+        "tracing": _trace_exporter.info(),
+        "worker": _worker_info(),
+        "listing_cache": _listing_cache.info(),
+        "search_cache": _search_cache.info(),
+        "directory_cache": _directory_cache.info(),
+        "content_cache": _content_cache.info(),
+        "thumbnail_cache": _thumbnail_cache.info()
+    }
 
 
-@mcp.tool(description="Get information about the copyparty MCP server configuration including the copyparty URL and connection status.")
 def get_server_info() -> Dict[str, Any]:
     """
     Get information about the MCP server and copyparty connection.
@@ -668,23 +4614,33 @@ def get_server_info() -> Dict[str, Any]:
     """
     # Try to check if copyparty server is accessible
     try:
-        response = requests.get(COPYPARTY_URL, timeout=5)
+        response = _get_session().get(COPYPARTY_URL, timeout=5)
         copyparty_status = "connected"
         copyparty_accessible = True
     except Exception as e:
         copyparty_status = f"error: {str(e)}"
         copyparty_accessible = False
     
-    return {
-        "mcp_server_name": "copyparty MCP Server",
-        "version": "1.0.0",
-        "environment": os.environ.get("ENVIRONMENT", "development"),
-        "python_version": sys.version.split()[0],
-        "copyparty_url": COPYPARTY_URL,
-        "copyparty_status": copyparty_status,
-        "copyparty_accessible": copyparty_accessible,
-        "authentication_configured": bool(COPYPARTY_PASSWORD)
-    }
+    return _server_info(copyparty_status, copyparty_accessible)
+
+
+@mcp.tool(name="get_server_info", description="Get information about the copyparty MCP server configuration including the copyparty URL and connection status.")
+async def get_server_info_async() -> Dict[str, Any]:
+    """Async variant of get_server_info."""
+    try:
+        await _get_async_client().get(COPYPARTY_URL, timeout=5)
+        copyparty_status = "connected"
+        copyparty_accessible = True
+    except Exception as e:
+        copyparty_status = f"error: {str(e)}"
+        copyparty_accessible = False
+    
+    return _server_info(copyparty_status, copyparty_accessible)
+
+
+def create_app():
+    """ASGI app for one worker process; uvicorn calls this in each worker."""
+    return mcp.http_app(stateless_http=True)
 
 
 if __name__ == "__main__":
@@ -698,9 +4654,25 @@ if __name__ == "__main__":
     else:
         print("Authentication: Not configured (using anonymous access)")
     
-    mcp.run(
-        transport="http",
-        host=host,
-        port=port,
-        stateless_http=True
-    )
+    if COPYPARTY_WORKERS > 1:
+        import uvicorn
+
+        # The transport is stateless, so any worker can serve any request. The
+        # supervisor replaces workers that die and restarts them all on SIGHUP
+        print(f"Workers: {COPYPARTY_WORKERS}")
+        uvicorn.run(
+            "server:create_app",
+            factory=True,
+            app_dir=os.path.dirname(os.path.abspath(__file__)),
+            host=host,
+            port=port,
+            workers=COPYPARTY_WORKERS,
+            timeout_graceful_shutdown=COPYPARTY_GRACEFUL_TIMEOUT,
+        )
+    else:
+        mcp.run(
+            transport="http",
+            host=host,
+            port=port,
+            stateless_http=True
+        )
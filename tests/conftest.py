@@ -0,0 +1,64 @@
+"""
+Shared fixtures for the test suite.
+
+One in-memory fake copyparty (bench/fake_copyparty.py) serves the whole
+session. It is started before server is imported, because server reads
+COPYPARTY_URL and the cache settings at import time.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import fake_copyparty  # noqa: E402
+
+_httpd, _fs = fake_copyparty.start()
+os.environ["COPYPARTY_URL"] = f"http://127.0.0.1:{_httpd.server_port}"
+os.environ["COPYPARTY_SPOOL_DIR"] = tempfile.mkdtemp(prefix="mcp-copyparty-tests-")
+
+import server  # noqa: E402
+
+
+class _ToolFunctions:
+    """Attribute access to server's functions, with tools unwrapped.
+
+    @mcp.tool replaces each tool function with a FastMCP tool object, which is
+    not callable; the function it wraps is its fn.
+    """
+
+    def __getattr__(self, name):
+        value = getattr(server, name)
+        return getattr(value, "fn", value)
+
+
+@pytest.fixture
+def tools():
+    """server's tool functions, callable directly."""
+    return _ToolFunctions()
+
+
+@pytest.fixture
+def fs():
+    """The fake copyparty's tree, emptied, with the server's caches and breakers reset."""
+    with _fs.lock:
+        _fs.files.clear()
+        _fs.mtimes.clear()
+        _fs.dirs.clear()
+        _fs.dirs.add("/")
+        _fs.up2k.clear()
+        _fs.requests.clear()
+        _fs.version += 1
+    _fs.fail_status = None
+    _fs.delay = 0
+    server._invalidate_listings("/")
+    server._forget_content("/")
+    server._directory_cache.forget("/")
+    server._breakers.clear()
+    yield _fs
+    _fs.fail_status = None
+    _fs.delay = 0
@@ -0,0 +1,38 @@
+"""move_files / copy_files: dependency ordering between pairs and per-pair results."""
+import asyncio
+
+import server
+
+
+def test_waves_put_parent_destinations_first():
+    pairs = [("/a/f", "/dst/sub/f"), ("/src", "/dst/sub"), ("/x", "/dst")]
+    assert server._transfer_waves(pairs, "copy") == [[2], [1], [0]]
+
+
+def test_waves_move_children_out_before_their_parent():
+    pairs = [("/a", "/b"), ("/a/x.txt", "/c/x.txt")]
+    assert server._transfer_waves(pairs, "move") == [[1], [0]]
+    # Copies leave the source in place, so there is nothing to wait for
+    assert server._transfer_waves(pairs, "copy") == [[0, 1]]
+
+
+def test_move_runs_in_dependency_order(fs, tools):
+    fs.write("/a/x.txt", b"x")
+    fs.write("/a/y.txt", b"y")
+    result = asyncio.run(tools.move_files_async([("/a", "/b"), ("/a/x.txt", "/c/x.txt")]))
+    assert result["success"] and result["succeeded"] == 2
+    assert fs.files == {"/b/y.txt": b"y", "/c/x.txt": b"x"}
+
+
+def test_results_keep_input_order_and_report_failures(fs, monkeypatch, tools):
+    monkeypatch.setattr(server, "COPYPARTY_RETRIES", 0)
+    fs.write("/a/x.txt", b"x")
+    pairs = [("/a/x.txt", "/c/x.txt"), ("/a/x.txt", "/d/x.txt")]
+    result = asyncio.run(tools.copy_files_async(pairs, concurrency=1))
+    assert [(r["source"], r["destination"]) for r in result["results"]] == pairs
+    assert result["success"] and fs.files["/d/x.txt"] == b"x"
+
+    fs.fail_status = 503
+    result = asyncio.run(tools.copy_files_async(pairs))
+    assert result["failed"] == 2 and not result["success"]
+    assert all("503" in r["error"] for r in result["results"])
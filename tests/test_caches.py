@@ -0,0 +1,103 @@
+"""Listing and search caches: hits, and invalidation by writes made through the server."""
+import asyncio
+import time
+
+import server
+
+
+def list_names(tools, path):
+    return {f["href"] for f in asyncio.run(tools.list_files_async(path))["files"]}
+
+
+def search(tools, query, path):
+    return asyncio.run(tools.search_files_async(query, path))
+
+
+def test_listing_is_cached_until_a_write_through_the_server(fs, tools):
+    fs.write("/docs/a.txt", b"a")
+    assert list_names(tools, "/docs/") == {"a.txt"}
+
+    # Written behind the server's back: the cached listing is still served
+    fs.write("/docs/b.txt", b"b")
+    assert list_names(tools, "/docs/") == {"a.txt"}
+
+    asyncio.run(tools.upload_file_async("/docs/", "c", "c.txt"))
+    assert list_names(tools, "/docs/") == {"a.txt", "b.txt", "c.txt"}
+
+
+def test_expired_listing_is_revalidated(fs, tools, monkeypatch):
+    monkeypatch.setattr(server, "COPYPARTY_LS_CACHE_TTL", 0.05)
+    fs.write("/docs/a.txt", b"a")
+    first = asyncio.run(tools.list_files_async("/docs/"))
+    revalidated = server._listing_cache.info()["revalidated"]
+
+    # Unchanged: the fake's ETag still matches, so copyparty answers 304
+    time.sleep(0.1)
+    assert asyncio.run(tools.list_files_async("/docs/")) is first
+    assert server._listing_cache.info()["revalidated"] == revalidated + 1
+    assert asyncio.run(tools.get_file_metadata_async("/docs/a.txt"))["size"] == 1
+
+    # Changed: a new listing replaces the stale one
+    fs.write("/docs/b.txt", b"b")
+    time.sleep(0.1)
+    assert list_names(tools, "/docs/") == {"a.txt", "b.txt"}
+    assert server._listing_cache.info()["revalidated"] == revalidated + 1
+
+
+def test_delete_invalidates_parent_and_children(fs, tools):
+    fs.write("/docs/sub/a.txt", b"a")
+    fs.write("/docs/keep.txt", b"k")
+    assert list_names(tools, "/docs/sub/") == {"a.txt"}
+    assert {d["href"] for d in asyncio.run(tools.list_files_async("/docs/"))["dirs"]} == {"sub/"}
+
+    asyncio.run(tools.delete_file_async("/docs/sub"))
+    assert asyncio.run(tools.list_files_async("/docs/"))["dirs"] == []
+    assert list_names(tools, "/docs/") == {"keep.txt"}
+
+
+def test_search_is_cached_per_scope(fs, tools):
+    fs.write("/docs/report.txt", b"r")
+    assert not search(tools, "report", "/docs")["cached"]
+    fs.write("/docs/report2.txt", b"r")
+    result = search(tools, "report", "/docs")
+    assert result["cached"] and result["total"] == 1
+
+
+def test_write_below_scope_invalidates_search(fs, tools):
+    fs.write("/docs/report.txt", b"r")
+    assert search(tools, "report", "/docs")["total"] == 1
+
+    asyncio.run(tools.upload_file_async("/docs/sub/", "r", "report2.txt"))
+    result = search(tools, "report", "/docs")
+    assert not result["cached"] and result["total"] == 2
+
+
+def test_write_above_scope_invalidates_search(fs, tools):
+    fs.write("/docs/sub/report.txt", b"r")
+    assert search(tools, "report", "/docs/sub")["total"] == 1
+
+    asyncio.run(tools.delete_file_async("/docs"))
+    result = search(tools, "report", "/docs/sub")
+    assert not result["cached"] and result["total"] == 0
+
+
+def test_metadata_lookups_share_the_parent_listing(fs, tools):
+    fs.write("/music/a.mp3", b"a")
+    fs.write("/music/b.mp3", b"bb")
+    assert asyncio.run(tools.get_file_metadata_async("/music/a.mp3"))["size"] == 1
+    assert server.get_file_metadata("/music/b.mp3")["tags"]["title"] == "b.mp3"
+    missing = asyncio.run(tools.get_file_metadata_async("/music/c.mp3"))
+    assert not missing["success"]
+    assert len([r for r in fs.requests if "ls" in r[2]]) == 1
+
+
+def test_batch_metadata_fetches_each_folder_once(fs, tools):
+    fs.write("/a/1.txt", b"1")
+    fs.write("/a/2.txt", b"22")
+    fs.write("/b/3.txt", b"333")
+    paths = ["/b/3.txt", "/a/2.txt", "/nowhere/x.txt", "/a/1.txt"]
+    result = asyncio.run(tools.get_files_metadata_async(paths))
+    assert [r["path"] for r in result["results"]] == paths
+    assert [r.get("size") for r in result["results"]] == [3, 2, None, 1]
+    assert not result["success"] and "404" in result["results"][2]["error"]
+    assert sorted(r[1] for r in fs.requests if "ls" in r[2]) == ["/a", "/b", "/nowhere"]
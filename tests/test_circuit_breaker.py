@@ -0,0 +1,84 @@
+"""Circuit breaker state transitions, on their own and against a failing copyparty."""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import server
+
+
+@pytest.fixture
+def breaker_settings(monkeypatch):
+    monkeypatch.setattr(server, "COPYPARTY_BREAKER_THRESHOLD", 2)
+    monkeypatch.setattr(server, "COPYPARTY_BREAKER_COOLDOWN", 0.2)
+    monkeypatch.setattr(server, "COPYPARTY_RETRIES", 0)
+
+
+def state(breaker):
+    return breaker.info()["state"]
+
+
+def test_opens_after_threshold_and_closes_on_trial_success(breaker_settings):
+    breaker = server._CircuitBreaker("http://test/")
+    assert breaker.check() is False
+    breaker.failure()
+    assert state(breaker) == "closed"
+    breaker.failure()
+    assert state(breaker) == "open"
+    with pytest.raises(server._CircuitOpenError):
+        breaker.check()
+
+    time.sleep(0.25)
+    assert state(breaker) == "half-open"
+    assert breaker.check() is True
+    # Only one trial at a time
+    with pytest.raises(server._CircuitOpenError):
+        breaker.check()
+    breaker.success()
+    breaker.release(True)
+    assert state(breaker) == "closed"
+    assert breaker.info()["opened"] == 1
+    assert breaker.info()["rejected"] == 2
+
+
+def test_unresolved_trial_reopens(breaker_settings):
+    breaker = server._CircuitBreaker("http://test/")
+    breaker.failure()
+    breaker.failure()
+    time.sleep(0.25)
+    assert breaker.check() is True
+    # The trial ended without success or failure, e.g. a read timeout or a cancelled call
+    breaker.release(True)
+    assert state(breaker) == "open"
+    assert breaker.info()["opened"] == 2
+    with pytest.raises(server._CircuitOpenError):
+        breaker.check()
+
+
+def test_failing_server_trips_and_recovers(fs, breaker_settings, tools):
+    fs.write("/docs/a.txt", b"a")
+    fs.fail_status = 503
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(tools.list_files_async("/docs/"))
+    with pytest.raises(server._CircuitOpenError):
+        asyncio.run(tools.list_files_async("/docs/"))
+
+    fs.fail_status = None
+    time.sleep(0.25)
+    assert asyncio.run(tools.list_files_async("/docs/"))["files"][0]["href"] == "a.txt"
+    breaker = server._get_breaker(server.COPYPARTY_URL)
+    assert state(breaker) == "closed"
+
+
+def test_open_breaker_is_a_per_directory_walk_error(fs, breaker_settings, tools):
+    fs.populate(3, 2, 16, root="/tree")
+    fs.fail_status = 503
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(tools.list_files_async("/tree/"))
+
+    result = asyncio.run(asyncio.wait_for(tools.walk_files_async("/tree"), 5))
+    assert not result["success"]
+    assert "circuit breaker open" in result["errors"][0]["error"]
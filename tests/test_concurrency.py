@@ -0,0 +1,25 @@
+"""Batch tools: concurrency below 1 is refused before any request is made."""
+import asyncio
+
+import pytest
+
+CALLS = {
+    "walk_files_async": lambda tools, n: tools.walk_files_async("/docs", concurrency=n),
+    "move_files_async": lambda tools, n: tools.move_files_async([("/docs/a.txt", "/b.txt")], concurrency=n),
+    "copy_files_async": lambda tools, n: tools.copy_files_async([("/docs/a.txt", "/b.txt")], concurrency=n),
+    "upload_files_async": lambda tools, n: tools.upload_files_async("/up", [{"name": "a.txt", "content": "a"}], concurrency=n),
+    "create_directories_async": lambda tools, n: tools.create_directories_async(["/new/dir"], concurrency=n),
+    "get_thumbnails_async": lambda tools, n: tools.get_thumbnails_async(["/docs/a.txt"], concurrency=n),
+    "tail_files_async": lambda tools, n: tools.tail_files_async(["/docs/a.txt"], concurrency=n),
+    "download_file_parallel_async": lambda tools, n: tools.download_file_parallel_async("/docs/a.txt", concurrency=n),
+}
+
+
+@pytest.mark.parametrize("concurrency", [0, -1])
+@pytest.mark.parametrize("tool", sorted(CALLS))
+def test_concurrency_below_one_is_refused(fs, tools, tool, concurrency):
+    fs.write("/docs/a.txt", b"a")
+    with pytest.raises(ValueError, match="must be 1 or more"):
+        asyncio.run(asyncio.wait_for(CALLS[tool](tools, concurrency), 5))
+    assert fs.files == {"/docs/a.txt": b"a"}
+    assert fs.dirs == {"/", "/docs"}
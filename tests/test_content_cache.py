@@ -0,0 +1,103 @@
+"""Content and thumbnail caches: hits, and purges on writes made through the server."""
+import asyncio
+
+import server
+
+
+def read_text(tools, path):
+    return asyncio.run(tools.download_file_as_text_async(path))["content"]
+
+
+def rewrite(fs, path, data):
+    """Change path behind the server's back, keeping its listed size and mtime."""
+    mtime = fs.mtimes[path]
+    fs.write(path, data)
+    fs.mtimes[path] = mtime
+
+
+def test_download_is_served_from_cache(fs, tools):
+    fs.write("/docs/a.bin", bytes(range(256)))
+    assert "cached" not in asyncio.run(tools.download_file_async("/docs/a.bin", as_base64=True))
+    page = asyncio.run(tools.download_file_async("/docs/a.bin", as_base64=True, offset=16, length=32))
+    assert page["cached"] and page["size"] == 32 and page["next_offset"] == 48
+
+
+def test_unchanged_listing_keeps_serving_cached_body(fs, tools):
+    fs.write("/docs/a.txt", b"old1")
+    assert read_text(tools, "/docs/a.txt") == "old1"
+    # Same size and mtime, and no write through the server: nothing says it changed
+    rewrite(fs, "/docs/a.txt", b"new1")
+    server._invalidate_listings("/docs")
+    assert read_text(tools, "/docs/a.txt") == "old1"
+
+
+def test_replace_upload_purges_same_size_rewrite(fs, tools):
+    fs.write("/docs/a.txt", b"old1")
+    mtime = fs.mtimes["/docs/a.txt"]
+    assert read_text(tools, "/docs/a.txt") == "old1"
+    asyncio.run(tools.upload_file_async("/docs/", "new1", "a.txt", replace=True))
+    # As if the upload landed within the same second as the original
+    fs.mtimes["/docs/a.txt"] = mtime
+    assert read_text(tools, "/docs/a.txt") == "new1"
+
+
+def test_copy_and_move_purge_destination_and_source(fs, tools):
+    fs.write("/docs/src.txt", b"new2")
+    fs.write("/docs/dst.txt", b"old2")
+    mtime = fs.mtimes["/docs/dst.txt"]
+    assert read_text(tools, "/docs/dst.txt") == "old2"
+    asyncio.run(tools.copy_file_async("/docs/src.txt", "/docs/dst.txt"))
+    fs.mtimes["/docs/dst.txt"] = mtime
+    assert read_text(tools, "/docs/dst.txt") == "new2"
+
+    assert read_text(tools, "/docs/src.txt") == "new2"
+    asyncio.run(tools.move_file_async("/docs/src.txt", "/docs/moved.txt"))
+    fs.write("/docs/src.txt", b"new3")
+    assert read_text(tools, "/docs/src.txt") == "new3"
+
+
+def test_thumbnails_cached_and_purged_with_their_folder(fs, tools):
+    fs.write("/img/a.jpg", b"a")
+    asyncio.run(tools.get_thumbnail_async("/img/a.jpg"))
+    hits = server._thumbnail_cache.info()["hits"]
+    asyncio.run(tools.get_thumbnail_async("/img/a.jpg"))
+    assert server._thumbnail_cache.info()["hits"] == hits + 1
+    assert server._thumbnail_cache.info()["entries"] == 1
+
+    asyncio.run(tools.delete_file_async("/img"))
+    assert server._thumbnail_cache.info()["entries"] == 0
+
+
+def test_body_fetched_before_a_write_is_not_stored_after_it(fs):
+    generation = server._content_generation
+    server._forget_content("/docs/a.txt")
+    entries = server._content_cache.info()["entries"]
+    server._content_cache.put("k" * 64, "/docs/a.txt", {}, b"stale", generation)
+    server._thumbnail_cache.put("k" * 64, "/docs/a.txt", {}, b"stale", generation)
+    assert server._content_cache.info()["entries"] == entries
+    assert server._thumbnail_cache.info()["entries"] == 0
+
+
+def test_restarted_cache_can_still_purge(fs, tools):
+    fs.write("/docs/a.txt", b"a")
+    fs.write("/keep/b.txt", b"b")
+    read_text(tools, "/docs/a.txt")
+    read_text(tools, "/keep/b.txt")
+    # A new process indexes the entries it finds, with the paths from their headers
+    restarted = server._ContentCache(server._content_cache.directory, server._content_cache.max_bytes)
+    restarted.purge(["/docs"])
+    assert restarted.info()["entries"] == 1
+    assert list(restarted._paths.values()) == ["/keep/b.txt"]
+
+
+def test_workers_split_directory_and_budget(tmp_path):
+    caches = [server._ContentCache(str(tmp_path), 1000, workers=2) for _ in range(3)]
+    for cache in caches:
+        cache.read("missing")
+    assert [c.directory for c in caches[:2]] == [str(tmp_path / "worker-0"), str(tmp_path / "worker-1")]
+    assert [c.max_bytes for c in caches] == [500, 500, 0]
+    # A worker that goes away frees its slot (and its entries) for the next one
+    caches[0]._slot_lock.close()
+    replacement = server._ContentCache(str(tmp_path), 1000, workers=2)
+    replacement.read("missing")
+    assert replacement.directory == str(tmp_path / "worker-0")
@@ -0,0 +1,57 @@
+"""create_directory(recursive=True) and create_directories: mkdir -p with existence caching."""
+import asyncio
+
+import pytest
+
+import server
+
+
+def mkdirs(fs):
+    """Parent directory of every act=mkdir request the fake received."""
+    return [r[1] for r in fs.requests if r[0] == "POST"]
+
+
+@pytest.mark.parametrize("variant", ["sync", "async"])
+def test_recursive_creates_missing_parents_only(fs, tools, variant):
+    fs.mkdir("/2024")
+    if variant == "sync":
+        result = server.create_directory("/", "2024/06/01", recursive=True)
+    else:
+        result = asyncio.run(tools.create_directory_async("/", "2024/06/01", recursive=True))
+    assert result["success"]
+    assert result["created"] == ["/2024/06", "/2024/06/01"]
+    assert {"/2024/06", "/2024/06/01"} <= fs.dirs
+    assert mkdirs(fs) == ["/2024", "/2024/06"]
+
+
+def test_existing_directories_are_remembered(fs, tools):
+    asyncio.run(tools.create_directory_async("/", "a/b/c", recursive=True))
+    fs.requests.clear()
+
+    result = asyncio.run(tools.create_directory_async("/a/b", "c", recursive=True))
+    assert result["success"] and result["created"] == []
+    assert fs.requests == []
+
+    # Deleting through the server forgets the subtree
+    asyncio.run(tools.delete_file_async("/a/b"))
+    fs.requests.clear()
+    result = asyncio.run(tools.create_directory_async("/", "a/b/c", recursive=True))
+    assert result["created"] == ["/a/b", "/a/b/c"]
+
+
+def test_create_directories_shares_parents(fs, tools):
+    paths = ["/site/css", "/site/js", "/site/img/icons", "/other"]
+    result = asyncio.run(tools.create_directories_async(paths))
+    assert result["success"] and result["errors"] == {}
+    assert result["created"] == ["/other", "/site", "/site/css", "/site/img", "/site/img/icons", "/site/js"]
+    # Each directory is made once, however many paths need it
+    assert sorted(mkdirs(fs)) == ["/", "/", "/site", "/site", "/site", "/site/img"]
+
+
+def test_unavailable_parent_is_reported_for_its_children(fs, tools, monkeypatch):
+    monkeypatch.setattr(server, "COPYPARTY_RETRIES", 0)
+    fs.fail_status = 500
+    result = asyncio.run(tools.create_directories_async(["/x/y"]))
+    assert not result["success"]
+    assert set(result["errors"]) == {"/", "/x", "/x/y"}
+    assert result["errors"]["/x/y"] == "Parent directory /x is unavailable"
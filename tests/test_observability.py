@@ -0,0 +1,104 @@
+"""Metrics, tracing spans and the /health and /metrics routes."""
+import asyncio
+import json
+
+import httpx
+from fastmcp import Client
+
+import server
+
+
+def call_tool(name, arguments):
+    """Call a tool through the MCP layer, so its middleware runs."""
+    async def call():
+        async with Client(server.mcp) as client:
+            return await client.call_tool(name, arguments, raise_on_error=False)
+    return asyncio.run(call())
+
+
+def get_route(path):
+    async def get():
+        transport = httpx.ASGITransport(app=server.create_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://mcp") as client:
+            return await client.get(path)
+    return asyncio.run(get())
+
+
+def sample(text, line_start):
+    """Value of the first sample in text whose line starts with line_start."""
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_tool_calls_and_upstream_requests_are_counted(fs):
+    fs.write("/docs/a.txt", b"a")
+    before = server._render_metrics()
+    call_tool("list_files", {"path": "/docs/"})
+    call_tool("get_file_metadata", {"path": "/missing/a.txt"})
+    after = server._render_metrics()
+
+    ok = 'copyparty_mcp_tool_calls_total{tool="list_files",outcome="ok"}'
+    failed = 'copyparty_mcp_tool_calls_total{tool="get_file_metadata",outcome="error"}'
+    listed = 'copyparty_mcp_upstream_requests_total{method="GET",verb="ls",status="200"}'
+    assert sample(after, ok) == sample(before, ok) + 1
+    assert sample(after, failed) == sample(before, failed) + 1
+    assert sample(after, listed) == sample(before, listed) + 1
+    histogram = 'copyparty_mcp_tool_duration_seconds_bucket{tool="list_files",le="+Inf"}'
+    assert sample(after, histogram) == sample(before, histogram) + 1
+
+
+def test_metric_labels_are_escaped():
+    assert server._metric_labels(("path",), ('a"b\\c\nd',)) == '{path="a\\"b\\\\c\\nd"}'
+
+
+def test_metrics_and_health_routes(fs):
+    response = get_route("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'copyparty_mcp_cache_hits_total{cache="listing"}' in response.text
+
+    health = get_route("/health").json()
+    assert health["status"] == "ok" and health["workers"] == server.COPYPARTY_WORKERS
+
+
+def test_open_breaker_reports_degraded(fs, monkeypatch):
+    monkeypatch.setattr(server, "COPYPARTY_RETRIES", 0)
+    monkeypatch.setattr(server, "COPYPARTY_BREAKER_THRESHOLD", 1)
+    fs.fail_status = 503
+    call_tool("list_files", {"path": "/docs/"})
+    health = get_route("/health").json()
+    assert health["status"] == "degraded" and health["open_circuit_breakers"]
+
+
+def test_spans_nest_under_the_tool_call(fs, tools, monkeypatch):
+    spans = []
+    monkeypatch.setattr(server._trace_exporter, "export", spans.append)
+    fs.write("/docs/a.bin", b"x" * 100)
+    with server._Span("tool download_file", None, server._SPAN_SERVER, {}) as root:
+        asyncio.run(tools.download_file_async("/docs/a.bin", as_base64=True))
+
+    names = [span["name"] for span in spans]
+    assert names[-1] == "tool download_file"
+    assert "copyparty GET ls" in names and "copyparty GET range" in names and "base64.encode" in names
+    assert {span["traceId"] for span in spans} == {root.trace_id}
+    request = next(span for span in spans if span["name"] == "copyparty GET range")
+    assert request["parentSpanId"] == root.span_id
+    assert {"key": "http.status_code", "value": {"intValue": "206"}} in request["attributes"]
+
+
+def test_untraced_calls_make_no_spans(fs, tools, monkeypatch):
+    spans = []
+    monkeypatch.setattr(server._trace_exporter, "export", spans.append)
+    fs.write("/docs/a.txt", b"a")
+    asyncio.run(tools.list_files_async("/docs/"))
+    assert spans == []
+
+
+def test_trace_file_gets_one_line_per_span(monkeypatch, tmp_path):
+    monkeypatch.setattr(server, "COPYPARTY_TRACE_FILE", str(tmp_path / "traces.jsonl"))
+    root = server._Span("tool x", None, server._SPAN_SERVER, {"n": 1})
+    server._trace_exporter._write([root.encode(root.start), root.encode(root.start)])
+    lines = (tmp_path / "traces.jsonl").read_text().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["tool x", "tool x"]
@@ -0,0 +1,91 @@
+"""Paged reads: download_file offsets, range resources and spooled parallel downloads."""
+import asyncio
+import base64
+import threading
+
+import pytest
+
+import server
+
+DATA = bytes(range(256)) * 5
+
+
+def download(tools, variant, path, **kwargs):
+    if variant == "sync":
+        return server.download_file(path, **kwargs)
+    return asyncio.run(tools.download_file_async(path, **kwargs))
+
+
+@pytest.mark.parametrize("variant", ["sync", "async"])
+def test_pages_follow_next_offset(fs, tools, variant):
+    fs.write("/media/clip.bin", DATA)
+    pages, offset = [], 0
+    while offset is not None:
+        page = download(tools, variant, "/media/clip.bin", as_base64=True, offset=offset, length=300)
+        assert page["total_size"] == len(DATA)
+        pages.append(base64.b64decode(page["content"]))
+        offset = page.get("next_offset")
+    assert [len(p) for p in pages] == [300, 300, 300, 300, 80]
+    assert b"".join(pages) == DATA
+    assert not page["truncated"]
+
+
+@pytest.mark.parametrize("variant", ["sync", "async"])
+def test_offset_past_end_is_empty(fs, tools, variant):
+    fs.write("/media/clip.bin", DATA)
+    page = download(tools, variant, "/media/clip.bin", offset=len(DATA))
+    assert page["size"] == 0 and not page["truncated"]
+
+
+@pytest.mark.parametrize("variant", ["sync", "async"])
+def test_negative_offset_is_rejected(fs, tools, variant):
+    fs.write("/media/clip.bin", DATA)
+    with pytest.raises(ValueError, match="must be 0 or more"):
+        download(tools, variant, "/media/clip.bin", offset=-10)
+
+
+def test_range_resource(fs):
+    fs.write("/media/clip.bin", DATA)
+    fs.write("/media/notes.txt", "h\u00e9llo".encode())
+    assert asyncio.run(server._aresource_slice("/media/notes.txt", 0, 100)) == "h\u00e9llo"
+    assert asyncio.run(server._aresource_slice("/media/clip.bin", 1000, 1000)) == DATA[1000:]
+    assert asyncio.run(server._aresource_slice("/media/clip.bin", len(DATA), 10)) == ""
+    with pytest.raises(ValueError):
+        asyncio.run(server._aresource_slice("/media/clip.bin", -1, 10))
+
+
+def test_parallel_download_spool_pages(fs, tools):
+    fs.write("/media/clip.bin", DATA)
+    spooled = asyncio.run(tools.download_file_parallel_async("/media/clip.bin", chunk_size=256, concurrency=2))
+    assert spooled["size"] == len(DATA) and spooled["ranges"] == 5
+
+    pages, offset = [], 0
+    while offset is not None:
+        page = server.read_spooled_file(spooled["spool_id"], offset, 500)
+        pages.append(base64.b64decode(page["content"]))
+        offset = page.get("next_offset")
+    assert b"".join(pages) == DATA
+
+    with pytest.raises(ValueError, match="must be 0 or more"):
+        server.read_spooled_file(spooled["spool_id"], -1)
+    with pytest.raises(ValueError, match="must be 0 or more"):
+        asyncio.run(tools.read_spooled_file_async(spooled["spool_id"], -1))
+
+    server.delete_spooled_file(spooled["spool_id"])
+    with pytest.raises(FileNotFoundError):
+        server.read_spooled_file(spooled["spool_id"])
+
+
+def test_parallel_download_writes_off_the_event_loop(fs, tools, monkeypatch):
+    fs.write("/media/clip.bin", DATA)
+    threads = set()
+    write = server._SpoolFile.write
+
+    def recording_write(self, offset, data):
+        threads.add(threading.current_thread())
+        write(self, offset, data)
+
+    monkeypatch.setattr(server._SpoolFile, "write", recording_write)
+    monkeypatch.setattr(server, "_prune_spool", lambda reserve=0: threads.add(threading.current_thread()))
+    asyncio.run(tools.download_file_parallel_async("/media/clip.bin", chunk_size=256, concurrency=2))
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,61 @@
+"""Single-flight: identical reads in flight at the same time share one upstream request."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import server
+
+
+def gets(fs, query):
+    return [r for r in fs.requests if r[0] == "GET" and r[2] == query]
+
+
+def test_concurrent_async_reads_share_one_request(fs, tools):
+    fs.write("/img/a.jpg", b"a")
+    fs.delay = 0.2
+
+    async def burst():
+        return await asyncio.gather(*(tools.get_thumbnail_async("/img/a.jpg") for _ in range(5)))
+
+    coalesced = server._single_flight.info()["coalesced"]
+    results = asyncio.run(burst())
+    assert all(r == results[0] for r in results)
+    assert len(gets(fs, "th=")) == 1
+    assert len(gets(fs, "ls=")) == 1
+    assert server._single_flight.info()["coalesced"] >= coalesced + 4
+
+
+def test_concurrent_threaded_reads_share_one_request(fs):
+    fs.write("/docs/a.txt", b"text")
+    fs.delay = 0.2
+    with ThreadPoolExecutor(5) as pool:
+        results = list(pool.map(lambda _: server.download_file_as_text("/docs/a.txt")["content"], range(5)))
+    assert results == ["text"] * 5
+    assert len(gets(fs, "txt=")) == 1
+
+
+def test_failure_is_shared_and_not_kept(fs, tools, monkeypatch):
+    monkeypatch.setattr(server, "COPYPARTY_RETRIES", 0)
+    fs.delay = 0.2
+
+    async def burst():
+        return await asyncio.gather(*(tools.list_files_async("/missing/") for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(burst())
+    assert all(isinstance(e, server.httpx.HTTPStatusError) for e in errors)
+    assert len(gets(fs, "ls=")) == 1
+    assert server._single_flight.info()["in_flight"] == 0
+
+    fs.mkdir("/missing")
+    assert asyncio.run(tools.list_files_async("/missing/"))["files"] == []
+
+
+def test_disabled_sends_every_request(fs, tools, monkeypatch):
+    monkeypatch.setattr(server, "COPYPARTY_SINGLE_FLIGHT", False)
+    fs.write("/img/a.jpg", b"a")
+    fs.delay = 0.1
+
+    async def burst():
+        return await asyncio.gather(*(tools.get_thumbnail_async("/img/a.jpg") for _ in range(3)))
+
+    asyncio.run(burst())
+    assert len(gets(fs, "th=")) == 3
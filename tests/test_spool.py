@@ -0,0 +1,65 @@
+"""Spooled archives: streamed to disk off the event loop, within COPYPARTY_SPOOL_MAX_BYTES."""
+import asyncio
+import base64
+import io
+import os
+import tarfile
+import threading
+
+import pytest
+
+import server
+
+
+def spool_names():
+    return {name for name in os.listdir(server.COPYPARTY_SPOOL_DIR) if name.startswith(server._SPOOL_PREFIXES)}
+
+
+def test_spooled_tar_reads_back(fs, tools):
+    fs.write("/docs/a.txt", b"a" * 1000)
+    fs.write("/docs/b.txt", b"b" * 1000)
+    result = asyncio.run(tools.download_as_tar_async("/docs", spool=True))
+    page = server.read_spooled_file(result["spool_id"], 0, result["size"])
+    with tarfile.open(fileobj=io.BytesIO(base64.b64decode(page["content"]))) as tar:
+        assert sorted(m.name.rsplit("/", 1)[-1] for m in tar.getmembers() if m.isfile()) == ["a.txt", "b.txt"]
+    server.delete_spooled_file(result["spool_id"])
+
+
+def test_spooled_archive_appends_off_the_event_loop(fs, tools, monkeypatch):
+    fs.write("/docs/a.txt", b"a" * 1000)
+    threads = set()
+    append = server._SpoolFile.append
+
+    def recording_append(self, data):
+        threads.add(threading.current_thread())
+        append(self, data)
+
+    monkeypatch.setattr(server._SpoolFile, "append", recording_append)
+    result = asyncio.run(tools.download_as_tar_async("/docs", spool=True))
+    assert threads and threading.main_thread() not in threads
+    server.delete_spooled_file(result["spool_id"])
+
+
+def test_growing_archive_makes_room_by_removing_older_spools(fs, tools, monkeypatch):
+    monkeypatch.setattr(server, "COPYPARTY_SPOOL_MAX_BYTES", 64 * 1024)
+    monkeypatch.setattr(server, "_SPOOL_APPEND_STEP", 1024)
+    old = server._SpoolFile("/old.bin", 40 * 1024)
+    old.close()
+    os.utime(old.path, (1, 1))
+    fs.write("/docs/a.bin", os.urandom(30 * 1024))
+
+    result = asyncio.run(tools.download_as_tar_async("/docs", spool=True))
+    assert not os.path.exists(old.path)
+    server.delete_spooled_file(result["spool_id"])
+
+
+def test_archive_larger_than_the_spool_limit_fails(fs, tools, monkeypatch):
+    monkeypatch.setattr(server, "COPYPARTY_SPOOL_MAX_BYTES", 16 * 1024)
+    monkeypatch.setattr(server, "_SPOOL_APPEND_STEP", 1024)
+    fs.write("/docs/a.bin", os.urandom(64 * 1024))
+    before = spool_names()
+    with pytest.raises(IOError, match="COPYPARTY_SPOOL_MAX_BYTES"):
+        asyncio.run(tools.download_as_tar_async("/docs", spool=True))
+    with pytest.raises(IOError, match="COPYPARTY_SPOOL_MAX_BYTES"):
+        server.download_as_tar("/docs", spool=True)
+    assert spool_names() == before
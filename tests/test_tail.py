@@ -0,0 +1,100 @@
+"""tail_file and tail_files: start offsets, resumable cursors and long-polls."""
+import asyncio
+import threading
+
+import pytest
+
+import server
+
+
+@pytest.fixture(autouse=True)
+def quick_settle(monkeypatch):
+    monkeypatch.setattr(server, "_TAIL_SETTLE_SECONDS", 0.05)
+
+
+def tail(tools, variant, path, **kwargs):
+    if variant == "sync":
+        return server.tail_file(path, **kwargs)
+    return asyncio.run(tools.tail_file_async(path, **kwargs))
+
+
+def append_later(fs, path, data, delay=0.2):
+    def append():
+        fs.write(path, fs.files[path] + data)
+    timer = threading.Timer(delay, append)
+    timer.start()
+    return timer
+
+
+@pytest.mark.parametrize("variant", ["sync", "async"])
+def test_start_offsets(fs, tools, variant):
+    fs.write("/log/app.log", b"0123456789")
+    assert tail(tools, variant, "/log/app.log")["content"] == "0123456789"
+
+    result = tail(tools, variant, "/log/app.log", start_byte=3)
+    assert (result["offset"], result["content"], result["next_offset"]) == (3, "3456789", 10)
+
+    # Negative start counts from the end
+    result = tail(tools, variant, "/log/app.log", start_byte=-4)
+    assert (result["offset"], result["content"], result["next_offset"]) == (6, "6789", 10)
+    assert tail(tools, variant, "/log/app.log", start_byte=-100)["offset"] == 0
+
+
+@pytest.mark.parametrize("variant", ["sync", "async"])
+def test_cursor_returns_only_new_bytes(fs, tools, variant):
+    fs.write("/log/app.log", b"first\n")
+    cursor = tail(tools, variant, "/log/app.log")["next_offset"]
+    idle = tail(tools, variant, "/log/app.log", start_byte=cursor)
+    assert not idle["has_new_data"] and idle["next_offset"] == cursor
+
+    fs.write("/log/app.log", b"first\nsecond\n")
+    result = tail(tools, variant, "/log/app.log", start_byte=cursor)
+    assert result["content"] == "second\n" and result["next_offset"] == 13
+
+
+@pytest.mark.parametrize("variant", ["sync", "async"])
+def test_long_poll_waits_for_new_bytes(fs, tools, variant):
+    fs.write("/log/app.log", b"old\n")
+    timer = append_later(fs, "/log/app.log", b"new\n")
+    result = tail(tools, variant, "/log/app.log", start_byte=4, wait_seconds=5)
+    timer.join()
+    assert result["content"] == "new\n"
+
+
+def test_slow_stream_open_still_returns_its_bytes(fs, tools, monkeypatch):
+    fs.write("/log/app.log", b"ready\n")
+    # The reply takes longer than the whole wait to arrive
+    fs.delay = 0.2
+    result = asyncio.run(tools.tail_file_async("/log/app.log"))
+    assert result["content"] == "ready\n"
+
+
+def test_max_bytes_keeps_utf8_characters_whole(fs, tools):
+    fs.write("/log/app.log", "héllo".encode())
+    result = asyncio.run(tools.tail_file_async("/log/app.log", max_bytes=2))
+    assert result["content"] == "h" and result["next_offset"] == 1 and result["truncated"]
+
+
+def test_tail_files_merges_lines_and_resumes(fs, tools):
+    fs.write("/log/a.log", b"a1\na2\n")
+    fs.write("/log/b.log", b"b1\n")
+    first = asyncio.run(tools.tail_files_async(["/log/a.log", "/log/b.log"], offsets={"/log/a.log": 0}))
+    # b.log had no offset, so it starts at its current end
+    assert [(line["path"], line["line"]) for line in first["lines"]] == [("/log/a.log", "a1"), ("/log/a.log", "a2")]
+    assert first["offsets"] == {"/log/a.log": 6, "/log/b.log": 3}
+
+    fs.write("/log/b.log", b"b1\nb2\nb3-partial")
+    second = asyncio.run(tools.tail_files_async(["/log/a.log", "/log/b.log"], offsets=first["offsets"]))
+    # The unterminated line is left for the next call
+    assert [line["line"] for line in second["lines"]] == ["b2"]
+    assert second["lines"][0]["offset"] == 3
+    assert second["offsets"] == {"/log/a.log": 6, "/log/b.log": 6}
+
+
+def test_tail_files_long_poll_and_errors(fs, tools):
+    fs.write("/log/a.log", b"a1\n")
+    timer = append_later(fs, "/log/a.log", b"a2\n")
+    result = asyncio.run(tools.tail_files_async(["/log/a.log", "/log/missing.log"], wait_seconds=5))
+    timer.join()
+    assert [line["line"] for line in result["lines"]] == ["a2"]
+    assert not result["success"] and list(result["errors"]) == ["/log/missing.log"]
@@ -0,0 +1,42 @@
+"""get_thumbnail / get_thumbnails: batch results, failures and progress notifications."""
+import asyncio
+import json
+
+import fake_copyparty
+
+
+class RecordingContext:
+    """Stands in for the MCP context; keeps every progress notification."""
+
+    def __init__(self):
+        self.progress = []
+
+    async def report_progress(self, progress, total=None, message=None):
+        self.progress.append((progress, total, message))
+
+
+def test_batch_reports_each_path(fs, tools):
+    fs.write("/img/a.jpg", b"a")
+    fs.write("/img/b.jpg", b"b")
+    ctx = RecordingContext()
+    paths = ["/img/a.jpg", "/img/missing.jpg", "/img/b.jpg"]
+    result = asyncio.run(tools.get_thumbnails_async(paths, concurrency=2, ctx=ctx))
+
+    assert [r["path"] for r in result["results"]] == paths
+    assert [r["success"] for r in result["results"]] == [True, False, True]
+    assert result["failed"] == 1 and not result["success"]
+    assert result["results"][0]["size"] == len(fake_copyparty.THUMBNAIL)
+
+    # Progress carries a summary per path, never the thumbnail itself
+    assert sorted(p for p, _, _ in ctx.progress) == [1, 2, 3]
+    summaries = {m["path"]: m for m in (json.loads(message) for _, _, message in ctx.progress)}
+    assert summaries["/img/a.jpg"] == {"path": "/img/a.jpg", "success": True, "size": len(fake_copyparty.THUMBNAIL)}
+    assert summaries["/img/missing.jpg"] == {"path": "/img/missing.jpg", "success": False, "size": None}
+
+
+def test_single_thumbnail_matches_batch(fs, tools):
+    fs.write("/img/a.jpg", b"a")
+    single = asyncio.run(tools.get_thumbnail_async("/img/a.jpg"))
+    batch = asyncio.run(tools.get_thumbnails_async(["/img/a.jpg"]))
+    assert batch["results"] == [single]
+    assert single["content_type"] == "image/jpeg"
@@ -0,0 +1,57 @@
+"""Keep-alive connection reuse, and large result bodies encoded off the event loop."""
+import asyncio
+import base64
+import threading
+import time
+
+import server
+
+
+def test_sync_requests_reuse_pooled_connections(fs):
+    fs.write("/docs/a.txt", b"a")
+    server._make_request("GET", "/docs/a.txt")
+    before = server._get_pool_info()
+    for _ in range(3):
+        server._make_request("GET", "/docs/a.txt")
+    after = server._get_pool_info()
+    assert after["new_connections"] == before["new_connections"]
+    assert after["hits"] >= before["hits"] + 3
+
+
+def test_async_requests_run_concurrently(fs, tools):
+    fs.populate(4, 1, 16, root="/tree")
+    fs.delay = 0.2
+    before = server._async_stats.snapshot()
+
+    async def burst():
+        return await asyncio.gather(*(tools.list_files_async(f"/tree/d{d:04}/") for d in range(4)))
+
+    started = time.monotonic()
+    assert all(len(listing["files"]) == 1 for listing in asyncio.run(burst()))
+    # All four were in flight at once, not one after the other
+    assert time.monotonic() - started < 0.6
+    assert server._async_stats.snapshot()["requests"] == before["requests"] + 4
+
+
+def test_b64encode_matches_stdlib_across_steps():
+    for size in (0, 1, 2, 3, server._B64_CHUNK - 1, server._B64_CHUNK, 2 * server._B64_CHUNK + 1):
+        data = bytes(range(256)) * (size // 256) + bytes(size % 256)
+        assert server._b64encode(data) == base64.b64encode(data).decode()
+
+
+def test_large_bodies_are_encoded_on_the_pool(fs, tools, monkeypatch):
+    monkeypatch.setattr(server, "COPYPARTY_ENCODE_OFFLOAD_BYTES", 1000)
+    threads = []
+    range_result = server._range_result
+
+    def recording_result(*args):
+        threads.append(threading.current_thread().name)
+        return range_result(*args)
+
+    monkeypatch.setattr(server, "_range_result", recording_result)
+    fs.write("/docs/small.bin", b"s" * 10)
+    fs.write("/docs/large.bin", b"l" * 5000)
+    small = asyncio.run(tools.download_file_async("/docs/small.bin", as_base64=True))
+    large = asyncio.run(tools.download_file_async("/docs/large.bin", as_base64=True))
+    assert base64.b64decode(large["content"]) == b"l" * 5000 and small["size"] == 10
+    assert threads[0] == "MainThread" and threads[1].startswith("encode")
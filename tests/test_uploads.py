@@ -0,0 +1,90 @@
+"""upload_file with up2k (dedup and resume) and upload_files."""
+import asyncio
+import base64
+import os
+
+import httpx
+import pytest
+
+import server
+
+# Four 1 MiB up2k chunks, the last one short
+DATA = os.urandom(3 * 1024 * 1024 + 1000)
+
+
+def up2k_upload(tools, data=DATA, name="big.bin"):
+    return asyncio.run(tools.upload_file_async("/up/", base64.b64encode(data).decode(), name, is_base64=True, up2k=True))
+
+
+def test_up2k_sends_only_missing_chunks(fs, tools):
+    first = up2k_upload(tools)
+    assert fs.files["/up/big.bin"] == DATA
+    assert first["chunks_total"] == first["chunks_uploaded"] == 4
+    assert not first["deduplicated"]
+
+    # Same content again: the first handshake already needs nothing
+    fs.requests.clear()
+    again = up2k_upload(tools)
+    assert again["deduplicated"] and again["chunks_uploaded"] == 0
+    assert len(fs.requests) == 1
+
+
+def test_up2k_resumes_an_interrupted_upload(fs, tools, monkeypatch):
+    amake_request = server._amake_request
+    sent = []
+
+    async def flaky_request(method, path, **kwargs):
+        # The connection drops after two chunks went through
+        if "X-Up2k-Hash" in kwargs.get("headers", {}):
+            if len(sent) == 2:
+                raise httpx.ConnectError("connection reset")
+            sent.append(kwargs["headers"]["X-Up2k-Hash"])
+        return await amake_request(method, path, **kwargs)
+
+    monkeypatch.setattr(server, "COPYPARTY_UP2K_UPLOAD_WORKERS", 1)
+    monkeypatch.setattr(server, "_amake_request", flaky_request)
+    with pytest.raises(httpx.ConnectError):
+        up2k_upload(tools)
+    assert "/up/big.bin" not in fs.files
+
+    monkeypatch.setattr(server, "_amake_request", amake_request)
+    resumed = up2k_upload(tools)
+    assert resumed["chunks_uploaded"] == 2 and not resumed["deduplicated"]
+    assert fs.files["/up/big.bin"] == DATA
+
+
+def test_up2k_sync_matches_async(fs, tools):
+    data = DATA[:5000]
+    result = server.upload_file("/up/", base64.b64encode(data).decode(), "small.bin", is_base64=True, up2k=True)
+    assert result["mode"] == "up2k" and result["chunks_total"] == 1
+    assert fs.files["/up/small.bin"] == data
+    assert up2k_upload(tools, data, "small.bin")["deduplicated"]
+
+
+def test_upload_files_creates_targets_and_keeps_order(fs, tools):
+    files = [
+        {"name": "index.html", "content": "<html/>"},
+        {"name": "css/site.css", "content": "body{}"},
+        {"name": "img/logo.png", "content": base64.b64encode(b"\x89PNG").decode(), "is_base64": True},
+    ]
+    result = asyncio.run(tools.upload_files_async("/site", files, concurrency=2))
+    assert result["success"] and result["succeeded"] == 3
+    assert [r["path"] for r in result["results"]] == ["/site/index.html", "/site/css/site.css", "/site/img/logo.png"]
+    assert fs.files["/site/img/logo.png"] == b"\x89PNG"
+    assert result["bytes"] == len("<html/>") + len("body{}") + 4
+    # One mkdir per missing directory, made before the uploads
+    assert sorted(r[1] for r in fs.requests if r[0] == "POST" and "j" not in r[2]) == ["/", "/site", "/site"]
+
+
+def test_upload_files_from_staging_directory(fs, tools, monkeypatch, tmp_path):
+    (tmp_path / "docs" / "sub").mkdir(parents=True)
+    (tmp_path / "docs" / "a.txt").write_bytes(b"a")
+    (tmp_path / "docs" / "sub" / "b.txt").write_bytes(b"b")
+    monkeypatch.setattr(server, "COPYPARTY_STAGING_DIR", str(tmp_path))
+
+    result = asyncio.run(tools.upload_files_async("/dst", [{"local_path": "docs"}]))
+    assert [r["name"] for r in result["results"]] == ["a.txt", "sub/b.txt"]
+    assert fs.files["/dst/a.txt"] == b"a" and fs.files["/dst/sub/b.txt"] == b"b"
+
+    with pytest.raises(ValueError, match="outside the staging directory"):
+        asyncio.run(tools.upload_files_async("/dst", [{"local_path": "../etc/passwd"}]))
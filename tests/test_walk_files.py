@@ -0,0 +1,44 @@
+"""walk_files: complete walks, filters, and stopping early at max_results."""
+import asyncio
+
+import server
+
+
+def walk(tools, path, **kwargs):
+    return asyncio.run(tools.walk_files_async(path, **kwargs))
+
+
+def test_walks_whole_tree(fs, tools):
+    fs.populate(3, 4, 16, root="/tree")
+    result = walk(tools, "/tree")
+    assert result["success"] and not result["truncated"]
+    assert result["count"] == 12
+    assert result["directories_scanned"] == 4
+    assert {r["path"] for r in result["results"]} == {
+        f"/tree/d{d:04}/f{f:04}.bin" for d in range(3) for f in range(4)
+    }
+
+
+def test_include_and_exclude(fs, tools):
+    fs.populate(2, 2, 16, root="/tree")
+    fs.write("/tree/d0000/notes.txt", b"n")
+    result = walk(tools, "/tree", include=["*.txt"])
+    assert [r["path"] for r in result["results"]] == ["/tree/d0000/notes.txt"]
+    result = walk(tools, "/tree", exclude=["d0001"])
+    assert all(r["path"].startswith("/tree/d0000/") for r in result["results"])
+
+
+def test_stops_early_at_max_results(fs, tools):
+    fs.populate(5, 20, 16, root="/tree")
+    result = walk(tools, "/tree", max_results=30, concurrency=1)
+    assert result["truncated"]
+    assert result["count"] == len(result["results"]) == 30
+    # One listing of /tree and two of its folders are enough for 30 files
+    assert result["directories_scanned"] == 3
+
+
+def test_does_not_fill_listing_cache(fs, tools):
+    fs.populate(5, 2, 16, root="/tree")
+    before = server._listing_cache.info()["entries"]
+    walk(tools, "/tree")
+    assert server._listing_cache.info()["entries"] == before